@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+起動時間のベンチマーク
+新しいPythonプロセスで main.py と各サブコマンドのモジュールを読み込む時間を計測し、
+サブコマンドに不要な重い依存ライブラリが読み込まれていないか確認する
+"""
+
+import sys
+import os
+import argparse
+import json
+import subprocess
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+# 読み込みに時間がかかる依存ライブラリ
+HEAVY_MODULES = ['linebot', 'gspread', 'google.auth', 'bs4', 'requests', 'pyarrow', 'numpy']
+
+# サブコマンドごとに読み込んでよい重い依存ライブラリ
+ALLOWED = {
+    'scrape': {'bs4', 'requests'},
+    'select': {'bs4', 'requests'},
+}
+
+PROBE = """
+import sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+import main
+from src.cli import load_command
+if {command!r}:
+    load_command({command!r})
+elapsed = time.perf_counter() - started
+print(elapsed)
+print(','.join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def measure(command: str, repeat: int):
+    """新しいプロセスで読み込み時間（最小値、秒）と読み込まれた重いライブラリを計測"""
+    code = PROBE.format(root=ROOT, command=command, heavy=HEAVY_MODULES)
+    timings = []
+    loaded = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True, cwd=ROOT
+        ).stdout.splitlines()
+        process = time.perf_counter() - started
+        timings.append((float(output[0]), process))
+        loaded = [name for name in output[1].split(',') if name] if len(output) > 1 else []
+    return min(t[0] for t in timings), min(t[1] for t in timings), loaded
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='起動時間のベンチマーク')
+    parser.add_argument('--repeat', type=int, default=5, help='各コマンドの計測回数（最小値を採用）')
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='サブコマンドの読み込み時間の上限（超えたら終了コード1）')
+    parser.add_argument('--output', help='結果を保存するJSONファイル')
+    args = parser.parse_args()
+
+    from src.cli import COMMANDS
+
+    results = {}
+    failed = []
+    for command in [''] + list(COMMANDS):
+        name = command or 'main'
+        import_sec, process_sec, loaded = measure(command, args.repeat)
+        unexpected = sorted(set(loaded) - ALLOWED.get(command, set()))
+        results[name] = {
+            'import_ms': round(import_sec * 1000, 1),
+            'process_ms': round(process_sec * 1000, 1),
+            'heavy_modules': loaded,
+        }
+        if unexpected:
+            failed.append(f"{name}: 不要なライブラリを読み込み {unexpected}")
+        if args.max_ms is not None and import_sec * 1000 > args.max_ms:
+            failed.append(f"{name}: {import_sec * 1000:.0f}ms > {args.max_ms:.0f}ms")
+
+    report = {'python': sys.version.split()[0], 'results': results, 'failures': failed}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+LINE配信のベンチマーク
+ローカルのLINE API代替サーバーに対して、マルチキャストのバッチ分割・並列度・再送の挙動を計測
+"""
+
+import sys
+import os
+import argparse
+import json
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.subscriber_store import SubscriberStore, EVENT_FOLLOW, TIER_PREMIUM
+from src.notification.fake_line_api import FakeLineApiServer
+from src.notification.line_notifier import LineNotifier
+
+SAMPLE_RACE = {
+    'race_name': '住之江12R',
+    'race_time': '20:25',
+    'expected_odds': 65.2,
+    'race_url': 'https://www.boatrace.jp/owpc/pc/race/racelist?rno=12&jcd=06&hd=20241223',
+}
+SAMPLE_BET = {'combination': '1-3-2', 'bet_type': '3連単'}
+
+
+def run_case(store: SubscriberStore, audience: str, workers: int, latency: float,
+             error_rate: float, rate_limit: int, error_after_accept: bool = False) -> dict:
+    """1条件分の配信を計測"""
+    server = FakeLineApiServer(
+        latency=latency, error_rate=error_rate, rate_limit=rate_limit,
+        monthly_quota=10 ** 9, seed=0, error_after_accept=error_after_accept
+    )
+    endpoint = server.start()
+    try:
+        notifier = LineNotifier(
+            subscriber_store=store, endpoint=endpoint, channel_access_token='benchmark-token'
+        )
+        notifier.multicast_workers = workers
+
+        started = time.perf_counter()
+        success = notifier.send_prediction(SAMPLE_RACE, SAMPLE_BET, audience=audience)
+        elapsed = time.perf_counter() - started
+
+        requests = server.requests_for('/v2/bot/message/multicast')
+        return {
+            'audience': audience,
+            'workers': workers,
+            'success': success,
+            'seconds': round(elapsed, 3),
+            'requests': len(requests),
+            'retried': sum(1 for r in requests if r['status'] != 200),
+            'messages_consumed': server.total_usage,
+        }
+    finally:
+        server.stop()
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='LINE配信のベンチマーク')
+    parser.add_argument('--followers', type=int, default=20000, help='フォロワー数')
+    parser.add_argument('--premium-ratio', type=float, default=0.1, help='プレミアム会員の割合')
+    parser.add_argument('--latency', type=float, default=0.05, help='APIの応答遅延（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='エラー応答の確率')
+    parser.add_argument('--rate-limit', type=int, default=None, help='1秒あたりの許容リクエスト数')
+    parser.add_argument('--error-after-accept', action='store_true',
+                        help='エラーを配信の受け付け後に返す（再送で二重に配信しないかの確認）')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8], help='並列度')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SubscriberStore(os.path.join(tmp_dir, 'subscribers.db'))
+        store.apply_events([
+            (f"U{i:010d}", EVENT_FOLLOW, '2024-12-23T00:00:00') for i in range(args.followers)
+        ])
+        premium_step = max(1, int(1 / args.premium_ratio)) if args.premium_ratio else 0
+        if premium_step:
+            for i in range(0, args.followers, premium_step):
+                store.set_tier(f"U{i:010d}", TIER_PREMIUM)
+
+        results = []
+        for audience in ('premium', 'followers'):
+            for workers in args.workers:
+                results.append(run_case(
+                    store, audience, workers, args.latency, args.error_rate, args.rate_limit,
+                    args.error_after_accept
+                ))
+        store.close()
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
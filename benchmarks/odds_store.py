@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+オッズ時系列ストアのベンチマーク
+1開催日分のスナップショットをJSON Lines形式と比較し、サイズ・追記時間・読み出し時間を計測
+"""
+
+import sys
+import os
+import argparse
+import json
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.odds_store import OddsStore, COMBINATIONS
+from src.scraping.venues import VENUE_CODES
+
+RACE_DATE = '2024-12-23'
+START = datetime(2024, 12, 23, 8, 0)
+
+
+def make_snapshots(races: int, snapshots: int, seed: int):
+    """(会場, レース番号, 取得時刻, オッズ) のスナップショットを生成"""
+    rng = random.Random(seed)
+    venues = list(VENUE_CODES)
+    result = []
+    for s in range(snapshots):
+        for r in range(races):
+            odds = {c: round(rng.uniform(5.0, 2000.0), 1) for c in COMBINATIONS}
+            timestamp = (START + timedelta(minutes=5 * s, seconds=r)).timestamp()
+            result.append((venues[r // 12 % len(venues)], r % 12 + 1, timestamp, odds))
+    return result
+
+
+def dir_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path) for name in names
+    )
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='オッズ時系列ストアのベンチマーク')
+    parser.add_argument('--races', type=int, default=150, help='1日のレース数')
+    parser.add_argument('--snapshots', type=int, default=40, help='1レースあたりのスナップショット数')
+    parser.add_argument('--seed', type=int, default=0, help='乱数シード')
+    args = parser.parse_args()
+
+    snapshots = make_snapshots(args.races, args.snapshots, args.seed)
+    venue, race_number = snapshots[0][0], snapshots[0][1]
+    window_start = START + timedelta(hours=1)
+    window_end = START + timedelta(hours=2)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 配列ストア
+        store = OddsStore(os.path.join(tmp_dir, 'odds'))
+        started = time.perf_counter()
+        for v, n, timestamp, odds in snapshots:
+            store.append(RACE_DATE, v, n, odds, timestamp)
+        binary_append = time.perf_counter() - started
+
+        started = time.perf_counter()
+        timestamps, values = store.slice(RACE_DATE, venue, race_number, window_start, window_end)
+        binary_read = time.perf_counter() - started
+        binary_size = dir_size(os.path.join(tmp_dir, 'odds'))
+
+        # JSON Lines（比較用）
+        json_path = os.path.join(tmp_dir, 'odds.jsonl')
+        started = time.perf_counter()
+        for v, n, timestamp, odds in snapshots:
+            with open(json_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({
+                    'venue': v, 'race_number': n, 'timestamp': timestamp, 'odds': odds
+                }, ensure_ascii=False) + '\n')
+        json_append = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with open(json_path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        json_matches = [
+            row for row in rows
+            if row['venue'] == venue and row['race_number'] == race_number
+            and window_start.timestamp() <= row['timestamp'] < window_end.timestamp()
+        ]
+        json_read = time.perf_counter() - started
+        json_size = os.path.getsize(json_path)
+
+    print(json.dumps({
+        'snapshots': len(snapshots),
+        'combinations': len(COMBINATIONS),
+        'binary': {
+            'bytes': binary_size,
+            'append_seconds': round(binary_append, 3),
+            'slice_seconds': round(binary_read, 5),
+            'slice_rows': len(timestamps),
+        },
+        'json': {
+            'bytes': json_size,
+            'append_seconds': round(json_append, 3),
+            'slice_seconds': round(json_read, 5),
+            'slice_rows': len(json_matches),
+        },
+        'size_ratio': round(json_size / binary_size, 1),
+        'slice_speedup': round(json_read / binary_read, 1),
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+予想通知・記録のパイプラインのベンチマーク
+通知・記録を1件ずつ順に行う場合と、段ごとのワーカープールで並行させる場合の所要時間を比較
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.pipeline import Stage
+
+
+def make_task(delay: float):
+    """delay秒かかる処理（API呼び出しの代わり）"""
+    def task(item) -> bool:
+        time.sleep(delay)
+        return True
+    return task
+
+
+def run_sequential(bets: int, arrival: float, notify, record) -> float:
+    started = time.perf_counter()
+    for bet in range(bets):
+        time.sleep(arrival)
+        notify(bet)
+        record(bet)
+    return time.perf_counter() - started
+
+
+def run_pipelined(bets: int, arrival: float, notify, record,
+                  notify_workers: int, record_workers: int) -> float:
+    started = time.perf_counter()
+    notify_stage = Stage('通知', notify, notify_workers)
+    record_stage = Stage('記録', record, record_workers)
+    for bet in range(bets):
+        time.sleep(arrival)
+        notify_stage.submit(bet)
+        record_stage.submit(bet)
+    notify_stage.join()
+    record_stage.join()
+    return time.perf_counter() - started
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='予想通知・記録のパイプラインのベンチマーク')
+    parser.add_argument('--bets', type=int, default=12, help='買い目数')
+    parser.add_argument('--arrival', type=float, default=0.05, help='レース取得・選定の間隔（秒）')
+    parser.add_argument('--notify-latency', type=float, default=0.2, help='LINE送信1件の時間（秒）')
+    parser.add_argument('--record-latency', type=float, default=0.1, help='記録1件の時間（秒）')
+    parser.add_argument('--notify-workers', type=int, default=4)
+    parser.add_argument('--record-workers', type=int, default=2)
+    args = parser.parse_args()
+
+    notify = make_task(args.notify_latency)
+    record = make_task(args.record_latency)
+
+    sequential = run_sequential(args.bets, args.arrival, notify, record)
+    pipelined = run_pipelined(args.bets, args.arrival, notify, record,
+                              args.notify_workers, args.record_workers)
+
+    # 最も遅い段だけを処理した場合の所要時間の目安
+    slowest = max(
+        args.bets * args.arrival,
+        args.bets * args.notify_latency / args.notify_workers,
+        args.bets * args.record_latency / args.record_workers,
+    )
+
+    print(json.dumps({
+        'bets': args.bets,
+        'sequential_sec': round(sequential, 2),
+        'pipelined_sec': round(pipelined, 2),
+        'slowest_stage_sec': round(slowest, 2),
+        'speedup': round(sequential / pipelined, 1),
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+レース情報のメモリ使用量ベンチマーク
+辞書で保持した場合と__slots__のデータクラスで保持した場合を比較
+"""
+
+import sys
+import os
+import argparse
+import gc
+import json
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.models import Race, Participant
+from src.scraping.venues import VENUE_CODES
+
+RATINGS = ['A1', 'A2', 'B1', 'B2']
+VENUES = list(VENUE_CODES)
+
+
+def race_fields(i: int) -> dict:
+    """i番目のレースの値（文字列は実データと同様にレースごとに別オブジェクトとする）"""
+    venue = VENUES[i % len(VENUES)]
+    race_number = i % 12 + 1
+    return {
+        'race_name': f"{venue}{race_number}R",
+        'race_date': f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+        'race_time': f"{10 + i % 11}:{i % 60:02d}",
+        'venue': venue,
+        'race_number': race_number,
+        'expected_odds': 50.0 + i % 100,
+        'race_url': f"https://www.boatrace.jp/owpc/pc/race/racelist?rno={race_number}&jcd={i % 24 + 1:02d}",
+        'grade': 'G1',
+    }
+
+
+def build_dicts(count: int) -> list:
+    races = []
+    for i in range(count):
+        race = race_fields(i)
+        race['participants'] = [
+            {'position': p, 'name': f"選手{i % 1000}-{p}", 'rating': RATINGS[(i + p) % 4]}
+            for p in range(1, 7)
+        ]
+        races.append(race)
+    return races
+
+
+def build_records(count: int) -> list:
+    races = []
+    for i in range(count):
+        race = Race(**race_fields(i))
+        race.participants = [
+            Participant(p, f"選手{i % 1000}-{p}", RATINGS[(i + p) % 4])
+            for p in range(1, 7)
+        ]
+        races.append(race)
+    return races
+
+
+def measure(builder, count: int) -> int:
+    """構築したレース一覧が保持しているメモリ量（バイト）"""
+    gc.collect()
+    tracemalloc.start()
+    races = builder(count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del races
+    return current
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='レース情報のメモリ使用量ベンチマーク')
+    parser.add_argument('--races', type=int, default=100000, help='レース数')
+    args = parser.parse_args()
+
+    dict_bytes = measure(build_dicts, args.races)
+    record_bytes = measure(build_records, args.races)
+    scale = 100000 / args.races
+
+    print(json.dumps({
+        'races': args.races,
+        'dict_mb_per_100k': round(dict_bytes * scale / 1024 ** 2, 1),
+        'slots_mb_per_100k': round(record_bytes * scale / 1024 ** 2, 1),
+        'reduction': f"{(1 - record_bytes / dict_bytes) * 100:.0f}%",
+    }, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+主要な処理のベンチマーク（ネットワーク不要）
+HTML解析・買い目選定・Flexメッセージ作成・結果精算・スプレッドシート行の作成を固定データで計測し、
+結果をJSONで保存してコミット間で比較できるようにする
+
+    python benchmarks/suite.py --output before.json
+    python benchmarks/suite.py --compare before.json   # 1.2倍より遅くなった項目があれば終了コード1
+"""
+
+import sys
+import os
+import argparse
+import json
+import logging
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from bs4 import BeautifulSoup
+
+from src.data.fake_worksheet import FakeWorksheet
+from src.data.models import Bet, Participant, Race, Result
+from src.data.race_store import RaceRecordStore
+from src.data.spreadsheet_manager import SpreadsheetManager, HEADERS
+from src.data.statistics import RunningStatistics
+from src.notification.line_notifier import LineNotifier
+from src.prediction.bet_selector import BetSelector
+from src.scraping.race_calendar import parse_monthly_schedule
+from src.scraping.venues import VENUE_CODES
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+MONTHLY_SCHEDULE_HTML = FIXTURES_DIR / 'monthly_schedule_202412.html'
+
+SEED = 20241223
+RATINGS = ['A1', 'A2', 'B1', 'B2']
+RATING_WEIGHTS = [20, 30, 40, 10]
+
+
+def build_races(count: int, seed: int = SEED, start_date: str = '2024-12-01') -> list:
+    """固定シードでレースを作成（会場・レース番号・級別・予想配当をばらつかせる）"""
+    rng = random.Random(seed)
+    venues = list(VENUE_CODES)
+    first_day = datetime.strptime(start_date, '%Y-%m-%d')
+    races = []
+    for i in range(count):
+        venue = venues[i // 12 % len(venues)]
+        race_number = i % 12 + 1
+        race_date = (first_day + timedelta(days=i // (12 * len(venues)))).strftime('%Y-%m-%d')
+        races.append(Race(
+            race_name=f"{venue}{race_number}R",
+            race_date=race_date,
+            race_time=f"{10 + race_number // 2}:{rng.randrange(0, 60, 5):02d}",
+            venue=venue,
+            race_number=race_number,
+            expected_odds=round(rng.lognormvariate(3.5, 0.6), 1),
+            race_url=(
+                f"https://www.boatrace.jp/owpc/pc/race/racelist?rno={race_number}"
+                f"&jcd={VENUE_CODES[venue]:02d}&hd={race_date.replace('-', '')}"
+            ),
+            grade=rng.choice(['一般', '一般', '一般', 'G3', 'G2', 'G1']),
+            participants=[
+                Participant(p, f"選手{rng.randrange(1000)}", rng.choices(RATINGS, RATING_WEIGHTS)[0])
+                for p in range(1, 7)
+            ],
+        ))
+    return races
+
+
+def build_result(rng: random.Random) -> Result:
+    order = [str(p) for p in rng.sample(range(1, 7), 3)]
+    odds = round(rng.lognormvariate(3.5, 0.8), 1)
+    return Result(
+        result_order=order,
+        payout={'3連単': {'combination': '-'.join(order), 'odds': odds, 'amount': int(odds * 100)}},
+        race_status='completed',
+    )
+
+
+def measure(setup, func, repeat: int) -> list:
+    """setupの戻り値を渡してfuncの所要時間をrepeat回計測（setupは計測に含めない）"""
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        started = time.perf_counter()
+        func(state)
+        timings.append(time.perf_counter() - started)
+        teardown = getattr(state, 'teardown', None)
+        if teardown:
+            teardown()
+    return timings
+
+
+class RecordingState:
+    """一時ディレクトリのローカルストアと代替ワークシートを使う記録"""
+
+    def __init__(self, races: list):
+        self.tmpdir = tempfile.mkdtemp(prefix='bench-')
+        self.manager = SpreadsheetManager(
+            store=RaceRecordStore(os.path.join(self.tmpdir, 'race_records.db')),
+            statistics=RunningStatistics(os.path.join(self.tmpdir, 'statistics.json')),
+            worksheet=FakeWorksheet(rows=[HEADERS]),
+        )
+        self.races = races
+        self.bets = [Bet(race_info=race, combination='1-2-3', investment=1000) for race in races]
+
+    def teardown(self):
+        self.manager.write_buffer.close()
+        self.manager.store.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+def bench_html(repeat: int) -> dict:
+    html = MONTHLY_SCHEDULE_HTML.read_text(encoding='utf-8')
+    soup = BeautifulSoup(html, 'html.parser')
+    return {
+        'html_parse': (measure(lambda: html, lambda h: BeautifulSoup(h, 'html.parser'), repeat), 1),
+        'monthly_schedule_parse': (measure(lambda: soup, lambda s: parse_monthly_schedule(s, 2024, 12), repeat), 1),
+    }
+
+
+def bench_select(repeat: int, sizes: list) -> dict:
+    results = {}
+    for size in sizes:
+        races = build_races(size)
+        selector = BetSelector()
+        # 1日の上限を外して全レースを評価する
+        selector.max_bets_per_day = size
+        results[f"select_bets_{size}"] = (
+            measure(lambda: races, selector.select_bets, repeat), size
+        )
+    return results
+
+
+def bench_flex(repeat: int, count: int) -> dict:
+    notifier = LineNotifier(channel_access_token='benchmark')
+    races = build_races(count)
+    bets = [Bet(race_info=race, combination='1-2-3', investment=1000) for race in races]
+    rng = random.Random(SEED)
+    results = [build_result(rng) for _ in races]
+
+    def predictions(_):
+        for race, bet in zip(races, bets):
+            notifier._create_prediction_message(race, bet)
+
+    def result_messages(_):
+        for race, result in zip(races, results):
+            notifier._create_result_message(race, result)
+
+    return {
+        'flex_prediction_message': (measure(lambda: None, predictions, repeat), count),
+        'flex_result_message': (measure(lambda: None, result_messages, repeat), count),
+    }
+
+
+def bench_sheets(repeat: int, count: int) -> dict:
+    races = build_races(count)
+    rng = random.Random(SEED)
+    results = [(race, build_result(rng)) for race in races]
+
+    def record(state: RecordingState):
+        for race, bet in zip(state.races, state.bets):
+            state.manager.record_prediction(race, bet)
+        state.manager.flush()
+
+    def setup_settlement() -> RecordingState:
+        state = RecordingState(races)
+        record(state)
+        return state
+
+    def settle(state: RecordingState):
+        state.manager.update_results(results)
+
+    return {
+        'sheets_record_rows': (measure(lambda: RecordingState(races), record, repeat), count),
+        'settlement': (measure(setup_settlement, settle, repeat), count),
+    }
+
+
+def summarize(timings: list, ops: int) -> dict:
+    best = min(timings)
+    return {
+        'ops': ops,
+        'repeat': len(timings),
+        'min_sec': round(best, 6),
+        'median_sec': round(statistics.median(timings), 6),
+        'per_op_us': round(best / ops * 1e6, 3),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=ROOT, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """基準より threshold 倍以上遅くなった項目"""
+    regressions = []
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or not before['min_sec']:
+            continue
+        ratio = result['min_sec'] / before['min_sec']
+        result['vs_baseline'] = round(ratio, 3)
+        if ratio > threshold:
+            regressions.append(f"{name}: {before['min_sec']:.4f}s → {result['min_sec']:.4f}s ({ratio:.2f}倍)")
+    return regressions
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='主要な処理のベンチマーク')
+    parser.add_argument('--repeat', type=int, default=5, help='各項目の計測回数')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000],
+                        help='買い目選定のレース数')
+    parser.add_argument('--count', type=int, default=1000, help='メッセージ作成・記録・精算の件数')
+    parser.add_argument('--only', nargs='+', choices=['html', 'select', 'flex', 'sheets'],
+                        help='計測する項目')
+    parser.add_argument('--output', help='結果を保存するJSONファイル')
+    parser.add_argument('--compare', help='比較する基準の結果ファイル')
+    parser.add_argument('--threshold', type=float, default=1.2, help='遅くなったとみなす倍率')
+    args = parser.parse_args()
+
+    # 記録ごとのログは計測の邪魔になるため抑える
+    logging.basicConfig(level=logging.WARNING)
+
+    groups = args.only or ['html', 'select', 'flex', 'sheets']
+    raw = {}
+    if 'html' in groups:
+        raw.update(bench_html(args.repeat))
+    if 'select' in groups:
+        raw.update(bench_select(args.repeat, args.sizes))
+    if 'flex' in groups:
+        raw.update(bench_flex(args.repeat, args.count))
+    if 'sheets' in groups:
+        raw.update(bench_sheets(args.repeat, args.count))
+
+    report = {
+        'commit': git_commit(),
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': {name: summarize(timings, ops) for name, (timings, ops) in raw.items()},
+    }
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        report['regressions'] = regressions
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+合成データによる負荷試験（ネットワーク不要）
+SyntheticRaceSource で全場×12レース×倍率のレース日を作り、取得・選定・記録・精算・通知を
+通常の何倍もの件数で計測する。通知はローカルのLINE API代替サーバー、記録は一時ディレクトリと代替ワークシートに行う
+
+    python benchmarks/synthetic_load.py --scale 10
+    python benchmarks/synthetic_load.py --scale 100 --days 3 --output load.json
+"""
+
+import sys
+import os
+import argparse
+import json
+import logging
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import PIPELINE_NOTIFY_WORKERS
+from src.data.fake_worksheet import FakeWorksheet
+from src.data.race_store import RaceRecordStore
+from src.data.spreadsheet_manager import SpreadsheetManager, HEADERS
+from src.data.statistics import RunningStatistics
+from src.notification.fake_line_api import FakeLineApiServer
+from src.notification.line_notifier import LineNotifier
+from src.pipeline import Stage
+from src.prediction.bet_selector import BetSelector
+from src.scraping.race_scraper import RaceScraper
+from src.scraping.synthetic import SyntheticRaceSource
+
+
+class Timer:
+    """段ごとの件数と所要時間を集める"""
+
+    def __init__(self):
+        self.phases = {}
+
+    def measure(self, name: str, func):
+        """funcの所要時間を計測して加算（funcは処理した件数を返す）"""
+        started = time.perf_counter()
+        count = func()
+        elapsed = time.perf_counter() - started
+        phase = self.phases.setdefault(name, {'count': 0, 'seconds': 0.0})
+        phase['count'] += count
+        phase['seconds'] += elapsed
+
+    def summary(self) -> dict:
+        return {
+            name: {
+                'count': phase['count'],
+                'seconds': round(phase['seconds'], 3),
+                'per_sec': round(phase['count'] / phase['seconds'], 1) if phase['seconds'] else None,
+            }
+            for name, phase in self.phases.items()
+        }
+
+
+def run_day(timer: Timer, scraper: RaceScraper, selector: BetSelector, manager: SpreadsheetManager,
+            notifier: LineNotifier, race_date: str, workers: int):
+    """1日分の取得・選定・記録・精算・通知"""
+    source = scraper.source
+    races = []
+    timer.measure('generate', lambda: races.extend(source.iter_races(race_date)) or len(races))
+    timer.measure('odds_tables', lambda: sum(1 for race in races if scraper.get_trifecta_odds(race)))
+
+    high_odds = []
+    timer.measure('scrape_filter', lambda: high_odds.extend(scraper.iter_high_odds_races(race_date)) or len(high_odds))
+
+    bets = []
+    # 1日の上限を外して高配当レースをすべて選定する
+    selector.max_bets_per_day = len(high_odds)
+    timer.measure('select', lambda: bets.extend(selector.select_bets(high_odds)) or len(bets))
+
+    def record():
+        for bet in bets:
+            manager.record_prediction(bet.race_info, bet)
+        manager.flush()
+        return len(bets)
+
+    def settle():
+        results = [(bet.race_info, scraper.get_race_results(bet.race_info.race_url)) for bet in bets]
+        return manager.update_results(results)
+
+    def notify():
+        stage = Stage('予想通知', lambda bet: notifier.send_prediction(bet.race_info, bet), workers)
+        for bet in bets:
+            stage.submit(bet)
+        stage.join()
+        return stage.succeeded
+
+    timer.measure('record', record)
+    timer.measure('settle', settle)
+    timer.measure('notify', notify)
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='合成データによる負荷試験')
+    parser.add_argument('--scale', type=int, default=10, help='1日あたりの開催の倍率（1で全24場×12レース）')
+    parser.add_argument('--seed', type=int, default=0, help='乱数シード')
+    parser.add_argument('--days', type=int, default=1, help='日数')
+    parser.add_argument('--start', default='2024-12-23', help='開始日 (YYYY-MM-DD)')
+    parser.add_argument('--latency', type=float, default=0.0, help='LINE APIの応答遅延（秒）')
+    parser.add_argument('--workers', type=int, default=PIPELINE_NOTIFY_WORKERS, help='通知の並列度')
+    parser.add_argument('--output', help='結果を保存するJSONファイル')
+    args = parser.parse_args()
+
+    # レースごとのINFOログは計測の邪魔になるため抑える
+    logging.basicConfig(level=logging.WARNING)
+
+    scraper = RaceScraper(source=SyntheticRaceSource(seed=args.seed, scale=args.scale))
+    selector = BetSelector()
+    tmpdir = tempfile.mkdtemp(prefix='bench-')
+    manager = SpreadsheetManager(
+        store=RaceRecordStore(os.path.join(tmpdir, 'race_records.db')),
+        statistics=RunningStatistics(os.path.join(tmpdir, 'statistics.json')),
+        worksheet=FakeWorksheet(rows=[HEADERS]),
+    )
+    server = FakeLineApiServer(latency=args.latency, monthly_quota=10 ** 9, seed=args.seed)
+    notifier = LineNotifier(endpoint=server.start(), channel_access_token='benchmark')
+
+    timer = Timer()
+    started = time.perf_counter()
+    try:
+        first_day = datetime.strptime(args.start, '%Y-%m-%d')
+        for offset in range(args.days):
+            race_date = (first_day + timedelta(days=offset)).strftime('%Y-%m-%d')
+            run_day(timer, scraper, selector, manager, notifier, race_date, args.workers)
+    finally:
+        server.stop()
+        manager.write_buffer.close()
+        manager.store.close()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    report = {
+        'scale': args.scale,
+        'seed': args.seed,
+        'days': args.days,
+        'seconds': round(time.perf_counter() - started, 3),
+        'phases': timer.summary(),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Webhook受信サーバーの負荷テスト
+ローカルで署名付きのフォローイベントを大量送信し、スループットと遅延を計測
+"""
+
+import sys
+import os
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import ClientSession, TCPConnector, web
+from linebot import WebhookHandler
+
+from config.settings import WEBHOOK_PATH
+from src.data.subscriber_store import SubscriberStore
+from src.notification.webhook_server import WebhookServer
+
+TEST_CHANNEL_SECRET = 'load-test-channel-secret'
+
+
+def build_follow_body(index: int, events_per_request: int) -> str:
+    """フォローイベントのWebhookボディを作成"""
+    now_ms = int(time.time() * 1000)
+    events = [
+        {
+            'type': 'follow',
+            'mode': 'active',
+            'timestamp': now_ms,
+            'source': {'type': 'user', 'userId': f"U{index:08d}{i:04d}"},
+            'webhookEventId': f"load-{index}-{i}",
+            'deliveryContext': {'isRedelivery': False},
+            'replyToken': f"reply-{index}-{i}",
+        }
+        for i in range(events_per_request)
+    ]
+    return json.dumps({'destination': 'Uload', 'events': events})
+
+
+def sign(body: str) -> str:
+    """X-Line-Signatureを計算"""
+    digest = hmac.new(TEST_CHANNEL_SECRET.encode('utf-8'), body.encode('utf-8'), hashlib.sha256).digest()
+    return base64.b64encode(digest).decode('utf-8')
+
+
+async def run_load(requests_total: int, concurrency: int, events_per_request: int) -> dict:
+    """負荷テストを実行"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = SubscriberStore(os.path.join(tmp_dir, 'subscribers.db'))
+        server = WebhookServer(handler=WebhookHandler(TEST_CHANNEL_SECRET), store=store)
+
+        runner = web.AppRunner(server.create_app())
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        url = f"http://127.0.0.1:{port}{WEBHOOK_PATH}"
+
+        # リクエストは事前に作成して、計測に生成コストを含めない
+        payloads = []
+        for index in range(requests_total):
+            body = build_follow_body(index, events_per_request)
+            payloads.append((body, sign(body)))
+
+        latencies = []
+        statuses = {}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async with ClientSession(connector=TCPConnector(limit=concurrency)) as session:
+            async def send(body: str, signature: str):
+                async with semaphore:
+                    started = time.perf_counter()
+                    async with session.post(
+                        url, data=body.encode('utf-8'),
+                        headers={'X-Line-Signature': signature, 'Content-Type': 'application/json'}
+                    ) as response:
+                        await response.read()
+                    latencies.append(time.perf_counter() - started)
+                    statuses[response.status] = statuses.get(response.status, 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(send(body, signature) for body, signature in payloads))
+            ack_elapsed = time.perf_counter() - started
+
+            # キューが空になるまで待って反映完了までの時間を計測
+            await server.queue.join()
+            drain_elapsed = time.perf_counter() - started
+
+        await runner.cleanup()
+
+        latencies.sort()
+        followers = store.count_followers()
+        store.close()
+
+        return {
+            'requests': requests_total,
+            'events': requests_total * events_per_request,
+            'concurrency': concurrency,
+            'statuses': statuses,
+            'ack_seconds': round(ack_elapsed, 3),
+            'drain_seconds': round(drain_elapsed, 3),
+            'requests_per_second': round(requests_total / ack_elapsed, 1),
+            'latency_p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+            'latency_p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+            'followers_stored': followers,
+            'server_stats': server.stats,
+        }
+
+
+def main():
+    """メイン処理"""
+    parser = argparse.ArgumentParser(description='Webhook受信サーバーの負荷テスト')
+    parser.add_argument('--requests', type=int, default=5000, help='送信リクエスト数')
+    parser.add_argument('--concurrency', type=int, default=100, help='同時接続数')
+    parser.add_argument('--events', type=int, default=1, help='1リクエストあたりのイベント数')
+    args = parser.parse_args()
+
+    print("ちょいアツ艇報 - Webhook負荷テスト")
+    print("=" * 40)
+
+    result = asyncio.run(run_load(args.requests, args.concurrency, args.events))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    rejected = result['statuses'].get(503, 0)
+    expected = result['events'] - rejected * args.events
+    if result['followers_stored'] == expected:
+        print("✅ 受付済みのフォローイベントをすべて反映")
+    else:
+        print(f"❌ 反映件数が一致しません: {result['followers_stored']} / {expected}")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,14 +14,38 @@ BASE_DIR = Path(__file__).parent.parent
 # LINE Messaging API設定
 LINE_CHANNEL_ACCESS_TOKEN = os.getenv('LINE_CHANNEL_ACCESS_TOKEN')
 LINE_CHANNEL_SECRET = os.getenv('LINE_CHANNEL_SECRET')
+LINE_API_ENDPOINT = os.getenv('LINE_API_ENDPOINT', 'https://api.line.me')
+LINE_API_MAX_RETRIES = 3  # 429・5xx時の最大再送回数
+LINE_API_RETRY_BACKOFF = 1.0  # 再送間隔の初期値（秒、回数ごとに倍）
 
 # Googleスプレッドシート設定
 GOOGLE_CREDENTIALS_PATH = os.getenv('GOOGLE_CREDENTIALS_PATH', 'config/service_account.json')
 SPREADSHEET_ID = os.getenv('SPREADSHEET_ID')
 
+# スプレッドシート書き込み設定
+SHEETS_BUFFER_MAX_ROWS = 50  # この行数に達したらまとめて書き込む
+SHEETS_BUFFER_MAX_DELAY = 30.0  # 最初の行を受け付けてから書き込むまでの最大秒数
+SHEETS_READ_QUOTA_PER_MINUTE = 60  # Google Sheets APIの1分あたり読み取り上限
+SHEETS_WRITE_QUOTA_PER_MINUTE = 60  # Google Sheets APIの1分あたり書き込み上限
+SHEETS_MAX_RETRIES = 5  # 429・5xx時の最大再試行回数
+SHEETS_RETRY_BACKOFF = 1.0  # 再試行間隔の初期値（秒、回数ごとに倍・揺らぎ付き）
+SHEETS_RETRY_MAX_BACKOFF = 32.0  # 再試行間隔の上限（秒）
+SHEETS_SYNC_INTERVAL = 60.0  # ローカル記録をスプレッドシートへミラーする間隔（秒）
+
 # スクレイピング設定
 USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-REQUEST_DELAY = 1  # リクエスト間隔（秒）
+REQUEST_DELAY = 1  # リクエスト間隔（秒、並列取得時もプロセス全体でこの間隔を守る）
+SCRAPER_RANGE_WORKERS = 4  # 期間指定の取得で同時に処理する日数
+SCRAPER_CACHE_SIZE = 256  # 取得したページを保持する件数
+SCRAPER_CACHE_TTL = 5 * 60  # 取得したページを使い回す時間（秒）
+WORKER_PROCESSES = 4  # 会場ごとに分けて処理するワーカープロセス数（notify --processes）
+WORKER_LEASE_SECONDS = 60  # ジョブのリース期限（秒、ワーカーが落ちてから処理し直すまでの時間）
+WORKER_MAX_ATTEMPTS = 3  # 1つのジョブを試す回数の上限
+WORKER_POLL_INTERVAL = 0.5  # ジョブの空き・ワーカーの状態を確認する間隔（秒）
+SYNTHETIC_SEED = 0  # 合成データ（--synthetic）の乱数シード
+SYNTHETIC_SCALE = 1  # 合成データの1日あたりの開催の倍率（1で全24場×12レース）
+BOATRACE_BASE_URL = 'https://www.boatrace.jp'
+CALENDAR_REFRESH_INTERVAL = 24 * 60 * 60  # 月間開催スケジュールの再取得間隔（秒）
 SELENIUM_HEADLESS = True
 
 # ボートレース関連設定
@@ -33,15 +57,60 @@ NOTIFICATION_SCHEDULE = {
     'prediction': '20:00',  # 予想通知時刻
     'result': '21:30'       # 結果通知時刻
 }
+RESULT_CHECK_DELAY_MINUTES = 15  # 発走時刻から結果を取得するまでの待ち時間（分）
+PARQUET_EXPORT_TIME = '23:30'  # 分析用Parquetの書き出し時刻（デーモン実行時）
+PIPELINE_NOTIFY_WORKERS = 4  # 予想通知の同時送信数
+PIPELINE_RECORD_WORKERS = 2  # 予想記録の同時実行数
+RUNS_KEEP = 30  # 残しておく完了済みの実行（チェックポイント）の数
+
+# 配信設定
+MULTICAST_MAX_RECIPIENTS = 500  # マルチキャスト1回あたりの最大宛先数（LINE API上限）
+MULTICAST_MAX_WORKERS = 4  # マルチキャストの同時送信数
+NOTE_SUBSCRIBER_CODE = os.getenv('NOTE_SUBSCRIBER_CODE')  # note購読者向けLINE連携コード
+
+# Webhook受信設定
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8000'))
+WEBHOOK_PATH = '/callback'
+WEBHOOK_QUEUE_SIZE = 10000  # 未処理イベントの上限（超過時は503で再送を促す）
+WEBHOOK_BATCH_SIZE = 200  # 1回のDB反映でまとめるリクエスト数
+WEBHOOK_APPLY_ATTEMPTS = 3  # DB反映を試す回数（失敗したイベントは退避ファイルに残して次のバッチで反映し直す）
+WEBHOOK_EVENT_ID_RETENTION_DAYS = 7  # 再送を見分けるため反映済みのWebhookイベントIDを残す日数
 
 # ログ設定
-LOG_LEVEL = 'INFO'
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_LEVELS = os.getenv('LOG_LEVELS', 'urllib3=WARNING')  # モジュールごとのレベル（例: src.scraping=DEBUG,urllib3=WARNING）
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-LOG_FILE = BASE_DIR / 'logs' / 'choiatsu_teiho.log'
+LOG_FILE = BASE_DIR / 'logs' / 'choiatsu_teiho.log'  # JSON Linesで書き込む
+LOG_MAX_BYTES = 10 * 1024 * 1024  # ログファイルを切り替えるサイズ
+LOG_BACKUP_COUNT = 5  # 残しておく古いログファイルの数
+
+# 計測設定
+METRICS_EXPORTERS = ('prometheus', 'jsonl')  # 実行ごとの計測値の書き出し形式
+METRICS_MAX_SPANS = 10000  # 1回の実行で保持するスパンの上限
+PROFILE_TOP_N = 30  # --profile のレポートに載せる関数・メモリ確保箇所の数
+PROFILE_TRACEMALLOC_FRAMES = 10  # --profile で記録するメモリ確保箇所のスタックの深さ
 
 # データディレクトリ
 DATA_DIR = BASE_DIR / 'data'
 ASSETS_DIR = BASE_DIR / 'assets'
+SUBSCRIBER_DB_PATH = DATA_DIR / 'subscribers.db'
+DEDUP_DB_PATH = DATA_DIR / 'deliveries.db'
+SHEETS_SPILL_PATH = DATA_DIR / 'sheets_spill.jsonl'
+WEBHOOK_SPILL_PATH = DATA_DIR / 'webhook_spill.jsonl'
+STATISTICS_PATH = DATA_DIR / 'statistics.json'
+RACE_DB_PATH = DATA_DIR / 'race_records.db'
+PARQUET_DIR = DATA_DIR / 'parquet' / 'race_records'
+PARQUET_ODDS_DIR = DATA_DIR / 'parquet' / 'odds_history'
+ODDS_DIR = DATA_DIR / 'odds'
+CALENDAR_DB_PATH = DATA_DIR / 'calendar.db'
+GOOGLE_TOKEN_CACHE_PATH = DATA_DIR / 'google_token.json'
+SHEETS_METADATA_CACHE_PATH = DATA_DIR / 'sheets_metadata.json'
+METRICS_DIR = DATA_DIR / 'metrics'
+RUNS_DIR = DATA_DIR / 'runs'
+WORKER_QUEUE_DB_PATH = DATA_DIR / 'job_queue.db'
+SHEETS_METADATA_TTL = 24 * 60 * 60  # スプレッドシート・ワークシート情報のキャッシュ有効期間（秒）
+STATISTICS_WINDOWS = (7, 30)  # 直近成績の集計期間（日）
 
 # 環境変数チェック
 def validate_config():
@@ -90,7 +90,7 @@ def test_write():
             'amount': 100
         }
         
-        success = manager.record_prediction(test_race, test_bet)
+        success = manager.record_prediction(test_race, test_bet) and manager.flush()
         print(f"書き込み結果: {'成功' if success else '失敗'}")
         
         # 書き込み後のデータ確認
@@ -0,0 +1,234 @@
+"""
+実行のチェックポイント
+段ごと（取得したレース・選定した買い目・通知・記録）の結果を実行IDごとのディレクトリに保存し、
+途中で止まった実行を終わった段・終わった項目を飛ばして再開できるようにする
+
+    data/runs/<実行ID>/
+        state.json      実行の引数と終わった段
+        scrape.jsonl    取得したレース
+        select.jsonl    選定した買い目
+        notify.jsonl    通知した買い目のキー
+        record.jsonl    記録した買い目のキー
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from config.settings import RUNS_DIR, RUNS_KEEP
+
+logger = logging.getLogger(__name__)
+
+STAGE_SCRAPE = 'scrape'
+STAGE_SELECT = 'select'
+STAGE_NOTIFY = 'notify'
+STAGE_RECORD = 'record'
+STAGES = (STAGE_SCRAPE, STAGE_SELECT, STAGE_NOTIFY, STAGE_RECORD)
+
+STATE_FILE = 'state.json'
+
+
+def new_run_id() -> str:
+    """開始時刻からの実行ID"""
+    return datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+
+
+class RunCheckpoint:
+    """1回の実行のチェックポイント"""
+
+    def __init__(self, path: Path, state: Dict):
+        self.path = path
+        self.state = state
+        self._lock = threading.Lock()
+        self._keys: Dict[str, set] = {}
+
+    @property
+    def run_id(self) -> str:
+        return self.state['run_id']
+
+    @property
+    def params(self) -> Dict:
+        """実行の引数（再開時も同じ値を使う）"""
+        return self.state['params']
+
+    @property
+    def completed(self) -> bool:
+        return bool(self.state.get('completed_at'))
+
+    @classmethod
+    def create(cls, job: str, params: Optional[Dict] = None,
+               root: Optional[str] = None) -> 'RunCheckpoint':
+        """
+        新しい実行のチェックポイントを作成
+
+        Args:
+            job: ジョブ名（例: prediction）
+            params: 実行の引数
+            root: 実行ディレクトリの親
+
+        Returns:
+            チェックポイント
+        """
+        root = Path(root or RUNS_DIR)
+        run_id = new_run_id()
+        path = root / run_id
+        path.mkdir(parents=True, exist_ok=True)
+
+        checkpoint = cls(path, {
+            'run_id': run_id,
+            'job': job,
+            'params': params or {},
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'stages': {},
+            'completed_at': None,
+        })
+        checkpoint._save_state()
+        _prune(root)
+        logger.info("実行ID: %s", run_id)
+        return checkpoint
+
+    @classmethod
+    def open(cls, run_id: Optional[str] = None, job: Optional[str] = None,
+             root: Optional[str] = None) -> Optional['RunCheckpoint']:
+        """
+        既存の実行のチェックポイントを開く
+
+        Args:
+            run_id: 実行ID（省略時は終わっていない最新の実行）
+            job: 実行IDを省略したときに対象とするジョブ名
+            root: 実行ディレクトリの親
+
+        Returns:
+            チェックポイント（見つからなければNone）
+        """
+        root = Path(root or RUNS_DIR)
+        if run_id:
+            candidates = [root / run_id]
+        else:
+            candidates = sorted(root.glob('*/' + STATE_FILE), reverse=True) if root.exists() else []
+            candidates = [state_path.parent for state_path in candidates]
+
+        for path in candidates:
+            state = _read_state(path)
+            if state is None:
+                continue
+            if not run_id and (state.get('completed_at') or (job and state.get('job') != job)):
+                continue
+            logger.info("実行を再開: %s（完了した段: %s）", state['run_id'], ', '.join(state['stages']) or 'なし')
+            return cls(path, state)
+        return None
+
+    def is_stage_done(self, stage: str) -> bool:
+        """段が最後まで終わっているか"""
+        return stage in self.state['stages']
+
+    def set_param(self, name: str, value: Any):
+        """実行の引数を保存（再開時も同じ値を使うよう、すぐに書き込む）"""
+        with self._lock:
+            self.state['params'][name] = value
+            self._save_state()
+
+    def mark_stage_done(self, stage: str):
+        """段の完了を記録"""
+        with self._lock:
+            self.state['stages'][stage] = datetime.now().isoformat(timespec='seconds')
+            self._save_state()
+
+    def complete(self):
+        """実行の完了を記録"""
+        with self._lock:
+            self.state['completed_at'] = datetime.now().isoformat(timespec='seconds')
+            self._save_state()
+
+    def reset_stage(self, stage: str):
+        """段の途中までの結果を消してやり直す"""
+        with self._lock:
+            self.state['stages'].pop(stage, None)
+            self._save_state()
+            stage_path = self._stage_path(stage)
+            if stage_path.exists():
+                stage_path.unlink()
+            self._keys.pop(stage, None)
+
+    def append(self, stage: str, item: Dict):
+        """段の結果を1件追記（途中で止まっても書いた分は残る）"""
+        line = json.dumps(item, ensure_ascii=False) + '\n'
+        with self._lock:
+            with open(self._stage_path(stage), 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            if stage in self._keys and 'key' in item:
+                self._keys[stage].add(tuple(item['key']))
+
+    def load(self, stage: str) -> List[Dict]:
+        """段の結果を読み込む（書きかけの最終行は無視）"""
+        stage_path = self._stage_path(stage)
+        if not stage_path.exists():
+            return []
+        items = []
+        with open(stage_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    items.append(json.loads(line))
+                except ValueError:
+                    logger.warning("チェックポイントの壊れた行を無視: %s", stage_path)
+        return items
+
+    def done_keys(self, stage: str) -> set:
+        """段で処理済みの項目のキー"""
+        with self._lock:
+            if stage not in self._keys:
+                self._keys[stage] = {
+                    tuple(item['key']) for item in self.load(stage) if 'key' in item
+                }
+            return self._keys[stage]
+
+    def has_key(self, stage: str, key: Iterable[Any]) -> bool:
+        """項目が段で処理済みか"""
+        return tuple(key) in self.done_keys(stage)
+
+    def record_stream(self, stage: str, items: Iterator, to_dict=None) -> Iterator:
+        """
+        流れてくる項目を記録しながらそのまま返し、最後まで流れたら段を完了にする
+
+        Args:
+            stage: 段
+            items: 項目のイテレーター
+            to_dict: 項目を辞書に変換する関数（省略時は item.to_dict()）
+        """
+        for item in items:
+            self.append(stage, to_dict(item) if to_dict else item.to_dict())
+            yield item
+        self.mark_stage_done(stage)
+
+    def _stage_path(self, stage: str) -> Path:
+        return self.path / f"{stage}.jsonl"
+
+    def _save_state(self):
+        tmp_path = self.path / (STATE_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path / STATE_FILE)
+
+
+def _read_state(path: Path) -> Optional[Dict]:
+    try:
+        with open(path / STATE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _prune(root: Path, keep: int = RUNS_KEEP):
+    """完了した古い実行のディレクトリを削除（終わっていない実行は残す）"""
+    runs = sorted((path for path in root.iterdir() if path.is_dir()), reverse=True)
+    for path in runs[keep:]:
+        state = _read_state(path)
+        if state and state.get('completed_at'):
+            shutil.rmtree(path, ignore_errors=True)
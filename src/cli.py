@@ -0,0 +1,331 @@
+"""
+コマンドライン
+サブコマンドごとに必要なモジュールだけを読み込み、起動を速くする
+
+    python main.py                  # notify と同じ（cron向け）
+    python main.py notify --resume  # 途中で止まった最新の実行を再開
+    python main.py scrape --date 2024-12-23
+    python main.py stats
+    python main.py --synthetic --scale 10 select  # 合成データ（全場×12レース×10）で選定
+    python main.py --synthetic --sandbox /tmp/load notify  # 記録・LINEは代替先へ
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import sys
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import LOG_LEVEL, SYNTHETIC_SCALE, SYNTHETIC_SEED
+from src.utils.log import parse_levels, setup_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMMAND = 'notify'
+
+
+def _print_json(data):
+    print(json.dumps(data, ensure_ascii=False))
+
+
+def _profiler(args, run_dir):
+    """--profile 指定時は実行ディレクトリに書き出す段ごとのプロファイラー（未指定なら何もしない）"""
+    if not args.profile:
+        return nullcontext()
+    from src.utils.profiling import StageProfiler
+    return StageProfiler(run_dir / 'profile')
+
+
+def _source(args):
+    """--synthetic 指定時は合成データの取得元（未指定ならNone＝公式サイト）"""
+    if not args.synthetic:
+        return None
+    from src.scraping.synthetic import SyntheticRaceSource
+    return SyntheticRaceSource(seed=args.seed, scale=args.scale)
+
+
+def _refuse_synthetic(args) -> bool:
+    """合成データで記録・通知するコマンドは --sandbox がなければ実行しない"""
+    if args.synthetic and not args.sandbox:
+        logger.error("--synthetic で %s を実行するには --sandbox DIR を指定してください"
+                     "（本番の記録・LINEに合成データを書き込まないため）", args.command)
+        return True
+    return False
+
+
+def _runs_dir(args) -> Path:
+    """実行ディレクトリの親（--sandbox 指定時はその中）"""
+    from config.settings import RUNS_DIR
+    return Path(args.sandbox) / 'runs' if args.sandbox else RUNS_DIR
+
+
+@contextmanager
+def _job_context(args) -> Iterator:
+    """
+    ジョブのクライアント（終了時に未反映の記録を書き込む）
+
+    --sandbox 指定時は記録・重複防止をそのディレクトリのストアと代替ワークシートに、
+    LINE通知をローカルの代替サーバーに向け、本番のデータには触れない
+    """
+    from src.jobs import JobContext
+
+    if not args.sandbox:
+        context = JobContext(source=_source(args))
+        try:
+            yield context
+        finally:
+            context.close()
+        return
+
+    from src.data.dedup_store import DedupStore
+    from src.data.fake_worksheet import FakeWorksheet
+    from src.data.race_store import RaceRecordStore
+    from src.data.spreadsheet_manager import SpreadsheetManager, HEADERS
+    from src.data.statistics import RunningStatistics
+    from src.data.subscriber_store import SubscriberStore
+    from src.notification.fake_line_api import FakeLineApiServer
+    from src.notification.line_notifier import LineNotifier
+
+    sandbox = Path(args.sandbox)
+    sandbox.mkdir(parents=True, exist_ok=True)
+    server = FakeLineApiServer(monthly_quota=10 ** 9)
+    endpoint = server.start()
+    logger.info("代替先で実行します: %s（LINE: %s）", sandbox, endpoint)
+    context = JobContext(
+        source=_source(args),
+        spreadsheet=SpreadsheetManager(
+            store=RaceRecordStore(str(sandbox / 'race_records.db')),
+            statistics=RunningStatistics(str(sandbox / 'statistics.json')),
+            worksheet=FakeWorksheet(rows=[HEADERS]),
+        ),
+        notifier=LineNotifier(
+            subscriber_store=SubscriberStore(str(sandbox / 'subscribers.db')),
+            endpoint=endpoint, channel_access_token='sandbox',
+        ),
+        dedup=DedupStore(str(sandbox / 'dedup.db')),
+    )
+    try:
+        yield context
+    finally:
+        context.close()
+        server.stop()
+
+
+def cmd_scrape(args) -> int:
+    """高配当レースを取得して1行1レースのJSONで出力"""
+    from src.scraping.race_scraper import RaceScraper
+
+    scraper = RaceScraper(source=_source(args))
+    if args.end:
+        # 期間指定は日ごとに並列で取得し、取得できた日から出力する
+        days = scraper.iter_high_odds_races_range(
+            args.date, args.end, args.time_band, args.grade, max_workers=args.workers
+        )
+        failed_days = []
+        for day, races in days:
+            if races is None:
+                failed_days.append(day)
+                continue
+            for race in races:
+                _print_json(race.to_dict())
+        if failed_days:
+            logger.error("レースを取得できなかった日: %s", ', '.join(sorted(failed_days)))
+            return 1
+        return 0
+    
+    for race in scraper.iter_high_odds_races(args.date, args.time_band, args.grade):
+        _print_json(race.to_dict())
+    return 0
+
+
+def cmd_select(args) -> int:
+    """買い目を選定して出力（通知・記録はしない）"""
+    from src.scraping.race_scraper import RaceScraper
+    from src.prediction.bet_selector import BetSelector
+
+    races = RaceScraper(source=_source(args)).iter_high_odds_races(args.date, args.time_band, args.grade)
+    for bet in BetSelector().iter_bets(races):
+        _print_json(bet.to_dict())
+    return 0
+
+
+def cmd_notify(args) -> int:
+    """買い目を選定してLINE通知・記録"""
+    from src.checkpoint import RunCheckpoint
+    from src.jobs import run_prediction_job
+
+    if _refuse_synthetic(args):
+        return 2
+    if args.resume:
+        checkpoint = RunCheckpoint.open(None if args.resume == 'latest' else args.resume, job='prediction',
+                                        root=_runs_dir(args))
+        if checkpoint is None:
+            logger.warning("再開できる実行が見つかりません: %s", args.resume)
+            return 1
+    else:
+        # 省略時の「明日」はここで決めて保存し、日付が変わってから再開しても同じ日を対象にする
+        target_date = args.date or (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        checkpoint = RunCheckpoint.create('prediction', {'target_date': target_date}, root=_runs_dir(args))
+
+    logger.info("ちょいアツ艇報システム開始")
+    with _job_context(args) as context:
+        context.spreadsheet.start_background_sync()
+        with _profiler(args, checkpoint.path) as profiler:
+            run_prediction_job(context, args.date, checkpoint=checkpoint, profiler=profiler,
+                               processes=args.processes)
+    logger.info("処理完了")
+    return 0
+
+
+def cmd_results(args) -> int:
+    """結果未記録のレースの結果を取得して記録・通知"""
+    from src.jobs import run_result_job
+
+    if _refuse_synthetic(args):
+        return 2
+    with _job_context(args) as context:
+        run_result_job(context, notify=not args.no_notify)
+    return 0
+
+
+def cmd_stats(args) -> int:
+    """成績の集計を出力"""
+    from src.data.spreadsheet_manager import SpreadsheetManager
+
+    spreadsheet = SpreadsheetManager()
+    try:
+        stats = spreadsheet.get_statistics()
+    finally:
+        spreadsheet.close()
+
+    if not stats:
+        logger.warning("集計できる記録がありません")
+        return 1
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    return 0
+
+
+def cmd_backfill(args) -> int:
+    """期間内の買い目と結果を記録（LINE通知はしない）"""
+    from src.checkpoint import new_run_id
+    from src.jobs import run_backfill_job
+
+    if _refuse_synthetic(args):
+        return 2
+    with _job_context(args) as context:
+        with _profiler(args, _runs_dir(args) / new_run_id()) as profiler:
+            run_backfill_job(context, args.start, args.end or args.start, args.workers, profiler=profiler)
+    return 0
+
+
+def cmd_daemon(args) -> int:
+    """常駐して定時にジョブを実行"""
+    from src.scheduling.daemon import Daemon
+
+    Daemon().run()
+    return 0
+
+
+# サブコマンド名 → (実行前に読み込むモジュール, 実行関数)（docstringをヘルプに使う）
+COMMANDS: Dict[str, Tuple[Tuple[str, ...], Callable]] = {
+    'scrape': (('src.scraping.race_scraper',), cmd_scrape),
+    'select': (('src.scraping.race_scraper', 'src.prediction.bet_selector'), cmd_select),
+    'notify': (('src.jobs',), cmd_notify),
+    'results': (('src.jobs',), cmd_results),
+    'stats': (('src.data.spreadsheet_manager',), cmd_stats),
+    'backfill': (('src.jobs',), cmd_backfill),
+    'daemon': (('src.scheduling.daemon',), cmd_daemon),
+}
+
+
+def load_command(name: str) -> Callable:
+    """
+    サブコマンドのモジュールを読み込んで実行関数を返す
+
+    Args:
+        name: サブコマンド名
+
+    Returns:
+        実行関数
+    """
+    modules, func = COMMANDS[name]
+    for module in modules:
+        importlib.import_module(module)
+    return func
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """引数パーサーを作成（ここではサブコマンドのモジュールを読み込まない）"""
+    parser = argparse.ArgumentParser(prog='main.py', description='ちょいアツ艇報')
+    parser.add_argument('--log-level', default=LOG_LEVEL, help='ログレベル')
+    parser.add_argument('--profile', action='store_true',
+                        help='段ごとのCPUプロファイルとメモリ確保を実行ディレクトリに書き出す（notify・backfill）')
+    parser.add_argument('--synthetic', action='store_true',
+                        help='公式サイトの代わりにシードから作成した合成データを使う（負荷試験向け）')
+    parser.add_argument('--seed', type=int, default=SYNTHETIC_SEED, help='合成データの乱数シード')
+    parser.add_argument('--scale', type=int, default=SYNTHETIC_SCALE,
+                        help='合成データの1日あたりの開催の倍率（10なら全場×12レースの10倍）')
+    parser.add_argument('--sandbox', metavar='DIR',
+                        help='記録・重複防止をDIRのストアと代替ワークシートに、LINE通知をローカルの代替サーバーに向ける'
+                             '（--synthetic で notify・results・backfill を実行するときは必須）')
+    parser.add_argument('--log-module', action='append', metavar='NAME=LEVEL',
+                        help='モジュールごとのログレベル（例: src.scraping=DEBUG、複数指定可）')
+    subparsers = parser.add_subparsers(dest='command')
+
+    for name in ('scrape', 'select', 'notify'):
+        sub = subparsers.add_parser(name, help=COMMANDS[name][1].__doc__)
+        sub.add_argument('--date', help='対象日付 (YYYY-MM-DD、省略時は明日)')
+        if name != 'notify':
+            sub.add_argument('--time-band', action='append',
+                             help='開催時間帯で絞り込む（morning/day/nighter/midnight、複数指定可）')
+            sub.add_argument('--grade', action='append', help='グレードで絞り込む（複数指定可）')
+        if name == 'scrape':
+            sub.add_argument('--end', help='終了日 (YYYY-MM-DD、指定すると --date からの期間を取得)')
+            sub.add_argument('--workers', type=int, default=None, help='同時に取得する日数')
+        if name == 'notify':
+            sub.add_argument('--processes', type=int, default=None,
+                             help='会場ごとに分けて取得・選定するワーカープロセス数（省略時は1プロセス）')
+            sub.add_argument('--resume', nargs='?', const='latest', metavar='RUN_ID',
+                             help='途中で止まった実行を再開（実行ID省略時は最新の未完了の実行）')
+
+    sub = subparsers.add_parser('results', help=COMMANDS['results'][1].__doc__)
+    sub.add_argument('--no-notify', action='store_true', help='LINEで通知しない')
+
+    subparsers.add_parser('stats', help=COMMANDS['stats'][1].__doc__)
+
+    sub = subparsers.add_parser('backfill', help=COMMANDS['backfill'][1].__doc__)
+    sub.add_argument('--start', required=True, help='開始日 (YYYY-MM-DD)')
+    sub.add_argument('--end', help='終了日 (YYYY-MM-DD、省略時は開始日のみ)')
+    sub.add_argument('--workers', type=int, default=None, help='同時に取得する日数')
+
+    subparsers.add_parser('daemon', help=COMMANDS['daemon'][1].__doc__)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    コマンドラインのエントリーポイント
+
+    Args:
+        argv: 引数（省略時はsys.argv）
+
+    Returns:
+        終了コード
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        # 引数なしは従来どおり予想通知を実行
+        args = parser.parse_args([*(argv if argv is not None else sys.argv[1:]), DEFAULT_COMMAND])
+
+    setup_logging(args.log_level, levels=parse_levels(','.join(args.log_module or [])))
+
+    try:
+        return load_command(args.command)(args)
+    except Exception as e:
+        logger.error("エラーが発生しました: %s", e)
+        raise
@@ -0,0 +1,119 @@
+"""
+通知・記録の重複防止ストア
+同じ買い目を二重に通知・記録しないよう、処理済みの買い目をSQLiteに保持
+"""
+
+import sqlite3
+import threading
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from config.settings import DEDUP_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# (開催日, 会場, レース番号, 券種, 買い目)
+DedupKey = Tuple[str, str, int, str, str]
+
+STAGE_NOTIFIED = 'notified_at'
+STAGE_RECORDED = 'recorded_at'
+
+
+class DedupStore:
+    """処理済みの買い目を保持する冪等性インデックス"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or DEDUP_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._init_schema()
+
+    def _init_schema(self):
+        """テーブルを作成"""
+        with self._conn:
+            self._conn.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS deliveries (
+                    race_date TEXT NOT NULL,
+                    venue TEXT NOT NULL,
+                    race_number INTEGER NOT NULL,
+                    bet_type TEXT NOT NULL,
+                    combination TEXT NOT NULL,
+                    notified_at TEXT,
+                    recorded_at TEXT,
+                    PRIMARY KEY (race_date, venue, race_number, bet_type, combination)
+                ) WITHOUT ROWID
+                '''
+            )
+
+    @staticmethod
+    def make_key(race_data: Dict, bet_data: Optional[Dict] = None) -> DedupKey:
+        """
+        レース情報と買い目から重複判定キーを作成
+
+        Args:
+            race_data: レース情報
+            bet_data: 買い目情報
+
+        Returns:
+            重複判定キー
+        """
+        bet_data = bet_data or {}
+        return (
+            str(race_data.get('race_date', '')),
+            str(race_data.get('venue', '')),
+            int(race_data.get('race_number') or 0),
+            str(bet_data.get('bet_type', '')),
+            str(bet_data.get('combination', '')),
+        )
+
+    def is_notified(self, key: DedupKey) -> bool:
+        """通知済みか判定"""
+        return self._get_stage(key, STAGE_NOTIFIED) is not None
+
+    def is_recorded(self, key: DedupKey) -> bool:
+        """記録済みか判定"""
+        return self._get_stage(key, STAGE_RECORDED) is not None
+
+    def mark_notified(self, key: DedupKey):
+        """通知済みとして記録"""
+        self._mark_stage(key, STAGE_NOTIFIED)
+
+    def mark_recorded(self, key: DedupKey):
+        """記録済みとして記録"""
+        self._mark_stage(key, STAGE_RECORDED)
+
+    def _get_stage(self, key: DedupKey, stage: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {stage} FROM deliveries "
+                "WHERE race_date = ? AND venue = ? AND race_number = ? "
+                "AND bet_type = ? AND combination = ?",
+                key
+            ).fetchone()
+        return row[0] if row else None
+
+    def _mark_stage(self, key: DedupKey, stage: str):
+        now = datetime.now().isoformat()
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    f"INSERT INTO deliveries "
+                    f"(race_date, venue, race_number, bet_type, combination, {stage}) "
+                    f"VALUES (?, ?, ?, ?, ?, ?) "
+                    f"ON CONFLICT(race_date, venue, race_number, bet_type, combination) "
+                    f"DO UPDATE SET {stage} = excluded.{stage}",
+                    (*key, now)
+                )
+        except sqlite3.Error as e:
+            logger.error("処理済み記録エラー: %s", e)
+
+    def close(self):
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
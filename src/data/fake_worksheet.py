@@ -0,0 +1,113 @@
+"""
+Googleスプレッドシートのワークシートの代替
+ベンチマーク・負荷試験用に、記録で使う読み書きをメモリ上で再現
+"""
+
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+# A1形式の範囲（例: A2:N、I5:K5、A1）
+RANGE_PATTERN = re.compile(r'^([A-Z]+)(\d+)(?::([A-Z]+)(\d*))?$')
+
+
+def _column_index(letters: str) -> int:
+    """列名（A, B, ..., AA）を0始まりの番号に変換"""
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord('A') + 1
+    return index - 1
+
+
+class FakeWorksheet:
+    """gspread.Worksheetの代替（get・append_rows・batch_update・insert_rowのみ）"""
+
+    def __init__(self, title: str = 'レース記録', rows: Optional[List[List[Any]]] = None):
+        """
+        初期化
+
+        Args:
+            title: ワークシート名
+            rows: 初期の行（ヘッダー行を含む）
+        """
+        self.title = title
+        self.rows: List[List[Any]] = [list(row) for row in rows or []]
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, operation: str):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def _parse_range(self, range_name: str):
+        match = RANGE_PATTERN.match(range_name.split('!')[-1])
+        if not match:
+            raise ValueError(f"未対応の範囲です: {range_name}")
+        first_col, first_row, last_col, last_row = match.groups()
+        last_col = last_col or first_col
+        if last_row is None:
+            last_row = first_row
+        return (
+            int(first_row), int(last_row) if last_row else None,
+            _column_index(first_col), _column_index(last_col)
+        )
+
+    def get(self, range_name: str, **kwargs) -> List[List[Any]]:
+        """範囲の値を取得（末尾の空セルは返さない）"""
+        with self._lock:
+            self._count('get')
+            first_row, last_row, first_col, last_col = self._parse_range(range_name)
+            values = []
+            for row in self.rows[first_row - 1:last_row]:
+                cells = list(row[first_col:last_col + 1])
+                while cells and cells[-1] in ('', None):
+                    cells.pop()
+                values.append(cells)
+            return values
+
+    def get_all_records(self, **kwargs) -> List[Dict]:
+        """ヘッダー行をキーにした全行を取得"""
+        with self._lock:
+            self._count('get_all_records')
+            if not self.rows:
+                return []
+            headers = self.rows[0]
+            return [dict(zip(headers, row)) for row in self.rows[1:]]
+
+    def append_rows(self, rows: List[List[Any]], **kwargs) -> Dict:
+        """末尾に行を追加"""
+        with self._lock:
+            self._count('append_rows')
+            start = len(self.rows) + 1
+            self.rows.extend(list(row) for row in rows)
+            return {'updates': {
+                'updatedRange': f"'{self.title}'!A{start}:N{len(self.rows)}",
+                'updatedRows': len(rows),
+            }}
+
+    def batch_update(self, updates: List[Dict], **kwargs) -> Dict:
+        """複数範囲の値を更新"""
+        with self._lock:
+            self._count('batch_update')
+            for update in updates:
+                first_row, _, first_col, _ = self._parse_range(update['range'])
+                for offset, values in enumerate(update['values']):
+                    index = first_row - 1 + offset
+                    while len(self.rows) <= index:
+                        self.rows.append([])
+                    row = self.rows[index]
+                    if len(row) < first_col + len(values):
+                        row.extend([''] * (first_col + len(values) - len(row)))
+                    row[first_col:first_col + len(values)] = values
+            return {'totalUpdatedRanges': len(updates)}
+
+    def insert_row(self, values: List[Any], index: int = 1, **kwargs) -> Dict:
+        """指定位置に行を挿入"""
+        with self._lock:
+            self._count('insert_row')
+            self.rows.insert(index - 1, list(values))
+            return {}
+
+    def metrics(self) -> Dict:
+        """呼び出し回数（QuotaAwareWorksheet.metricsの代わり）"""
+        with self._lock:
+            return {'operations': {name: {'calls': count} for name, count in self.calls.items()}}
@@ -0,0 +1,154 @@
+"""
+レース・出走者・買い目・結果のデータクラス
+__slots__で属性を固定し、大量のレースを読み込んでもメモリを抑える
+既存の辞書ベースのコード向けに読み取り専用の辞書インターフェースも持つ
+"""
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class SlotRecord(Mapping):
+    """__slots__を持つレコードの基底クラス（record['name'] や record.get('name') でも参照できる）"""
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    @classmethod
+    def from_dict(cls, data: Optional[Mapping]):
+        """
+        辞書からレコードを作成（定義にないキーは無視）
+
+        Args:
+            data: 辞書（同じクラスのレコードならそのまま返す）
+
+        Returns:
+            レコード（dataがNoneならNone）
+        """
+        if data is None or isinstance(data, cls):
+            return data
+        return cls(**{key: data[key] for key in cls.__slots__ if key in data})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書へ変換"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Participant(SlotRecord):
+    """出走者"""
+
+    __slots__ = ('position', 'name', 'rating')
+
+    def __init__(self, position: int, name: str = '', rating: str = ''):
+        self.position = position
+        self.name = name
+        self.rating = rating
+
+
+class Race(SlotRecord):
+    """レース情報"""
+
+    __slots__ = (
+        'race_name', 'race_date', 'race_time', 'venue', 'race_number',
+        'expected_odds', 'race_url', 'grade', 'participants'
+    )
+
+    def __init__(self, race_name: str = '', race_date: str = '', race_time: str = '',
+                 venue: str = '', race_number: int = 0, expected_odds: float = 0.0,
+                 race_url: str = '', grade: str = '',
+                 participants: Optional[List[Participant]] = None):
+        self.race_name = race_name
+        self.race_date = race_date
+        self.race_time = race_time
+        self.venue = venue
+        self.race_number = race_number
+        self.expected_odds = expected_odds
+        self.race_url = race_url
+        self.grade = grade
+        self.participants = [Participant.from_dict(p) for p in participants or []]
+
+    @property
+    def race_id(self) -> str:
+        """ログ・追跡用のレースID（日付_会場_レース番号）"""
+        return f"{self.race_date}_{self.venue}_{self.race_number}R"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data['participants'] = [p.to_dict() for p in self.participants]
+        return data
+
+
+class Bet(SlotRecord):
+    """買い目"""
+
+    __slots__ = (
+        'race_info', 'combination', 'bet_type', 'investment',
+        'expected_return', 'confidence', 'created_at', 'audience'
+    )
+
+    def __init__(self, race_info: Optional[Race] = None, combination: str = '', bet_type: str = '3連単',
+                 investment: int = 0, expected_return: float = 0.0, confidence: float = 0.0,
+                 created_at: str = '', audience: Optional[str] = None):
+        self.race_info = Race.from_dict(race_info)
+        self.combination = combination
+        self.bet_type = bet_type
+        self.investment = investment
+        self.expected_return = expected_return
+        self.confidence = confidence
+        self.created_at = created_at
+        self.audience = audience
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data['race_info'] = self.race_info.to_dict() if self.race_info else None
+        return data
+
+
+class Meeting(SlotRecord):
+    """開催（会場ごとの節）"""
+
+    __slots__ = ('venue', 'venue_code', 'start_date', 'end_date', 'grade', 'time_band', 'title')
+
+    def __init__(self, venue: str, venue_code: int, start_date: str, end_date: str,
+                 grade: str = '', time_band: str = '', title: str = ''):
+        self.venue = venue
+        self.venue_code = venue_code
+        self.start_date = start_date
+        self.end_date = end_date
+        self.grade = grade
+        self.time_band = time_band
+        self.title = title
+
+    def is_running(self, race_date: str) -> bool:
+        """指定日に開催しているか"""
+        return self.start_date <= race_date <= self.end_date
+
+
+class Result(SlotRecord):
+    """レース結果"""
+
+    __slots__ = ('result_order', 'payout', 'race_status')
+
+    def __init__(self, result_order: Optional[List[str]] = None,
+                 payout: Optional[Dict[str, Dict]] = None, race_status: str = ''):
+        self.result_order = list(result_order or [])
+        self.payout = dict(payout or {})
+        self.race_status = race_status
+
+    def payout_amount(self, bet_type: str = '3連単') -> int:
+        """券種の配当金（払い戻しがなければ0）"""
+        return self.payout.get(bet_type, {}).get('amount', 0)
@@ -0,0 +1,198 @@
+"""
+オッズ時系列ストア
+開催日ごとに3連単オッズのスナップショットをfloat32の配列として追記し、
+メモリマップで読み出す
+
+索引とオッズは行番号で対応させる。追記は開催日ディレクトリのファイルロック（プロセス間）の中で行い、
+書き込み途中で止まって残った端数（索引のない行）は次の追記の前に切り詰める
+"""
+
+import fcntl
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from itertools import permutations
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import ODDS_DIR
+from src.scraping.venues import venue_code
+
+logger = logging.getLogger(__name__)
+
+# 3連単の全組み合わせ（1-2-3 から 6-5-4 まで、120通り）
+COMBINATIONS = ['-'.join(map(str, p)) for p in permutations(range(1, 7), 3)]
+COMBINATION_INDEX = {combination: i for i, combination in enumerate(COMBINATIONS)}
+
+# スナップショットの索引（取得時刻はエポックミリ秒）
+INDEX_DTYPE = np.dtype([('timestamp', '<i8'), ('venue', 'u1'), ('race_number', 'u1')])
+ODDS_DTYPE = np.dtype('<f4')
+
+INDEX_FILE = 'index.bin'
+ODDS_FILE = 'odds.f32'
+LOCK_FILE = '.lock'
+ROW_BYTES = len(COMBINATIONS) * ODDS_DTYPE.itemsize
+
+
+class OddsStore:
+    """開催日ごとの追記専用オッズ時系列ストア"""
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            root: 保存先ディレクトリ（開催日ごとにサブディレクトリを作成）
+        """
+        self.root = Path(root or ODDS_DIR)
+        self._lock = threading.Lock()
+
+    def _day_dir(self, race_date: str) -> Path:
+        return self.root / str(race_date)
+
+    def append(self, race_date: str, venue: str, race_number: int,
+               odds: Dict[str, float], timestamp: Optional[float] = None):
+        """
+        オッズのスナップショットを追記
+
+        Args:
+            race_date: 開催日（YYYY-MM-DD）
+            venue: 会場名
+            race_number: レース番号
+            odds: 組み合わせ（例: 1-2-3）ごとのオッズ（欠けた組み合わせはNaN）
+            timestamp: 取得時刻（エポック秒、省略時は現在時刻）
+        """
+        code = venue_code(venue)
+        if code is None:
+            raise ValueError(f"不明な会場です: {venue}")
+
+        row = np.full(len(COMBINATIONS), np.nan, dtype=ODDS_DTYPE)
+        for combination, value in odds.items():
+            i = COMBINATION_INDEX.get(combination)
+            if i is not None:
+                row[i] = value
+
+        entry = np.array(
+            [(int((timestamp or time.time()) * 1000), code, int(race_number))],
+            dtype=INDEX_DTYPE
+        )
+
+        day_dir = self._day_dir(race_date)
+        with self._lock:
+            day_dir.mkdir(parents=True, exist_ok=True)
+            with open(day_dir / LOCK_FILE, 'a') as lock:
+                # 同じ開催日に書き込む他のプロセスとも順番に追記する
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    self._append_locked(day_dir, row, entry)
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _append_locked(day_dir: Path, row: np.ndarray, entry: np.ndarray):
+        """索引とオッズの行数をそろえてから1行追記（ファイルロック中に呼ぶ）"""
+        with open(day_dir / INDEX_FILE, 'ab') as index_file, open(day_dir / ODDS_FILE, 'ab') as odds_file:
+            rows = os.fstat(index_file.fileno()).st_size // INDEX_DTYPE.itemsize
+            # 前回の追記が途中で止まっていれば、索引のないオッズ行と索引の端数を捨てる
+            if os.fstat(odds_file.fileno()).st_size > rows * ROW_BYTES:
+                odds_file.truncate(rows * ROW_BYTES)
+            if os.fstat(index_file.fileno()).st_size > rows * INDEX_DTYPE.itemsize:
+                index_file.truncate(rows * INDEX_DTYPE.itemsize)
+            # 索引はオッズの後に書き、索引にある行は必ずオッズがそろっている状態にする
+            odds_file.write(row.tobytes())
+            odds_file.flush()
+            index_file.write(entry.tobytes())
+
+    def _open(self, race_date: str) -> Tuple[np.ndarray, np.ndarray]:
+        """開催日の索引とオッズをメモリマップで開く"""
+        day_dir = self._day_dir(race_date)
+        index_path = day_dir / INDEX_FILE
+        odds_path = day_dir / ODDS_FILE
+        if not index_path.exists() or not odds_path.exists():
+            return np.empty(0, dtype=INDEX_DTYPE), np.empty((0, len(COMBINATIONS)), dtype=ODDS_DTYPE)
+
+        # 書き込み途中で止まった場合に備え、両方そろっている行数までを読む
+        # （索引のない端数のオッズ行は末尾にしか残らないため、行番号の対応はずれない）
+        rows = min(
+            index_path.stat().st_size // INDEX_DTYPE.itemsize,
+            odds_path.stat().st_size // ROW_BYTES
+        )
+        if rows == 0:
+            return np.empty(0, dtype=INDEX_DTYPE), np.empty((0, len(COMBINATIONS)), dtype=ODDS_DTYPE)
+
+        index = np.memmap(index_path, dtype=INDEX_DTYPE, mode='r', shape=(rows,))
+        odds = np.memmap(odds_path, dtype=ODDS_DTYPE, mode='r', shape=(rows, len(COMBINATIONS)))
+        return index, odds
+
+    def slice(self, race_date: str, venue: str, race_number: int,
+              start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        レース・時間帯を指定してスナップショットを取得
+
+        Args:
+            race_date: 開催日（YYYY-MM-DD）
+            venue: 会場名
+            race_number: レース番号
+            start: 取得時刻の下限（この時刻を含む）
+            end: 取得時刻の上限（この時刻を含まない）
+
+        Returns:
+            (取得時刻の配列（datetime64[ms]）, オッズの配列（スナップショット数 × 120）)
+            オッズの列はCOMBINATIONSの並び
+        """
+        index, odds = self._open(race_date)
+
+        mask = (index['venue'] == venue_code(venue)) & (index['race_number'] == int(race_number))
+        if start is not None:
+            mask &= index['timestamp'] >= int(start.timestamp() * 1000)
+        if end is not None:
+            mask &= index['timestamp'] < int(end.timestamp() * 1000)
+
+        rows = np.flatnonzero(mask)
+        timestamps = index['timestamp'][rows].astype('datetime64[ms]')
+        return timestamps, np.asarray(odds[rows])
+
+    def days(self, since: Optional[float] = None) -> List[str]:
+        """
+        スナップショットのある開催日を取得
+
+        Args:
+            since: 指定すると、この時刻（エポック秒）以降に追記された開催日だけを返す
+
+        Returns:
+            開催日（YYYY-MM-DD）の昇順のリスト
+        """
+        if not self.root.exists():
+            return []
+        days = []
+        for day_dir in self.root.iterdir():
+            index_path = day_dir / INDEX_FILE
+            if not index_path.exists():
+                continue
+            if since is not None and index_path.stat().st_mtime < since:
+                continue
+            days.append(day_dir.name)
+        return sorted(days)
+
+    def load_day(self, race_date: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        開催日の全スナップショットを取得
+
+        Args:
+            race_date: 開催日（YYYY-MM-DD）
+
+        Returns:
+            (索引の配列（INDEX_DTYPE）, オッズの配列（スナップショット数 × 120）)
+        """
+        index, odds = self._open(race_date)
+        return np.asarray(index), np.asarray(odds)
+
+    def snapshot_count(self, race_date: str) -> int:
+        """開催日のスナップショット数"""
+        index, _ = self._open(race_date)
+        return len(index)
@@ -0,0 +1,378 @@
+"""
+分析用Parquetエクスポート
+ローカルの記録とオッズ時系列を型付きのParquetファイルへ開催月ごとに書き出し、
+必要な列・期間だけをメモリマップで読み込む
+"""
+
+import argparse
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs
+import pyarrow.parquet as pq
+
+from config.settings import PARQUET_DIR, PARQUET_ODDS_DIR
+from src.data.odds_store import OddsStore, COMBINATIONS
+from src.data.race_store import RaceRecordStore
+from src.scraping.venues import VENUE_NAMES
+from src.utils.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+PARTITION_KEY = 'race_month'
+
+# 会場・グレード・券種は種類が少ないため辞書型で保持する
+CATEGORY = pa.dictionary(pa.int16(), pa.string())
+
+SCHEMA = pa.schema([
+    ('race_date', pa.date32()),
+    ('race_name', pa.string()),
+    ('venue', CATEGORY),
+    ('race_number', pa.int8()),
+    ('race_time', pa.string()),
+    ('grade', CATEGORY),
+    ('expected_odds', pa.float64()),
+    ('bet_type', CATEGORY),
+    ('combination', pa.string()),
+    ('result', pa.string()),
+    ('is_hit', pa.bool_()),
+    ('payout', pa.int64()),
+    ('notified_at', pa.timestamp('s')),
+    ('race_url', pa.string()),
+    ('note', pa.string()),
+])
+
+# オッズ時系列は「スナップショット × 組み合わせ」の縦持ち（オッズのない組み合わせは行を作らない）
+ODDS_SCHEMA = pa.schema([
+    ('race_date', pa.date32()),
+    ('venue', CATEGORY),
+    ('race_number', pa.int8()),
+    ('captured_at', pa.timestamp('ms')),
+    ('combination', CATEGORY),
+    ('odds', pa.float32()),
+])
+
+# 欠損を含む整数・真偽値の列がfloat64・objectにならないよう、pandasの欠損対応型で読み込む
+PANDAS_TYPES = {
+    pa.int8(): pd.Int8Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+    pa.bool_(): pd.BooleanDtype(),
+}
+
+PARTITIONING = ds.partitioning(pa.schema([(PARTITION_KEY, pa.string())]), flavor='hive')
+
+
+def _to_date(value: Any) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _to_datetime(value: Any) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    """数値に変換（スプレッドシートから取り込んだ '4,560' のような文字列も扱う）"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(',', '').strip())
+    except ValueError:
+        return None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    number = _to_float(value)
+    return int(number) if number is not None else None
+
+
+def _to_text(value: Any) -> Optional[str]:
+    return None if value is None or value == '' else str(value)
+
+
+def records_to_table(records: List[Dict]) -> pa.Table:
+    """
+    ストアの記録を型付きのテーブルへ変換
+
+    Args:
+        records: RaceRecordStoreの記録
+
+    Returns:
+        SCHEMAに沿ったテーブル
+    """
+    columns = {
+        'race_date': [_to_date(r['race_date']) for r in records],
+        'race_name': [_to_text(r['race_name']) for r in records],
+        'venue': [_to_text(r['venue']) for r in records],
+        'race_number': [_to_int(r['race_number']) for r in records],
+        'race_time': [_to_text(r['race_time']) for r in records],
+        'grade': [_to_text(r['grade']) for r in records],
+        'expected_odds': [_to_float(r['expected_odds']) for r in records],
+        'bet_type': [_to_text(r['bet_type']) for r in records],
+        'combination': [_to_text(r['combination']) for r in records],
+        'result': [_to_text(r['result']) for r in records],
+        'is_hit': [None if r['is_hit'] is None else bool(r['is_hit']) for r in records],
+        'payout': [_to_int(r['payout']) for r in records],
+        'notified_at': [_to_datetime(r['notified_at']) for r in records],
+        'race_url': [_to_text(r['race_url']) for r in records],
+        'note': [_to_text(r['note']) for r in records],
+    }
+    return pa.table(
+        [pa.array(columns[field.name], type=field.type) for field in SCHEMA],
+        schema=SCHEMA
+    )
+
+
+def odds_to_table(race_date: str, index: np.ndarray, odds: np.ndarray) -> pa.Table:
+    """
+    1開催日分のオッズ時系列を型付きのテーブルへ変換
+
+    Args:
+        race_date: 開催日（YYYY-MM-DD）
+        index: スナップショットの索引（OddsStore.load_dayの戻り値）
+        odds: オッズの配列（スナップショット数 × 120）
+
+    Returns:
+        ODDS_SCHEMAに沿ったテーブル
+    """
+    rows, columns = np.nonzero(~np.isnan(odds))
+
+    codes = index['venue'][rows]
+    venue_codes = np.unique(codes)
+    venues = pa.DictionaryArray.from_arrays(
+        pa.array(np.searchsorted(venue_codes, codes).astype(np.int16)),
+        pa.array([VENUE_NAMES.get(int(code), str(code)) for code in venue_codes], type=pa.string())
+    )
+    combinations = pa.DictionaryArray.from_arrays(
+        pa.array(columns.astype(np.int16)), pa.array(COMBINATIONS, type=pa.string())
+    )
+
+    return pa.table([
+        pa.array(np.full(len(rows), np.datetime64(race_date, 'D'))).cast(pa.date32()),
+        venues,
+        pa.array(index['race_number'][rows].astype(np.int8)),
+        pa.array(index['timestamp'][rows].astype('datetime64[ms]')),
+        combinations,
+        pa.array(odds[rows, columns]),
+    ], schema=ODDS_SCHEMA)
+
+
+def _write_partition(root: Path, month: str, name: str, table: pa.Table):
+    """開催月のディレクトリへテーブルを書き出す（既存のファイルは置き換え）"""
+    partition_dir = root / f"{PARTITION_KEY}={month}"
+    partition_dir.mkdir(parents=True, exist_ok=True)
+    # 読み込み側が書きかけのファイルを拾わないよう '.' 始まりの名前で書く
+    tmp_path = partition_dir / f".{name}.tmp"
+
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, partition_dir / name)
+
+
+def _month_range(month: str):
+    """年月（YYYY-MM）の初日と翌月初日を返す"""
+    start = date.fromisoformat(f"{month}-01")
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start.isoformat(), end.isoformat()
+
+
+class ParquetExporter:
+    """記録とオッズ時系列を開催月ごとのParquetファイルへ書き出すクラス"""
+
+    def __init__(self, store: Optional[RaceRecordStore] = None, root: Optional[str] = None,
+                 odds_store: Optional[OddsStore] = None, odds_root: Optional[str] = None):
+        """
+        初期化
+
+        Args:
+            store: 書き出し元のストア（書き出し済みの時刻もここに保持する）
+            root: 書き出し先ディレクトリ
+            odds_store: 書き出し元のオッズ時系列ストア
+            odds_root: オッズ時系列の書き出し先ディレクトリ
+        """
+        self.store = store or RaceRecordStore()
+        self.root = Path(root or PARQUET_DIR)
+        self.odds_store = odds_store or OddsStore()
+        self.odds_root = Path(odds_root or PARQUET_ODDS_DIR)
+
+    def export(self, full: bool = False) -> int:
+        """
+        前回以降に更新された月（fullなら全期間）の記録と、更新された開催日のオッズ時系列を書き出す
+
+        Args:
+            full: 全期間を書き出し直すか
+
+        Returns:
+            書き出した記録の月数
+        """
+        # 書き出し中の更新を次回に拾うため、開始時刻を記録する
+        started_at = datetime.now().isoformat()
+        since = None if full else self.store.get_meta('parquet_exported_at')
+
+        months = self.store.get_updated_months(since)
+        for month in months:
+            self.export_month(month)
+
+        self.store.set_meta('parquet_exported_at', started_at)
+        days = self.export_odds(full)
+        logger.info("Parquetエクスポート完了: %sか月分・オッズ%s日分", len(months), days)
+        return len(months)
+
+    def export_odds(self, full: bool = False) -> int:
+        """
+        前回以降に追記された開催日（fullなら全期間）のオッズ時系列を書き出す
+
+        Args:
+            full: 全期間を書き出し直すか
+
+        Returns:
+            書き出した日数
+        """
+        started_at = time.time()
+        since = None if full else self.store.get_meta('parquet_odds_exported_at')
+
+        days = self.odds_store.days(float(since) if since else None)
+        for race_date in days:
+            self.export_odds_day(race_date)
+
+        self.store.set_meta('parquet_odds_exported_at', str(started_at))
+        return len(days)
+
+    def export_odds_day(self, race_date: str) -> int:
+        """
+        1開催日分のオッズ時系列を書き出す（既存のファイルは置き換え）
+
+        Args:
+            race_date: 開催日（YYYY-MM-DD）
+
+        Returns:
+            書き出した行数
+        """
+        table = odds_to_table(race_date, *self.odds_store.load_day(race_date))
+        _write_partition(self.odds_root, race_date[:7], f"part-{race_date}.parquet", table)
+
+        logger.info("Parquet書き出し（オッズ）: %s %s行", race_date, table.num_rows)
+        return table.num_rows
+
+    def export_month(self, month: str) -> int:
+        """
+        1か月分の記録を書き出す（既存のファイルは置き換え）
+
+        Args:
+            month: 年月（YYYY-MM）
+
+        Returns:
+            書き出した行数
+        """
+        start_date, end_date = _month_range(month)
+        table = records_to_table(self.store.get_records_between(start_date, end_date))
+        _write_partition(self.root, month, 'part-0.parquet', table)
+
+        logger.info("Parquet書き出し: %s %s行", month, table.num_rows)
+        return table.num_rows
+
+
+def _load(root: Path, schema: pa.Schema, columns: List[str],
+          start_date: Optional[str], end_date: Optional[str], extra=None) -> pd.DataFrame:
+    """開催月のディレクトリと開催日で絞り込んでデータセットを読み込む"""
+    if not root.exists():
+        return pd.DataFrame(columns=columns)
+
+    # ページキャッシュ上のファイルをコピーせずに読むためメモリマップを使う
+    dataset = ds.dataset(
+        str(root), schema=schema.append(pa.field(PARTITION_KEY, pa.string())),
+        format='parquet', partitioning=PARTITIONING,
+        filesystem=pyarrow.fs.LocalFileSystem(use_mmap=True),
+    )
+
+    # 月単位のディレクトリで絞り込んでから開催日で絞り込む
+    conditions = list(extra or [])
+    if start_date:
+        conditions.append(ds.field(PARTITION_KEY) >= start_date[:7])
+        conditions.append(ds.field('race_date') >= pa.scalar(date.fromisoformat(start_date)))
+    if end_date:
+        conditions.append(ds.field(PARTITION_KEY) <= end_date[:7])
+        conditions.append(ds.field('race_date') <= pa.scalar(date.fromisoformat(end_date)))
+
+    condition = None
+    for expression in conditions:
+        condition = expression if condition is None else condition & expression
+
+    table = dataset.to_table(columns=columns, filter=condition)
+    return table.to_pandas(date_as_object=False, types_mapper=PANDAS_TYPES.get)
+
+
+def load_records(columns: Optional[List[str]] = None,
+                 start_date: Optional[str] = None,
+                 end_date: Optional[str] = None,
+                 root: Optional[str] = None) -> pd.DataFrame:
+    """
+    書き出したParquetファイルから記録を読み込む
+
+    Args:
+        columns: 読み込む列（省略時は全列）
+        start_date: 開催日の下限（YYYY-MM-DD、この日を含む）
+        end_date: 開催日の上限（YYYY-MM-DD、この日を含む）
+        root: 読み込み元ディレクトリ
+
+    Returns:
+        記録のDataFrame（payoutはInt64、is_hitはbooleanで欠損を保つ）
+    """
+    return _load(Path(root or PARQUET_DIR), SCHEMA, columns or SCHEMA.names, start_date, end_date)
+
+
+def load_odds(start_date: Optional[str] = None,
+              end_date: Optional[str] = None,
+              venue: Optional[str] = None,
+              race_number: Optional[int] = None,
+              columns: Optional[List[str]] = None,
+              root: Optional[str] = None) -> pd.DataFrame:
+    """
+    書き出したParquetファイルからオッズ時系列を読み込む
+
+    Args:
+        start_date: 開催日の下限（YYYY-MM-DD、この日を含む）
+        end_date: 開催日の上限（YYYY-MM-DD、この日を含む）
+        venue: 会場名
+        race_number: レース番号
+        columns: 読み込む列（省略時は全列）
+        root: 読み込み元ディレクトリ
+
+    Returns:
+        オッズ時系列のDataFrame（スナップショット × 組み合わせの縦持ち）
+    """
+    conditions = []
+    if venue is not None:
+        conditions.append(ds.field('venue') == venue)
+    if race_number is not None:
+        conditions.append(ds.field('race_number') == int(race_number))
+    return _load(Path(root or PARQUET_ODDS_DIR), ODDS_SCHEMA, columns or ODDS_SCHEMA.names,
+                 start_date, end_date, conditions)
+
+
+def main():
+    """コマンドラインからエクスポートを実行"""
+    parser = argparse.ArgumentParser(description='記録とオッズ時系列をParquetファイルへ書き出す')
+    parser.add_argument('--full', action='store_true', help='全期間を書き出し直す')
+    args = parser.parse_args()
+
+    setup_logging()
+    ParquetExporter().export(full=args.full)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+"""
+レース記録ストアクラス
+予想・結果・精算をローカルのSQLiteに記録（スプレッドシートはこのストアのミラー）
+"""
+
+import sqlite3
+import threading
+import logging
+from pathlib import Path
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import RACE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# スプレッドシートの列と同じ並び
+RECORD_COLUMNS = [
+    'race_date', 'race_name', 'venue', 'race_number', 'race_time',
+    'grade', 'expected_odds', 'combination', 'result', 'is_hit',
+    'payout', 'notified_at', 'race_url', 'note'
+]
+
+
+class RaceRecordStore:
+    """予想・結果の記録を保持するローカルストア"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or RACE_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # ミラー用のバックグラウンドスレッドからも利用する
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._init_schema()
+
+    def _init_schema(self):
+        """テーブルとインデックスを作成"""
+        with self._conn:
+            self._conn.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS race_records (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    race_date TEXT NOT NULL,
+                    race_name TEXT NOT NULL,
+                    venue TEXT NOT NULL,
+                    race_number INTEGER NOT NULL,
+                    race_time TEXT,
+                    grade TEXT,
+                    expected_odds REAL,
+                    bet_type TEXT NOT NULL DEFAULT '',
+                    combination TEXT NOT NULL DEFAULT '',
+                    result TEXT,
+                    is_hit INTEGER,
+                    payout INTEGER,
+                    notified_at TEXT,
+                    race_url TEXT,
+                    note TEXT,
+                    sheet_row INTEGER,
+                    version INTEGER NOT NULL DEFAULT 1,
+                    synced_version INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL,
+                    UNIQUE (race_date, venue, race_number, bet_type, combination)
+                )
+                '''
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_race_records_date ON race_records (race_date)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_race_records_venue_date '
+                'ON race_records (venue, race_date)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT)'
+            )
+            # ミラー待ちの行だけを引く部分インデックス
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_race_records_unsynced '
+                'ON race_records (id) WHERE version > synced_version'
+            )
+
+    def add_prediction(self, race_data: Dict, bet_data: Optional[Dict] = None,
+                       notified_at: Optional[str] = None) -> Optional[int]:
+        """
+        予想を記録
+
+        Args:
+            race_data: レース情報
+            bet_data: 買い目情報
+            notified_at: 通知日時
+
+        Returns:
+            記録ID（同じ買い目が記録済みならNone）
+        """
+        bet_data = bet_data or {}
+        now = datetime.now()
+        params = (
+            str(race_data.get('race_date', '')),
+            race_data.get('race_name', ''),
+            race_data.get('venue', ''),
+            int(race_data.get('race_number') or 0),
+            race_data.get('race_time', ''),
+            race_data.get('grade', ''),
+            race_data.get('expected_odds'),
+            bet_data.get('bet_type', ''),
+            bet_data.get('combination', ''),
+            notified_at or now.strftime('%Y-%m-%d %H:%M:%S'),
+            race_data.get('race_url', ''),
+            now.isoformat(),
+        )
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                '''
+                INSERT INTO race_records (
+                    race_date, race_name, venue, race_number, race_time, grade,
+                    expected_odds, bet_type, combination, notified_at, race_url, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (race_date, venue, race_number, bet_type, combination) DO NOTHING
+                ''',
+                params
+            )
+        return cursor.lastrowid if cursor.rowcount > 0 else None
+
+    def find_ids(self, race_date: str, venue: str, race_number: Any) -> List[int]:
+        """日付・会場・レース番号に該当する記録IDを取得"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id FROM race_records WHERE race_date = ? AND venue = ? AND race_number = ?',
+                (str(race_date), venue, int(race_number or 0))
+            ).fetchall()
+        return [row['id'] for row in rows]
+
+    def find_ids_by_name(self, race_name: str) -> List[int]:
+        """レース名に該当する最新日付の記録IDを取得"""
+        with self._lock:
+            rows = self._conn.execute(
+                '''
+                SELECT id FROM race_records
+                WHERE race_name = ? AND race_date = (
+                    SELECT MAX(race_date) FROM race_records WHERE race_name = ?
+                )
+                ''',
+                (race_name, race_name)
+            ).fetchall()
+        return [row['id'] for row in rows]
+
+    def settle(self, record_ids: List[int], result: str, is_hit: bool,
+               payout: int) -> List[Tuple[str, str, str]]:
+        """
+        レース結果を記録
+
+        Args:
+            record_ids: 対象の記録ID
+            result: 着順（例: 1-3-2）
+            is_hit: 的中可否
+            payout: 配当金
+
+        Returns:
+            今回初めて精算した記録の (日付, 会場, グレード) のリスト
+        """
+        if not record_ids:
+            return []
+
+        placeholders = ', '.join('?' for _ in record_ids)
+        with self._lock, self._conn:
+            newly_settled = self._conn.execute(
+                f"SELECT race_date, venue, grade FROM race_records "
+                f"WHERE id IN ({placeholders}) AND is_hit IS NULL",
+                record_ids
+            ).fetchall()
+            self._conn.execute(
+                f"UPDATE race_records "
+                f"SET result = ?, is_hit = ?, payout = ?, version = version + 1, updated_at = ? "
+                f"WHERE id IN ({placeholders})",
+                (result, int(is_hit), payout, datetime.now().isoformat(), *record_ids)
+            )
+        return [(row['race_date'], row['venue'], row['grade'] or '') for row in newly_settled]
+
+    def get_unsettled_races(self, until_date: str) -> List[Dict]:
+        """
+        結果が未記録のレースを取得
+
+        Args:
+            until_date: 開催日の上限（YYYY-MM-DD、この日を含む）
+
+        Returns:
+            レース情報のリスト（同じレースの買い目はまとめる）
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                '''
+                SELECT race_date, race_name, venue, race_number, race_time, grade,
+                       MAX(expected_odds) AS expected_odds, MAX(race_url) AS race_url
+                FROM race_records
+                WHERE is_hit IS NULL AND race_date <= ?
+                GROUP BY race_date, venue, race_number
+                ORDER BY race_date, race_time
+                ''',
+                (until_date,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_record(self, record_id: int) -> Optional[Dict]:
+        """記録を取得"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM race_records WHERE id = ?', (record_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_unsynced(self, limit: int = 1000) -> List[Dict]:
+        """スプレッドシートへ未反映の記録を取得"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM race_records WHERE version > synced_version ORDER BY id LIMIT ?',
+                (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def mark_synced(self, synced: List[Tuple[int, int, Optional[int]]]):
+        """
+        スプレッドシートへ反映済みとして記録
+
+        Args:
+            synced: (記録ID, 反映したバージョン, 行番号) のリスト
+        """
+        if not synced:
+            return
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                '''
+                UPDATE race_records
+                SET synced_version = MAX(synced_version, ?),
+                    sheet_row = COALESCE(?, sheet_row)
+                WHERE id = ?
+                ''',
+                [(version, sheet_row, record_id) for record_id, version, sheet_row in synced]
+            )
+
+    def import_sheet_row(self, sheet_row: int, values: List[Any]) -> bool:
+        """
+        ストアにない既存のスプレッドシート行を取り込む
+
+        スプレッドシートには券種の列がないため、行番号または
+        日付・会場・レース番号・買い目が一致する記録があれば取り込まない
+
+        Args:
+            sheet_row: 行番号
+            values: スプレッドシートの行データ
+
+        Returns:
+            取り込んだかどうか
+        """
+        record = dict(zip(RECORD_COLUMNS, values + [''] * (len(RECORD_COLUMNS) - len(values))))
+        hit_mark = record['is_hit']
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                '''
+                INSERT INTO race_records (
+                    race_date, race_name, venue, race_number, race_time, grade,
+                    expected_odds, combination, result, is_hit, payout,
+                    notified_at, race_url, note, sheet_row, synced_version, updated_at
+                )
+                SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM race_records
+                    WHERE sheet_row = ? OR (
+                        race_date = ? AND venue = ? AND race_number = ? AND combination = ?
+                    )
+                )
+                ''',
+                (
+                    str(record['race_date']), record['race_name'], record['venue'],
+                    int(record['race_number'] or 0), record['race_time'], record['grade'],
+                    record['expected_odds'] or None, record['combination'],
+                    record['result'] or None, {'○': 1, '×': 0}.get(hit_mark),
+                    record['payout'] if record['payout'] != '' else None,
+                    record['notified_at'], record['race_url'], record['note'],
+                    sheet_row, datetime.now().isoformat(),
+                    sheet_row, str(record['race_date']), record['venue'],
+                    int(record['race_number'] or 0), record['combination'],
+                )
+            )
+        return cursor.rowcount > 0
+
+    def get_meta(self, key: str) -> Optional[str]:
+        """ストアの管理情報を取得"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM store_meta WHERE key = ?', (key,)
+            ).fetchone()
+        return row['value'] if row else None
+
+    def set_meta(self, key: str, value: str):
+        """ストアの管理情報を設定"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO store_meta (key, value) VALUES (?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                (key, value)
+            )
+
+    def get_recent(self, limit: int = 10) -> List[Dict]:
+        """最近の記録を古い順に取得"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM race_records ORDER BY race_date DESC, id DESC LIMIT ?',
+                (limit,)
+            ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def get_all(self) -> List[Dict]:
+        """全記録を取得"""
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM race_records ORDER BY id').fetchall()
+        return [dict(row) for row in rows]
+
+    def get_synced_records(self) -> List[Dict]:
+        """行番号の割り当て済みの記録を取得"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM race_records WHERE sheet_row IS NOT NULL ORDER BY sheet_row'
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_updated_months(self, since: Optional[str] = None) -> List[str]:
+        """
+        指定日時以降に更新された記録の年月を取得
+
+        Args:
+            since: 更新日時の下限（ISO形式、省略時は全期間）
+
+        Returns:
+            年月（YYYY-MM）のリスト
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT DISTINCT substr(race_date, 1, 7) AS month FROM race_records '
+                'WHERE updated_at > ? ORDER BY month',
+                (since or '',)
+            ).fetchall()
+        return [row['month'] for row in rows]
+
+    def get_records_between(self, start_date: str, end_date: str) -> List[Dict]:
+        """開催日が start_date 以上 end_date 未満の記録を取得"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM race_records WHERE race_date >= ? AND race_date < ? '
+                'ORDER BY race_date, id',
+                (start_date, end_date)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def to_sheet_row(record: Dict) -> List[Any]:
+        """記録をスプレッドシートの行データへ変換"""
+        is_hit = record.get('is_hit')
+        values = {
+            **record,
+            'is_hit': '' if is_hit is None else ('○' if is_hit else '×'),
+        }
+        return [
+            '' if values.get(column) is None else values.get(column)
+            for column in RECORD_COLUMNS
+        ]
+
+    def close(self):
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,61 @@
+"""
+スプレッドシートミラークラス
+ローカルの記録をバックグラウンドで定期的にスプレッドシートへ反映
+"""
+
+import logging
+import threading
+from typing import Callable, Optional
+
+from config.settings import SHEETS_SYNC_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class SheetMirror:
+    """ローカル記録の変更を一定間隔でスプレッドシートへ反映するスレッド"""
+
+    def __init__(self, sync_func: Callable[[], int], interval: float = SHEETS_SYNC_INTERVAL):
+        """
+        初期化
+
+        Args:
+            sync_func: 未反映の記録を書き込み、反映件数を返す関数
+            interval: 反映間隔（秒）
+        """
+        self.sync_func = sync_func
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """バックグラウンドでの反映を開始"""
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='sheet-mirror', daemon=True)
+        self._thread.start()
+        logger.info("スプレッドシートミラー開始（%s秒間隔）", self.interval)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self._sync()
+
+    def _sync(self):
+        try:
+            synced = self.sync_func()
+            if synced:
+                logger.info("スプレッドシートへ %s 件を反映", synced)
+        except Exception as e:
+            # スプレッドシート障害時も次回に再試行する
+            logger.error("スプレッドシート反映エラー: %s", e)
+
+    def stop(self):
+        """反映を停止（停止前に最後の反映を行う）"""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+        self._sync()
+        logger.info("スプレッドシートミラー停止")
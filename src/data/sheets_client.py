@@ -0,0 +1,298 @@
+"""
+Google Sheets APIクライアント
+読み取り・書き込みのクォータを個別に制御し、429・5xx時は再試行する
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import gspread
+
+from config.settings import (
+    SHEETS_READ_QUOTA_PER_MINUTE, SHEETS_WRITE_QUOTA_PER_MINUTE,
+    SHEETS_MAX_RETRIES, SHEETS_RETRY_BACKOFF, SHEETS_RETRY_MAX_BACKOFF
+)
+from src.utils import metrics
+from src.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# 追記・挿入はそのまま再送すると二重に書き込むおそれがあるため、処理前に拒否される429だけを再試行する
+# （5xxは書き込まれていないことを確かめてから再送する）
+APPEND_RETRYABLE_STATUS = {429}
+# 追記済みかを確かめるときに比べる列（日付・レース名・会場・レース番号）
+APPEND_CHECK_RANGE = 'A1:D'
+APPEND_CHECK_COLUMNS = 4
+
+# 1行分の範囲（例: I5:K5）
+SINGLE_ROW_RANGE = re.compile(r'^([A-Z]+)(\d+):([A-Z]+)(\d+)$')
+
+OPERATION_READ = 'read'
+OPERATION_WRITE = 'write'
+
+
+class SheetsQuota:
+    """プロセス内で共有する読み取り・書き込みのクォータと操作ごとの計測値"""
+
+    def __init__(self, read_per_minute: int = SHEETS_READ_QUOTA_PER_MINUTE,
+                 write_per_minute: int = SHEETS_WRITE_QUOTA_PER_MINUTE):
+        self.buckets = {
+            OPERATION_READ: TokenBucket(read_per_minute),
+            OPERATION_WRITE: TokenBucket(write_per_minute),
+        }
+        self._lock = threading.Lock()
+        self._operations: Dict[str, Dict[str, float]] = {}
+
+    def acquire(self, kind: str) -> float:
+        """操作種別のトークンを取得"""
+        waited = self.buckets[kind].acquire()
+        if waited:
+            logger.warning("Sheets APIの%s上限に達したため %.1f 秒待機", kind, waited)
+        return waited
+
+    def record(self, operation: str, latency: float, retries: int, error: bool, waited: float):
+        """操作の計測値を記録（実行ごとの計測にも加算）"""
+        metrics.incr('sheets_calls_total', operation=operation, status='error' if error else 'ok')
+        metrics.observe('sheets_api_seconds', latency, operation=operation)
+        if retries:
+            metrics.incr('sheets_retries_total', retries, operation=operation)
+        if waited:
+            metrics.observe('sheets_wait_seconds', waited, operation=operation)
+        with self._lock:
+            stats = self._operations.setdefault(operation, {
+                'calls': 0, 'errors': 0, 'retries': 0,
+                'latency_total': 0.0, 'latency_max': 0.0, 'wait_total': 0.0,
+            })
+            stats['calls'] += 1
+            stats['errors'] += int(error)
+            stats['retries'] += retries
+            stats['latency_total'] += latency
+            stats['latency_max'] = max(stats['latency_max'], latency)
+            stats['wait_total'] += waited
+
+    def metrics(self) -> Dict:
+        """
+        操作ごとのレイテンシとクォータの残量を取得
+
+        Returns:
+            {'operations': {操作名: 計測値}, 'quota': {種別: 残量}}
+        """
+        with self._lock:
+            operations = {
+                name: {
+                    **stats,
+                    'latency_avg': stats['latency_total'] / stats['calls'] if stats['calls'] else 0,
+                }
+                for name, stats in self._operations.items()
+            }
+
+        quota = {}
+        for kind, bucket in self.buckets.items():
+            available = bucket.available
+            quota[kind] = {
+                'capacity': bucket.capacity,
+                'available': round(available, 2),
+                'headroom': available / bucket.capacity if bucket.capacity else 0,
+            }
+
+        return {'operations': operations, 'quota': quota}
+
+
+_default_quota: Optional[SheetsQuota] = None
+_default_quota_lock = threading.Lock()
+
+
+def get_default_quota() -> SheetsQuota:
+    """プロセス内で共有するクォータを取得"""
+    global _default_quota
+    with _default_quota_lock:
+        if _default_quota is None:
+            _default_quota = SheetsQuota()
+        return _default_quota
+
+
+def coalesce_updates(updates: List[Dict]) -> List[Dict]:
+    """
+    同じ列範囲で行が連続する1行ずつの更新を1つの範囲にまとめる
+
+    Args:
+        updates: batch_update形式の更新（{'range': 'I5:K5', 'values': [[...]]}）
+
+    Returns:
+        まとめた更新
+    """
+    merged: List[Dict] = []
+    runs: Dict[tuple, Dict] = {}
+    for update in sorted(updates, key=_update_sort_key):
+        match = SINGLE_ROW_RANGE.match(update['range'])
+        if not match or match.group(2) != match.group(4) or len(update['values']) != 1:
+            merged.append(update)
+            continue
+
+        start_col, row, end_col, _ = match.groups()
+        row = int(row)
+        run = runs.get((start_col, end_col))
+        if run and run['end_row'] + 1 == row:
+            run['end_row'] = row
+            run['update']['values'].append(update['values'][0])
+            run['update']['range'] = f"{start_col}{run['start_row']}:{end_col}{row}"
+        else:
+            entry = {'range': update['range'], 'values': [update['values'][0]]}
+            runs[(start_col, end_col)] = {'start_row': row, 'end_row': row, 'update': entry}
+            merged.append(entry)
+
+    return merged
+
+
+def find_rows(values: List[List[Any]], rows: List[List[Any]], columns: int = APPEND_CHECK_COLUMNS) -> Optional[int]:
+    """
+    シートの値の中で、先頭の列が rows と一致する連続した行のうち最後のものを探す
+
+    Args:
+        values: 1行目からのシートの値
+        rows: 探す行
+        columns: 比べる先頭の列数
+
+    Returns:
+        一致した最初の行の行番号（1始まり、見つからなければNone）
+    """
+    def cells(row):
+        row = list(row) + [''] * (columns - len(row))
+        return [str(value) for value in row[:columns]]
+
+    expected = [cells(row) for row in rows]
+    for start in range(len(values) - len(rows), -1, -1):
+        if [cells(row) for row in values[start:start + len(rows)]] == expected:
+            return start + 1
+    return None
+
+
+def _update_sort_key(update: Dict):
+    match = SINGLE_ROW_RANGE.match(update['range'])
+    if not match:
+        return ('', '', 0)
+    return (match.group(1), match.group(3), int(match.group(2)))
+
+
+class QuotaAwareWorksheet:
+    """クォータ制御・再試行・計測付きでgspreadのワークシートを操作するクライアント"""
+
+    def __init__(self, worksheet: gspread.Worksheet, quota: Optional[SheetsQuota] = None,
+                 max_retries: int = SHEETS_MAX_RETRIES,
+                 backoff: float = SHEETS_RETRY_BACKOFF,
+                 max_backoff: float = SHEETS_RETRY_MAX_BACKOFF):
+        """
+        初期化
+
+        Args:
+            worksheet: 操作対象のワークシート
+            quota: 共有するクォータ（省略時はプロセス共通）
+            max_retries: 429・5xx時の最大再試行回数
+            backoff: 再試行間隔の初期値（秒、回数ごとに倍）
+            max_backoff: 再試行間隔の上限（秒）
+        """
+        self.worksheet = worksheet
+        self.quota = quota or get_default_quota()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def __getattr__(self, name: str) -> Any:
+        # title・idなどAPI呼び出しを伴わない属性はそのまま参照
+        return getattr(self.worksheet, name)
+
+    def get(self, range_name: str, **kwargs) -> List[List[Any]]:
+        """範囲の値を取得"""
+        return self._call('get', OPERATION_READ, self.worksheet.get, range_name, **kwargs)
+
+    def batch_get(self, ranges: List[str], **kwargs) -> List[List[List[Any]]]:
+        """複数範囲の値を1回のAPI呼び出しで取得"""
+        return self._call('batch_get', OPERATION_READ, self.worksheet.batch_get, ranges, **kwargs)
+
+    def get_all_records(self, **kwargs) -> List[Dict]:
+        """全記録を取得"""
+        return self._call('get_all_records', OPERATION_READ, self.worksheet.get_all_records, **kwargs)
+
+    def append_rows(self, rows: List[List[Any]], **kwargs) -> Dict:
+        """
+        複数行を追記
+
+        5xxはサーバー側で追記が済んでいる場合があるため、シートに今回の行があれば追記済みとして扱い、
+        なければ改めて追記する
+
+        Args:
+            rows: 追記する行
+
+        Returns:
+            APIの応答（追記済みと判断した場合は updates.updatedRange・updatedRows だけの応答）
+        """
+        retries = 0
+        while True:
+            try:
+                return self._call('append_rows', OPERATION_WRITE, self.worksheet.append_rows, rows,
+                                  retry_status=APPEND_RETRYABLE_STATUS, **kwargs)
+            except gspread.exceptions.APIError as e:
+                status = getattr(e.response, 'status_code', None)
+                if status not in RETRYABLE_STATUS:
+                    raise
+                # 再試行しない場合も、呼び出し元が後で同じ行を追記し直さないよう追記済みかを確かめる
+                start_row = find_rows(self.get(APPEND_CHECK_RANGE), rows)
+                if start_row is not None:
+                    logger.warning("Sheets API append_rows が %s で失敗しましたが追記済みのため再送しません", status)
+                    return {'updates': {
+                        'updatedRange': f"'{self.worksheet.title}'!A{start_row}:N{start_row + len(rows) - 1}",
+                        'updatedRows': len(rows),
+                    }}
+                if retries >= self.max_retries:
+                    raise
+                retries += 1
+
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** retries))
+            logger.warning("Sheets API append_rows が %s で失敗、未追記のため %.1f 秒後に再送 (%s/%s)",
+                           status, delay, retries, self.max_retries)
+            time.sleep(delay)
+
+    def batch_update(self, updates: List[Dict], **kwargs) -> Dict:
+        """複数範囲を更新（連続する行の更新はまとめて送る）"""
+        updates = coalesce_updates(updates)
+        return self._call('batch_update', OPERATION_WRITE, self.worksheet.batch_update, updates, **kwargs)
+
+    def insert_row(self, values: List[Any], index: int = 1, **kwargs) -> Dict:
+        """行を挿入"""
+        return self._call('insert_row', OPERATION_WRITE, self.worksheet.insert_row, values, index,
+                          retry_status=APPEND_RETRYABLE_STATUS, **kwargs)
+
+    def metrics(self) -> Dict:
+        """操作ごとのレイテンシとクォータの残量を取得"""
+        return self.quota.metrics()
+
+    def _call(self, operation: str, kind: str, func, *args, retry_status=RETRYABLE_STATUS, **kwargs) -> Any:
+        """クォータを取得してAPIを呼び出し、retry_status（省略時は429・5xx）は揺らぎ付きの指数バックオフで再試行"""
+        retries = 0
+        waited = 0.0
+        started = time.monotonic()
+        while True:
+            waited += self.quota.acquire(kind)
+            try:
+                result = func(*args, **kwargs)
+            except gspread.exceptions.APIError as e:
+                status = getattr(e.response, 'status_code', None)
+                if status not in retry_status or retries >= self.max_retries:
+                    self.quota.record(operation, time.monotonic() - started - waited, retries, True, waited)
+                    raise
+
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** retries))
+                retries += 1
+                logger.warning("Sheets API %s が %s で失敗、%.1f 秒後に再試行 (%s/%s)",
+                               operation, status, delay, retries, self.max_retries)
+                time.sleep(delay)
+                waited += delay
+                continue
+
+            self.quota.record(operation, time.monotonic() - started - waited, retries, False, waited)
+            return result
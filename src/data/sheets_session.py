@@ -0,0 +1,229 @@
+"""
+Google Sheets APIの接続管理
+認証・スプレッドシートの取得を初回利用時まで遅らせ、
+アクセストークンとシートのID・タイトルをローカルにキャッシュする
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config.settings import (
+    GOOGLE_CREDENTIALS_PATH, GOOGLE_TOKEN_CACHE_PATH,
+    SHEETS_METADATA_CACHE_PATH, SHEETS_METADATA_TTL
+)
+
+logger = logging.getLogger(__name__)
+
+SCOPES = [
+    'https://spreadsheets.google.com/feeds',
+    'https://www.googleapis.com/auth/drive'
+]
+
+# 有効期限までこの時間を切ったトークンは再利用しない
+TOKEN_EXPIRY_MARGIN = timedelta(minutes=5)
+
+
+def _read_json(path: Path) -> Dict:
+    if not path.exists():
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning("キャッシュ読み込みエラー: %s: %s", path.name, e)
+        return {}
+
+
+def _write_json(path: Path, data: Dict, mode: int = 0o644):
+    """一時ファイル経由で置き換えて書き込む"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_credentials():
+    """
+    サービスアカウントの認証情報を読み込む（通信は発生しない）
+
+    Returns:
+        認証情報
+    """
+    from google.oauth2.service_account import Credentials
+
+    if os.path.exists(GOOGLE_CREDENTIALS_PATH):
+        # サービスアカウントキーファイルを使用
+        return Credentials.from_service_account_file(GOOGLE_CREDENTIALS_PATH, scopes=SCOPES)
+
+    # 環境変数から認証情報を取得（Heroku等での運用時）
+    creds_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
+    if creds_json:
+        return Credentials.from_service_account_info(json.loads(creds_json), scopes=SCOPES)
+
+    raise ValueError("Google認証情報が見つかりません")
+
+
+class SheetsSession:
+    """初回利用時に接続し、トークンとメタデータを再利用するセッション"""
+
+    def __init__(self, spreadsheet_id: str,
+                 token_path: Optional[str] = None,
+                 metadata_path: Optional[str] = None,
+                 metadata_ttl: float = SHEETS_METADATA_TTL):
+        """
+        初期化（認証・通信は行わない）
+
+        Args:
+            spreadsheet_id: スプレッドシートID
+            token_path: アクセストークンのキャッシュファイル
+            metadata_path: スプレッドシートのタイトル・ワークシートのシートIDのキャッシュファイル
+            metadata_ttl: メタデータの有効期間（秒）
+        """
+        self.spreadsheet_id = spreadsheet_id
+        self.token_path = Path(token_path or GOOGLE_TOKEN_CACHE_PATH)
+        self.metadata_path = Path(metadata_path or SHEETS_METADATA_CACHE_PATH)
+        self.metadata_ttl = metadata_ttl
+
+        self._lock = threading.RLock()
+        self._credentials = None
+        self._client = None
+        self._spreadsheet = None
+        self._saved_token: Optional[str] = None
+
+    @property
+    def client(self):
+        """gspreadクライアント（初回参照時に作成）"""
+        with self._lock:
+            if self._client is None:
+                import gspread
+
+                self._credentials = load_credentials()
+                self._load_token()
+                self._client = gspread.authorize(self._credentials)
+            return self._client
+
+    @property
+    def spreadsheet(self):
+        """スプレッドシート（初回参照時に開く）"""
+        with self._lock:
+            if self._spreadsheet is None:
+                self._open()
+            return self._spreadsheet
+
+    def open_worksheet(self, title: str, rows: int = 1000, cols: int = 20) -> Tuple[object, bool]:
+        """
+        ワークシートを取得（なければ作成）
+
+        キャッシュにシートIDがあれば、シート名での検索を省いてIDで取得する
+
+        Args:
+            title: ワークシート名
+            rows: 作成時の行数
+            cols: 作成時の列数
+
+        Returns:
+            (ワークシート, 作成したかどうか)
+        """
+        import gspread
+
+        with self._lock:
+            spreadsheet = self.spreadsheet
+            sheet_id = (self._cached_metadata() or {}).get('sheet_ids', {}).get(title)
+            if sheet_id is not None:
+                try:
+                    worksheet = spreadsheet.get_worksheet_by_id(sheet_id)
+                    if worksheet.title == title:
+                        return worksheet, False
+                except gspread.exceptions.WorksheetNotFound:
+                    pass
+                # 削除・名前の変更でキャッシュが古くなっている
+                logger.info("キャッシュしたシートIDが見つからないためシート名で取得: %s", title)
+
+            created = False
+            try:
+                worksheet = spreadsheet.worksheet(title)
+            except gspread.exceptions.WorksheetNotFound:
+                worksheet = spreadsheet.add_worksheet(title=title, rows=rows, cols=cols)
+                created = True
+            self._save_sheet_id(title, worksheet.id)
+            return worksheet, created
+
+    def _open(self):
+        """スプレッドシートを開く（公開APIで開き、gspreadの内部の属性には触れない）"""
+        self._spreadsheet = self.client.open_by_key(self.spreadsheet_id)
+        self.save_token()
+
+    def _cached_metadata(self) -> Optional[Dict]:
+        """有効期間内のメタデータを取得"""
+        entry = _read_json(self.metadata_path).get(self.spreadsheet_id)
+        if not entry or time.time() - entry.get('cached_at', 0) > self.metadata_ttl:
+            return None
+        return entry
+
+    def _save_metadata(self, entry: Dict):
+        """ID・タイトル・シートIDだけを保存（gspreadの内部の形式には依存しない）"""
+        cache = _read_json(self.metadata_path)
+        cache[self.spreadsheet_id] = {**entry, 'cached_at': time.time()}
+        _write_json(self.metadata_path, cache)
+
+    def _save_sheet_id(self, title: str, sheet_id: int):
+        metadata = self._cached_metadata() or {}
+        self._save_metadata({
+            'title': self._spreadsheet.title,
+            'sheet_ids': {**metadata.get('sheet_ids', {}), title: sheet_id},
+        })
+
+    def invalidate_metadata(self):
+        """メタデータのキャッシュを破棄（ワークシートの変更後など）"""
+        with self._lock:
+            cache = _read_json(self.metadata_path)
+            if cache.pop(self.spreadsheet_id, None) is not None:
+                _write_json(self.metadata_path, cache)
+            self._spreadsheet = None
+
+    def _load_token(self):
+        """別プロセスが取得した有効期限内のアクセストークンを認証情報へ設定"""
+        entry = _read_json(self.token_path).get(self._credentials.service_account_email)
+        if not entry:
+            return
+
+        expiry = datetime.fromisoformat(entry['expiry'])
+        # google-authの有効期限はタイムゾーンなしのUTC
+        if expiry - TOKEN_EXPIRY_MARGIN <= datetime.utcnow():
+            return
+
+        self._credentials.token = entry['token']
+        self._credentials.expiry = expiry
+        self._saved_token = entry['token']
+        logger.info("キャッシュしたアクセストークンを使用")
+
+    def save_token(self):
+        """更新されたアクセストークンを他のプロセス向けに保存"""
+        with self._lock:
+            credentials = self._credentials
+            if credentials is None or not credentials.token or not credentials.expiry:
+                return
+            if credentials.token == self._saved_token:
+                return
+
+            cache = _read_json(self.token_path)
+            cache[credentials.service_account_email] = {
+                'token': credentials.token,
+                'expiry': credentials.expiry.isoformat(),
+            }
+            # トークンは本人のみ読み書きできるようにする
+            _write_json(self.token_path, cache, mode=0o600)
+            self._saved_token = credentials.token
+
+    @property
+    def connected(self) -> bool:
+        """接続済みか"""
+        return self._client is not None
@@ -3,170 +3,489 @@ Googleスプレッドシート管理クラス
 レース情報と結果の記録を管理
 """
 
-import gspread
-from google.oauth2.service_account import Credentials
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Iterator, Optional, Any, Tuple, Union
 import logging
-import json
-import os
+import re
+import threading
 
-from config.settings import GOOGLE_CREDENTIALS_PATH, SPREADSHEET_ID
+from config.settings import SPREADSHEET_ID
+from src.data.write_buffer import RowWriteBuffer
+from src.data.statistics import RunningStatistics
+from src.data.race_store import RaceRecordStore
+from src.data.sheet_mirror import SheetMirror
+from src.data.sheets_session import SheetsSession
+from src.data.models import Race, Bet, Result
 
 logger = logging.getLogger(__name__)
 
+# 追記したが行番号が分からなかった記録のID（ストアのメタ情報のキー）
+UNLOCATED_META_KEY = 'unlocated_records'
+
+HEADERS = [
+    '日付', 'レース名', '会場', 'レース番号', '開始時刻',
+    'グレード', '予想配当', '買い目', '結果', '的中',
+    '配当金', '通知日時', 'レースURL', '備考'
+]
+
 class SpreadsheetManager:
     """Googleスプレッドシートの管理クラス"""
     
-    def __init__(self):
+    def __init__(self, store: Optional[RaceRecordStore] = None,
+                 statistics: Optional[RunningStatistics] = None,
+                 worksheet=None):
+        """
+        初期化
+        
+        Args:
+            store: ローカルストア（省略時は設定のDBファイル）
+            statistics: 集計（省略時は設定の集計ファイル）
+            worksheet: 記録用ワークシート（省略時は初回利用時に接続、試験用の代替も可）
+        """
         self.spreadsheet_id = SPREADSHEET_ID
-        self.client = None
-        self.spreadsheet = None
-        self.worksheet = None
-        self._authenticate()
+        
+        # 認証・スプレッドシートの取得はワークシートの初回利用時に行う
+        self.session = SheetsSession(self.spreadsheet_id)
+        self._worksheet = worksheet
+        
+        # 予想・結果はローカルストアが正本（行番号もストアで管理）
+        self.store = store if store is not None else RaceRecordStore()
+        
+        # 記録・精算のたびに更新する集計
+        self.statistics = statistics if statistics is not None else RunningStatistics()
+        
+        # 予想データの追記はまとめて書き込む（未追記の行はストアに残るため退避ファイルは不要）
+        self.write_buffer = RowWriteBuffer(self._append_rows, spill_path=None)
+        self._enqueued_ids = set()
+        # 追記したが行番号が分からなかった記録（次の同期で追記し直す前にシートから探す。再起動後も引き継ぐ）
+        self._unlocated_ids = {
+            int(record_id) for record_id in (self.store.get_meta(UNLOCATED_META_KEY) or '').split(',') if record_id
+        }
+        self._sync_lock = threading.RLock()
+        # 記録と集計の更新を1件ずつ行う（並行して記録しても集計を二重に数えない）
+        self._record_lock = threading.Lock()
+        self.mirror = SheetMirror(self.sync_pending)
+    
+    @property
+    def worksheet(self):
+        """記録用ワークシート（初回参照時に接続）"""
+        if self._worksheet is None:
+            with self._sync_lock:
+                if self._worksheet is None:
+                    self._connect()
+        return self._worksheet
+    
+    @worksheet.setter
+    def worksheet(self, worksheet):
+        self._worksheet = worksheet
     
-    def _authenticate(self):
-        """Google Sheets APIの認証"""
+    @property
+    def spreadsheet(self):
+        """スプレッドシート（初回参照時に接続）"""
+        return self.session.spreadsheet
+    
+    def _connect(self):
+        """Google Sheets APIに接続してワークシートを取得"""
+        # gspreadはスプレッドシートを使うときだけ読み込む
+        from src.data.sheets_client import QuotaAwareWorksheet
+        
         try:
-            # 認証情報の読み込み
-            scope = [
-                'https://spreadsheets.google.com/feeds',
-                'https://www.googleapis.com/auth/drive'
-            ]
-            
-            if os.path.exists(GOOGLE_CREDENTIALS_PATH):
-                # サービスアカウントキーファイルを使用
-                creds = Credentials.from_service_account_file(
-                    GOOGLE_CREDENTIALS_PATH, scopes=scope
-                )
-            else:
-                # 環境変数から認証情報を取得（Heroku等での運用時）
-                creds_json = os.getenv('GOOGLE_CREDENTIALS_JSON')
-                if creds_json:
-                    creds_dict = json.loads(creds_json)
-                    creds = Credentials.from_service_account_info(
-                        creds_dict, scopes=scope
-                    )
-                else:
-                    raise ValueError("Google認証情報が見つかりません")
-            
-            self.client = gspread.authorize(creds)
-            self.spreadsheet = self.client.open_by_key(self.spreadsheet_id)
-            
             # デフォルトワークシートを取得（なければ作成）
-            try:
-                self.worksheet = self.spreadsheet.worksheet('レース記録')
-            except gspread.WorksheetNotFound:
-                self.worksheet = self.spreadsheet.add_worksheet(
-                    title='レース記録', rows=1000, cols=20
-                )
+            worksheet, created = self.session.open_worksheet('レース記録', rows=1000, cols=20)
+            
+            # 以降の読み書きはクォータ制御付きのクライアント経由で行う
+            self._worksheet = QuotaAwareWorksheet(worksheet)
+            if created:
                 self._setup_headers()
             
-            logger.info("Googleスプレッドシート認証成功")
+            logger.info("Googleスプレッドシート接続成功")
             
         except Exception as e:
-            logger.error(f"スプレッドシート認証エラー: {e}")
+            logger.error("スプレッドシート接続エラー: %s", e)
             raise
     
     def _setup_headers(self):
         """ヘッダー行を設定"""
-        headers = [
-            '日付', 'レース名', '会場', 'レース番号', '開始時刻',
-            'グレード', '予想配当', '買い目', '結果', '的中',
-            '配当金', '通知日時', 'レースURL', '備考'
-        ]
-        
         try:
-            self.worksheet.insert_row(headers, 1)
+            self.worksheet.insert_row(HEADERS, 1)
             logger.info("ヘッダー行を設定しました")
         except Exception as e:
-            logger.error(f"ヘッダー設定エラー: {e}")
+            logger.error("ヘッダー設定エラー: %s", e)
     
-    def record_prediction(self, race_data: Dict, bet_data: Optional[Dict] = None) -> bool:
+    def record_prediction(self, race_data: Race, bet_data: Optional[Bet] = None) -> bool:
         """
         予想データを記録
         
+        ローカルストアに記録した時点で成功とし、スプレッドシートへは
+        書き込みバッファ経由でまとめて反映する
+        
         Args:
-            race_data: レース情報
-            bet_data: 買い目情報
+            race_data: レース情報（辞書も可）
+            bet_data: 買い目情報（辞書も可）
             
         Returns:
             記録成功可否
         """
         try:
-            # データ行を準備
-            row_data = [
-                race_data.get('race_date', ''),
-                race_data.get('race_name', ''),
-                race_data.get('venue', ''),
-                race_data.get('race_number', ''),
-                race_data.get('race_time', ''),
-                race_data.get('grade', ''),
-                race_data.get('expected_odds', ''),
-                bet_data.get('combination', '') if bet_data else '',
-                '',  # 結果（後で更新）
-                '',  # 的中（後で更新）
-                '',  # 配当金（後で更新）
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                race_data.get('race_url', ''),
-                ''   # 備考
-            ]
+            race = Race.from_dict(race_data)
+            with self._record_lock:
+                record_id = self.store.add_prediction(race, Bet.from_dict(bet_data))
+                if record_id is None:
+                    logger.info("記録済みの予想です: %s", race.race_name)
+                    return True
+                
+                # 集計を構築した場合は今回の記録も含まれている
+                if not self._try_ensure_statistics():
+                    self.statistics.record_prediction(race.race_date, race.venue, race.grade)
             
-            # 行を追加
-            self.worksheet.append_row(row_data)
-            logger.info(f"予想データを記録: {race_data.get('race_name')}")
+            # 書き込みバッファへ追加
+            record = self.store.get_record(record_id)
+            self._enqueue_record(record)
+            logger.info("予想データを記録: %s", race.race_name)
             return True
             
         except Exception as e:
-            logger.error(f"予想データ記録エラー: {e}")
+            logger.error("予想データ記録エラー: %s", e)
             return False
     
-    def update_result(self, race_name: str, result_data: Dict) -> bool:
+    def _enqueue_record(self, record: Dict):
+        """未追記の記録を書き込みバッファへ追加"""
+        with self._sync_lock:
+            if record['id'] in self._enqueued_ids:
+                return
+            self._enqueued_ids.add(record['id'])
+        self.write_buffer.enqueue(
+            self.store.to_sheet_row(record), key=(record['id'], record['version'])
+        )
+    
+    def _append_rows(self, rows: List[List[Any]], keys: List[Any]):
+        """複数行を1回のAPI呼び出しで追記し、割り当てられた行番号をストアへ記録"""
+        response = self.worksheet.append_rows(rows)
+        
+        updated_range = (response or {}).get('updates', {}).get('updatedRange', '')
+        match = re.search(r'![A-Z]+(\d+)', updated_range)
+        start_row = int(match.group(1)) if match else None
+        if start_row is None:
+            try:
+                start_row = self._locate_rows(rows)
+                logger.warning("追記の応答に範囲がないため、シートから行番号を確認: %s", start_row)
+            except Exception as e:
+                logger.error("追記した行の確認エラー: %s", e)
+        
+        record_ids = [key[0] for key in keys if key is not None]
+        if start_row is None:
+            # 行番号なしで反映済みにすると結果を書き込む行が分からないため、未反映のまま残して次の同期で探し直す
+            logger.error("追記した行の位置が分からないため未反映のまま残します: %s行（%s）", len(rows), updated_range)
+        else:
+            self.store.mark_synced([
+                (key[0], key[1], start_row + offset) for offset, key in enumerate(keys) if key is not None
+            ])
+        
+        with self._sync_lock:
+            self._enqueued_ids.difference_update(record_ids)
+            if start_row is None:
+                self._unlocated_ids.update(record_ids)
+                self._save_unlocated()
+            elif self._unlocated_ids.intersection(record_ids):
+                self._unlocated_ids.difference_update(record_ids)
+                self._save_unlocated()
+    
+    def _save_unlocated(self):
+        """行番号が分からなかった記録をストアに保存（_sync_lock内で呼ぶ）"""
+        self.store.set_meta(UNLOCATED_META_KEY, ','.join(map(str, sorted(self._unlocated_ids))))
+    
+    def _locate_rows(self, rows: List[List[Any]]) -> Optional[int]:
+        """追記の応答に範囲がない場合に、シートから追記した行を探して先頭の行番号を返す（なければNone）"""
+        from src.data.sheets_client import APPEND_CHECK_RANGE, find_rows
+        
+        return find_rows(self.worksheet.get(APPEND_CHECK_RANGE), rows)
+    
+    def flush(self) -> bool:
+        """
+        書き込みバッファの行をスプレッドシートへ書き込む
+        
+        Returns:
+            書き込み成功可否
+        """
+        return self.write_buffer.flush()
+    
+    def start_background_sync(self):
+        """ローカル記録のスプレッドシートへの反映をバックグラウンドで開始"""
+        self.mirror.start()
+    
+    def close(self):
+        """未反映の記録をスプレッドシートへ書き込んで終了"""
+        self.mirror.stop()
+        try:
+            self.sync_pending()
+        except Exception as e:
+            logger.error("スプレッドシート反映エラー: %s", e)
+        self.write_buffer.close()
+        
+        # 一度も接続していなければ何もしない
+        if self._worksheet is not None:
+            from src.data.sheets_client import QuotaAwareWorksheet
+            if not isinstance(self._worksheet, QuotaAwareWorksheet):
+                return
+            self.session.save_token()
+            logger.info("Sheets API計測: %s", self.get_api_metrics())
+    
+    def update_result(self, race: Union[str, Race], result_data: Result) -> bool:
         """
         結果を更新
         
         Args:
-            race_name: レース名
+            race: レース情報（日付・会場・レース番号で特定）またはレース名
             result_data: 結果データ
             
         Returns:
             更新成功可否
         """
+        return self.update_results([(race, result_data)]) > 0
+    
+    def update_results(self, results: List[Tuple[Union[str, Race], Result]]) -> int:
+        """
+        複数レースの結果を記録し、スプレッドシートへまとめて反映
+        
+        Args:
+            results: (レース情報またはレース名, 結果データ) のリスト
+            
+        Returns:
+            更新したレース数
+        """
+        return len(self.settle_results(results))
+    
+    def settle_results(self, results: List[Tuple[Union[str, Race], Result]]
+                       ) -> List[Tuple[Union[str, Race], Result]]:
+        """
+        複数レースの結果を記録し、スプレッドシートへまとめて反映（1回の一括更新）
+        
+        Args:
+            results: (レース情報またはレース名, 結果データ) のリスト
+            
+        Returns:
+            更新できた (レース情報またはレース名, 結果データ) のリスト
+        """
+        updated = []
         try:
-            # レース名で該当行を検索
-            cell = self.worksheet.find(race_name)
-            if not cell:
-                logger.warning(f"レースが見つかりません: {race_name}")
-                return False
-            
-            row_num = cell.row
-            
-            # 結果データを更新
-            result_order = '-'.join(result_data.get('result_order', []))
-            payout_info = result_data.get('payout', {})
-            
-            # 3連単の配当情報を取得
-            sanrentan = payout_info.get('3連単', {})
-            payout_odds = sanrentan.get('odds', 0)
-            payout_amount = sanrentan.get('amount', 0)
-            
-            # 的中判定（簡易版）
-            is_hit = payout_amount > 0
-            
-            # セルを更新
-            updates = [
-                {'range': f'I{row_num}', 'values': [[result_order]]},      # 結果
-                {'range': f'J{row_num}', 'values': [['○' if is_hit else '×']]},  # 的中
-                {'range': f'K{row_num}', 'values': [[payout_amount]]},     # 配当金
-            ]
+            try:
+                self._ensure_imported()
+            except Exception as e:
+                # レース名での指定以外はローカルの記録だけで精算できる
+                logger.warning("既存のスプレッドシート行を取り込めません: %s", e)
             
-            self.worksheet.batch_update(updates)
-            logger.info(f"結果を更新: {race_name}")
-            return True
+            settlements = []
+            for race, result_data in results:
+                if not isinstance(race, str):
+                    race = Race.from_dict(race)
+                    race_name = race.race_name
+                    record_ids = self.store.find_ids(race.race_date, race.venue, race.race_number)
+                else:
+                    # レース名のみの指定は最新の日付を対象にする
+                    race_name = race
+                    record_ids = self.store.find_ids_by_name(race)
+                
+                if not record_ids:
+                    logger.warning("レースが見つかりません: %s", race_name)
+                    continue
+                
+                # 結果データを更新
+                result = Result.from_dict(result_data)
+                result_order = '-'.join(result.result_order)
+                
+                # 3連単の配当情報を取得
+                payout_amount = result.payout_amount('3連単')
+                
+                # 的中判定（簡易版）
+                is_hit = payout_amount > 0
+                
+                # 精算済みの記録は集計に二重計上しない
+                for race_date, venue, grade in self.store.settle(
+                    record_ids, result_order, is_hit, payout_amount
+                ):
+                    settlements.append((race_date, venue, grade, is_hit, payout_amount))
+                updated.append((race, result))
+            
+            if settlements and not self._try_ensure_statistics():
+                self.statistics.record_settlements(settlements)
+            
+            logger.info("結果を記録: %sレース", len(updated))
+            
+        except Exception as e:
+            logger.error("結果更新エラー: %s", e)
+            return []
+        
+        # スプレッドシート障害時もローカルの記録は確定済み（ミラーが再試行）
+        try:
+            self.sync_pending()
+        except Exception as e:
+            logger.error("スプレッドシート反映エラー: %s", e)
+        return updated
+    
+    def get_unsettled_races(self, until_date: Optional[str] = None) -> List[Race]:
+        """
+        結果が未記録のレースを取得（ローカルの記録から取得するためAPI呼び出しは発生しない）
+        
+        Args:
+            until_date: 開催日の上限（YYYY-MM-DD、省略時は今日）
+            
+        Returns:
+            レース情報のリスト
+        """
+        until_date = until_date or datetime.now().strftime('%Y-%m-%d')
+        return [Race.from_dict(race) for race in self.store.get_unsettled_races(until_date)]
+    
+    def sync_pending(self) -> int:
+        """
+        ローカルストアの未反映の記録をスプレッドシートへ書き込む
+        
+        Returns:
+            反映した記録数
+        """
+        with self._sync_lock:
+            unsynced = self.store.get_unsynced()
+            
+            # 行番号が割り当て済みの記録は結果・的中・配当金の範囲を1回で更新
+            changed = [record for record in unsynced if record['sheet_row']]
+            if changed:
+                self.worksheet.batch_update([
+                    {
+                        'range': f"I{record['sheet_row']}:K{record['sheet_row']}",
+                        'values': [self.store.to_sheet_row(record)[8:11]]
+                    }
+                    for record in changed
+                ])
+                self.store.mark_synced([
+                    (record['id'], record['version'], None) for record in changed
+                ])
+        
+        # 未追記の記録は書き込みバッファ経由でまとめて追記
+        new_records = [record for record in unsynced if not record['sheet_row']]
+        for record in self._reconcile_unlocated(new_records):
+            self._enqueue_record(record)
+        if new_records and not self.flush():
+            return len(changed)
+        
+        return len(changed) + len(new_records)
+    
+    def _reconcile_unlocated(self, records: List[Dict]) -> List[Dict]:
+        """
+        行番号が分からなかった追記をシートから探し、見つかった記録は反映済みにする
+        
+        Args:
+            records: 未追記の記録
+            
+        Returns:
+            追記し直す記録
+        """
+        with self._sync_lock:
+            unlocated = [record for record in records if record['id'] in self._unlocated_ids]
+        if not unlocated:
+            return records
+        
+        skipped = set()
+        for record in unlocated:
+            try:
+                sheet_row = self._locate_rows([self.store.to_sheet_row(record)])
+            except Exception as e:
+                # シートを読めなければ追記されたか分からないため、次の同期まで追記しない
+                logger.error("追記した行の確認エラー: %s", e)
+                skipped.add(record['id'])
+                continue
+            if sheet_row is not None:
+                self.store.mark_synced([(record['id'], record['version'], sheet_row)])
+                skipped.add(record['id'])
+            with self._sync_lock:
+                self._unlocated_ids.discard(record['id'])
+                self._save_unlocated()
+        return [record for record in records if record['id'] not in skipped]
+    
+    def _ensure_imported(self):
+        """ストアにない既存のスプレッドシート行を一度だけ一括取得して取り込む"""
+        if self.store.get_meta('sheet_imported'):
+            return
+        
+        self.flush()
+        values = self.worksheet.get('A2:N')
+        imported = 0
+        for offset, row in enumerate(values):
+            if row and self.store.import_sheet_row(offset + 2, row):
+                imported += 1
+        self.store.set_meta('sheet_imported', datetime.now().isoformat())
+        
+        logger.info("既存のスプレッドシート行 %s 件を取り込み", imported)
+    
+    def reconcile(self) -> int:
+        """
+        スプレッドシートをローカルストアの内容に合わせて修復
+        
+        Returns:
+            修復した行数
+        """
+        from gspread.utils import numericise_all
+        
+        try:
+            self._ensure_imported()
+            self.sync_pending()
+            
+            values = self.worksheet.get('A2:M', value_render_option='UNFORMATTED_VALUE')
+            sheet_rows = {
+                offset + 2: numericise_all(row + [''] * (13 - len(row)))
+                for offset, row in enumerate(values)
+            }
+            
+            # 備考欄は手入力を想定して比較・上書きしない
+            updates = []
+            for record in self.store.get_synced_records():
+                expected = numericise_all(
+                    [str(value) for value in self.store.to_sheet_row(record)[:13]]
+                )
+                if sheet_rows.get(record['sheet_row']) != expected:
+                    updates.append({
+                        'range': f"A{record['sheet_row']}:M{record['sheet_row']}",
+                        'values': [self.store.to_sheet_row(record)[:13]]
+                    })
+            
+            if updates:
+                self.worksheet.batch_update(updates)
+            logger.info("スプレッドシートを修復: %s行", len(updates))
+            return len(updates)
             
         except Exception as e:
-            logger.error(f"結果更新エラー: {e}")
+            logger.error("スプレッドシート修復エラー: %s", e)
+            return 0
+    
+    def _ensure_statistics(self) -> bool:
+        """
+        集計がなければローカルの全記録から一度だけ構築
+        
+        Returns:
+            今回構築したかどうか
+        """
+        if self.statistics.initialized:
             return False
+        
+        # スプレッドシートにしかない過去の行を先に取り込む
+        self._ensure_imported()
+        self.statistics.rebuild(self._local_records())
+        return True
+    
+    def _local_records(self) -> Iterator[Dict]:
+        """ローカルストアの全記録（集計の入力の形）"""
+        return (dict(zip(HEADERS, self.store.to_sheet_row(record))) for record in self.store.get_all())
+    
+    def _try_ensure_statistics(self) -> bool:
+        """
+        集計の構築を試みる（スプレッドシートに接続できなければ次回に持ち越す）
+        
+        Returns:
+            集計を差分で更新する必要がなければTrue（今回構築した・未構築のまま）
+        """
+        try:
+            return self._ensure_statistics()
+        except Exception as e:
+            logger.warning("集計の構築を保留: %s", e)
+            return True
     
     def get_recent_records(self, limit: int = 10) -> List[Dict]:
         """
@@ -179,54 +498,57 @@ class SpreadsheetManager:
             記録のリスト
         """
         try:
-            # 全データを取得
-            records = self.worksheet.get_all_records()
-            
-            # 最新の記録を取得
-            recent_records = records[-limit:] if len(records) > limit else records
+            # ローカルストアから取得するためAPI呼び出しは発生しない
+            recent_records = [
+                dict(zip(HEADERS, self.store.to_sheet_row(record)))
+                for record in self.store.get_recent(limit)
+            ]
             
-            logger.info(f"最近の記録 {len(recent_records)} 件を取得")
+            logger.info("最近の記録 %s 件を取得", len(recent_records))
             return recent_records
             
         except Exception as e:
-            logger.error(f"記録取得エラー: {e}")
+            logger.error("記録取得エラー: %s", e)
             return []
     
     def get_statistics(self) -> Dict:
         """
         統計情報を取得
         
+        記録・精算のたびに更新している集計から作成するため、
+        スプレッドシートの全件取得は集計が未構築の初回のみ。
+        スプレッドシートに接続できず集計を構築できない場合は、ローカルストアの記録だけで集計する
+        
         Returns:
             統計データ
         """
         try:
-            records = self.worksheet.get_all_records()
+            statistics = self.statistics
+            if self._try_ensure_statistics() and not statistics.initialized:
+                # 集計ファイルには残さず、接続できたときにスプレッドシートの行も含めて構築し直す
+                statistics = RunningStatistics(persist=False)
+                statistics.rebuild(self._local_records())
+            stats = statistics.summary()
             
-            if not records:
+            if not stats.get('total_races'):
                 return {}
             
-            total_races = len(records)
-            hit_races = len([r for r in records if r.get('的中') == '○'])
-            total_payout = sum([
-                r.get('配当金', 0) for r in records 
-                if isinstance(r.get('配当金'), (int, float))
-            ])
-            
-            stats = {
-                'total_races': total_races,
-                'hit_races': hit_races,
-                'hit_rate': (hit_races / total_races * 100) if total_races > 0 else 0,
-                'total_payout': total_payout,
-                'average_payout': (total_payout / hit_races) if hit_races > 0 else 0
-            }
-            
             logger.info("統計情報を取得しました")
             return stats
             
         except Exception as e:
-            logger.error(f"統計取得エラー: {e}")
+            logger.error("統計取得エラー: %s", e)
             return {}
     
+    def get_api_metrics(self) -> Dict:
+        """
+        Sheets APIの操作ごとのレイテンシとクォータの残量を取得
+        
+        Returns:
+            計測データ
+        """
+        return self.worksheet.metrics()
+    
     def test_connection(self) -> bool:
         """
         接続テスト
@@ -235,11 +557,11 @@ class SpreadsheetManager:
             接続成功可否
         """
         try:
-            # スプレッドシートの情報を取得してテスト
-            title = self.spreadsheet.title
-            logger.info(f"接続テスト成功: {title}")
+            # ワークシートを実際に読み取ってテスト（メタデータはキャッシュの場合がある）
+            self.worksheet.get('A1:A1')
+            logger.info("接続テスト成功: %s", self.spreadsheet.title)
             return True
             
         except Exception as e:
-            logger.error(f"接続テストエラー: {e}")
+            logger.error("接続テストエラー: %s", e)
             return False
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+成績集計クラス
+予想・結果の記録ごとに集計値を更新し、ローカルのJSONファイルに保持
+"""
+
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config.settings import STATISTICS_PATH, STATISTICS_WINDOWS
+
+logger = logging.getLogger(__name__)
+
+
+def _empty_bucket() -> Dict:
+    return {'total': 0, 'hits': 0, 'payout': 0}
+
+
+def _to_number(value) -> float:
+    """スプレッドシートの値を数値に変換（'4,560'のような文字列も扱う）"""
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(str(value).replace(',', '').strip() or 0)
+    except ValueError:
+        return 0
+
+
+class RunningStatistics:
+    """記録・精算のたびに更新する累計・内訳・日別の集計"""
+
+    def __init__(self, path: Optional[str] = None, persist: bool = True):
+        """
+        初期化
+
+        Args:
+            path: 集計ファイル
+            persist: Falseならファイルを読み書きしない（その場限りの集計）
+        """
+        self.path = Path(path or STATISTICS_PATH)
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self) -> Optional[Dict]:
+        """集計ファイルを読み込む（なければNone）"""
+        if not self.persist or not self.path.exists():
+            return None
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("集計ファイル読み込みエラー: %s", e)
+            return None
+
+    @property
+    def initialized(self) -> bool:
+        """集計が構築済みか"""
+        return self._data is not None
+
+    def rebuild(self, records: Iterable[Dict]):
+        """
+        スプレッドシートの全記録から集計を作り直す（初回のみ）
+
+        Args:
+            records: get_all_records形式の記録
+        """
+        with self._lock:
+            self._data = {
+                'overall': _empty_bucket(),
+                'by_venue': {},
+                'by_grade': {},
+                'by_date': {},
+            }
+            count = 0
+            for record in records:
+                keys = (record.get('日付', ''), record.get('会場', ''), record.get('グレード', ''))
+                self._add(keys, 'total', 1)
+                if record.get('的中') == '○':
+                    self._add(keys, 'hits', 1)
+                    self._add(keys, 'payout', _to_number(record.get('配当金', 0)))
+                count += 1
+            self._save()
+
+        logger.info("集計を再構築: %s件", count)
+
+    def record_prediction(self, race_date: str, venue: str, grade: str):
+        """予想の記録を集計に反映"""
+        with self._lock:
+            self._add((race_date, venue, grade), 'total', 1)
+            self._save()
+
+    def record_settlements(self, settlements: List[Tuple[str, str, str, bool, float]]):
+        """
+        精算結果を集計に反映
+
+        Args:
+            settlements: (日付, 会場, グレード, 的中, 配当金) のリスト
+        """
+        if not settlements:
+            return
+
+        with self._lock:
+            for race_date, venue, grade, is_hit, payout in settlements:
+                if is_hit:
+                    keys = (race_date, venue, grade)
+                    self._add(keys, 'hits', 1)
+                    self._add(keys, 'payout', _to_number(payout))
+            self._save()
+
+    def _add(self, keys: Tuple[str, str, str], field: str, amount: float):
+        race_date, venue, grade = (str(key) for key in keys)
+        for bucket in (
+            self._data['overall'],
+            self._data['by_venue'].setdefault(venue, _empty_bucket()),
+            self._data['by_grade'].setdefault(grade, _empty_bucket()),
+            self._data['by_date'].setdefault(race_date, _empty_bucket()),
+        ):
+            bucket[field] += amount
+
+    def _save(self):
+        """集計ファイルを書き込む（一時ファイル経由で置き換え）"""
+        if not self.persist:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _rates(bucket: Dict) -> Dict:
+        total = bucket['total']
+        hits = bucket['hits']
+        return {
+            'total_races': total,
+            'hit_races': hits,
+            'hit_rate': (hits / total * 100) if total > 0 else 0,
+            'total_payout': bucket['payout'],
+            'average_payout': (bucket['payout'] / hits) if hits > 0 else 0,
+        }
+
+    def summary(self, today: Optional[datetime] = None) -> Dict:
+        """
+        統計情報を作成
+
+        Args:
+            today: 直近期間の基準日（省略時は今日）
+
+        Returns:
+            累計・会場別・グレード別・直近期間の統計
+        """
+        if not self.initialized:
+            return {}
+
+        today = today or datetime.now()
+        with self._lock:
+            stats = self._rates(self._data['overall'])
+            stats['by_venue'] = {
+                venue: self._rates(bucket) for venue, bucket in self._data['by_venue'].items()
+            }
+            stats['by_grade'] = {
+                grade: self._rates(bucket) for grade, bucket in self._data['by_grade'].items()
+            }
+
+            by_date = self._data['by_date']
+            for days in STATISTICS_WINDOWS:
+                window = _empty_bucket()
+                for offset in range(days):
+                    bucket = by_date.get((today - timedelta(days=offset)).strftime('%Y-%m-%d'))
+                    if bucket:
+                        for field in window:
+                            window[field] += bucket[field]
+                stats[f'last_{days}_days'] = self._rates(window)
+
+        return stats
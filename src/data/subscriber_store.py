@@ -0,0 +1,297 @@
+"""
+購読者ストアクラス
+LINEフォロワーの状態をローカルのSQLiteで管理
+"""
+
+import sqlite3
+import threading
+import logging
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+
+from config.settings import SUBSCRIBER_DB_PATH, WEBHOOK_EVENT_ID_RETENTION_DAYS
+
+logger = logging.getLogger(__name__)
+
+# フォロー状態
+STATUS_FOLLOWING = 'following'
+STATUS_UNFOLLOWED = 'unfollowed'
+
+# 購読ティア
+TIER_FREE = 'free'
+TIER_PREMIUM = 'premium'
+
+# イベント種別
+EVENT_FOLLOW = 'follow'
+EVENT_UNFOLLOW = 'unfollow'
+EVENT_MESSAGE = 'message'
+EVENT_LINK_PREMIUM = 'link_premium'  # note購読者の連携コード受信
+
+
+class SubscriberStore:
+    """LINEフォロワーの状態を保持するローカルストア"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or SUBSCRIBER_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Webhookのワーカースレッドから利用するためスレッド間で共有
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._init_schema()
+
+    def _init_schema(self):
+        """テーブルを作成"""
+        with self._conn:
+            self._conn.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS subscribers (
+                    user_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    tier TEXT NOT NULL DEFAULT 'free',
+                    followed_at TEXT,
+                    last_message_at TEXT,
+                    updated_at TEXT NOT NULL
+                )
+                '''
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_subscribers_status_tier '
+                'ON subscribers (status, tier)'
+            )
+            # 反映済みのWebhookイベントID（LINEの再送を二重に反映しない）
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS webhook_events (event_id TEXT PRIMARY KEY, received_at TEXT NOT NULL)'
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_webhook_events_received ON webhook_events (received_at)'
+            )
+            # 一部のバッチが失敗した配信の未送信の宛先（再実行時はここだけに送る）
+            self._conn.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS pending_deliveries (
+                    delivery_key TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    PRIMARY KEY (delivery_key, user_id)
+                )
+                '''
+            )
+
+    def apply_events(self, events: List[Tuple]) -> int:
+        """
+        フォロー・ブロック・メッセージイベントをまとめて反映
+
+        WebhookイベントIDのあるイベントは反映済みなら飛ばすため、LINEの再送や退避分の再反映も1回だけ反映される。
+        DBエラーは呼び出し元で再試行・退避できるよう送出する
+
+        Args:
+            events: (ユーザーID, イベント種別, 発生日時ISO文字列[, WebhookイベントID]) のリスト（発生順）
+
+        Returns:
+            反映したイベント件数（反映済みのイベントは除く）
+        """
+        if not events:
+            return 0
+
+        now = datetime.now().isoformat()
+
+        try:
+            # 1トランザクションで反映（フォロー急増時もfsyncは1回）
+            with self._lock, self._conn:
+                events = self._skip_applied(events, now)
+
+                # 同一ユーザーのフォロー・ブロックはバッチ内で最後の状態だけを反映
+                latest_status = {}
+                messages = []
+                premium_links = []
+                for user_id, kind, occurred_at, *_ in events:
+                    if kind in (EVENT_FOLLOW, EVENT_UNFOLLOW):
+                        latest_status[user_id] = (kind, occurred_at)
+                    elif kind in (EVENT_MESSAGE, EVENT_LINK_PREMIUM):
+                        messages.append((user_id, STATUS_FOLLOWING, occurred_at, now))
+                        if kind == EVENT_LINK_PREMIUM:
+                            premium_links.append((TIER_PREMIUM, now, user_id))
+
+                follows = [
+                    (user_id, STATUS_FOLLOWING, occurred_at, now)
+                    for user_id, (kind, occurred_at) in latest_status.items()
+                    if kind == EVENT_FOLLOW
+                ]
+                unfollows = [
+                    (user_id, STATUS_UNFOLLOWED, now)
+                    for user_id, (kind, occurred_at) in latest_status.items()
+                    if kind == EVENT_UNFOLLOW
+                ]
+
+                self._conn.executemany(
+                    '''
+                    INSERT INTO subscribers (user_id, status, followed_at, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        status = excluded.status,
+                        followed_at = excluded.followed_at,
+                        updated_at = excluded.updated_at
+                    ''',
+                    follows
+                )
+                self._conn.executemany(
+                    '''
+                    INSERT INTO subscribers (user_id, status, updated_at)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        status = excluded.status,
+                        updated_at = excluded.updated_at
+                    ''',
+                    unfollows
+                )
+                self._conn.executemany(
+                    '''
+                    INSERT INTO subscribers (user_id, status, last_message_at, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        last_message_at = excluded.last_message_at,
+                        updated_at = excluded.updated_at
+                    ''',
+                    messages
+                )
+                self._conn.executemany(
+                    'UPDATE subscribers SET tier = ?, updated_at = ? WHERE user_id = ?',
+                    premium_links
+                )
+            return len(events)
+
+        except sqlite3.Error as e:
+            logger.error("購読者イベント反映エラー: %s", e)
+            raise
+
+    def _skip_applied(self, events: List[Tuple], now: str) -> List[Tuple]:
+        """反映済みのWebhookイベントを除き、残りのイベントIDを記録（反映と同じトランザクション内で呼ぶ）"""
+        cutoff = (datetime.now() - timedelta(days=WEBHOOK_EVENT_ID_RETENTION_DAYS)).isoformat()
+        self._conn.execute('DELETE FROM webhook_events WHERE received_at < ?', (cutoff,))
+
+        new_events = []
+        for event in events:
+            event_id = event[3] if len(event) > 3 else None
+            if event_id:
+                cursor = self._conn.execute(
+                    'INSERT OR IGNORE INTO webhook_events (event_id, received_at) VALUES (?, ?)',
+                    (event_id, now)
+                )
+                if cursor.rowcount == 0:
+                    continue
+            new_events.append(event)
+        return new_events
+
+    def get_subscriber(self, user_id: str) -> Optional[Dict]:
+        """
+        購読者情報を取得
+
+        Args:
+            user_id: LINEユーザーID
+
+        Returns:
+            購読者情報の辞書
+        """
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT user_id, status, tier, followed_at, last_message_at, updated_at '
+                'FROM subscribers WHERE user_id = ?',
+                (user_id,)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        keys = ['user_id', 'status', 'tier', 'followed_at', 'last_message_at', 'updated_at']
+        return dict(zip(keys, row))
+
+    def get_user_ids(self, tiers: Optional[List[str]] = None) -> List[str]:
+        """
+        フォロー中のユーザーIDを取得
+
+        Args:
+            tiers: 対象ティア（省略時は全ティア）
+
+        Returns:
+            ユーザーIDのリスト
+        """
+        query = 'SELECT user_id FROM subscribers WHERE status = ?'
+        params = [STATUS_FOLLOWING]
+        if tiers:
+            query += f" AND tier IN ({', '.join('?' for _ in tiers)})"
+            params.extend(tiers)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [row[0] for row in rows]
+
+    def set_tier(self, user_id: str, tier: str) -> bool:
+        """
+        購読ティアを設定
+
+        Args:
+            user_id: LINEユーザーID
+            tier: 購読ティア
+
+        Returns:
+            更新成功可否
+        """
+        try:
+            with self._lock, self._conn:
+                cursor = self._conn.execute(
+                    'UPDATE subscribers SET tier = ?, updated_at = ? WHERE user_id = ?',
+                    (tier, datetime.now().isoformat(), user_id)
+                )
+            return cursor.rowcount > 0
+
+        except sqlite3.Error as e:
+            logger.error("購読ティア更新エラー: %s", e)
+            return False
+
+    def get_pending_recipients(self, delivery_key: str) -> Optional[List[str]]:
+        """
+        途中で失敗した配信の未送信の宛先を取得
+
+        Args:
+            delivery_key: 配信の識別子
+
+        Returns:
+            未送信のユーザーIDのリスト（途中で失敗した配信でなければNone）
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT user_id FROM pending_deliveries WHERE delivery_key = ?', (delivery_key,)
+            ).fetchall()
+        return [row[0] for row in rows] or None
+
+    def set_pending_recipients(self, delivery_key: str, user_ids: List[str]):
+        """
+        配信の未送信の宛先を置き換える（空なら配信済みとして削除）
+
+        Args:
+            delivery_key: 配信の識別子
+            user_ids: 未送信のユーザーID
+        """
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM pending_deliveries WHERE delivery_key = ?', (delivery_key,))
+            self._conn.executemany(
+                'INSERT INTO pending_deliveries (delivery_key, user_id) VALUES (?, ?)',
+                [(delivery_key, user_id) for user_id in user_ids]
+            )
+
+    def count_followers(self) -> int:
+        """フォロー中のユーザー数を取得"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT COUNT(*) FROM subscribers WHERE status = ?',
+                (STATUS_FOLLOWING,)
+            ).fetchone()
+        return row[0]
+
+    def close(self):
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,141 @@
+"""
+スプレッドシート書き込みバッファ
+追記行をまとめて1回のAPI呼び出しで書き込む（ライトビハインド）
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+from config.settings import SHEETS_BUFFER_MAX_ROWS, SHEETS_BUFFER_MAX_DELAY, SHEETS_SPILL_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class RowWriteBuffer:
+    """追記行を溜めてまとめて書き込むバッファ"""
+
+    def __init__(self, flush_func: Callable[[List[List[Any]], List[Any]], Any],
+                 max_rows: int = SHEETS_BUFFER_MAX_ROWS,
+                 max_delay: float = SHEETS_BUFFER_MAX_DELAY,
+                 spill_path: Optional[str] = SHEETS_SPILL_PATH):
+        """
+        初期化
+
+        Args:
+            flush_func: 溜まった行と各行のキーを受け取り、まとめて書き込む関数
+            max_rows: この行数に達したら書き込む
+            max_delay: 最初の行を受け付けてからこの秒数で書き込む
+            spill_path: 未書き込み行の退避ファイル（Noneなら退避しない）
+        """
+        self.flush_func = flush_func
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.spill_path = Path(spill_path) if spill_path else None
+
+        self._rows: List[List[Any]] = []
+        self._keys: List[Any] = []
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+
+        self._recover()
+        atexit.register(self.close)
+
+    def _recover(self):
+        """前回書き込めなかった行を退避ファイルから復元"""
+        if not self.spill_path or not self.spill_path.exists():
+            return
+
+        with open(self.spill_path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    self._rows.append(entry['row'])
+                    self._keys.append(entry.get('key'))
+
+        if self._rows:
+            logger.info("未書き込みの行 %s 件を復元", len(self._rows))
+            self._schedule_flush()
+
+    def enqueue(self, row: List[Any], key: Any = None):
+        """
+        行を追加
+
+        Args:
+            row: 追記する行データ
+            key: 書き込み後に行を特定するためのキー（flush_funcへ渡す）
+        """
+        with self._lock:
+            self._spill(row, key)
+            self._rows.append(row)
+            self._keys.append(key)
+
+            if len(self._rows) >= self.max_rows:
+                self.flush()
+            else:
+                self._schedule_flush()
+
+    def _spill(self, row: List[Any], key: Any):
+        """書き込み前の行を退避ファイルへ追記"""
+        if not self.spill_path:
+            return
+
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'row': row, 'key': key}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _schedule_flush(self):
+        """時間経過での書き込みを予約"""
+        if self._timer is None:
+            self._timer = threading.Timer(self.max_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        """
+        溜まった行をまとめて書き込む
+
+        Returns:
+            書き込み成功可否（失敗時は行を保持して次回に再試行）
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            if not self._rows:
+                return True
+
+            rows = list(self._rows)
+            keys = list(self._keys)
+
+            try:
+                self.flush_func(rows, keys)
+            except Exception as e:
+                logger.error("まとめ書き込みエラー（%s行を保持）: %s", len(rows), e)
+                return False
+
+            self._rows.clear()
+            self._keys.clear()
+            if self.spill_path and self.spill_path.exists():
+                self.spill_path.unlink()
+
+            logger.info("%s行をまとめて書き込み", len(rows))
+            return True
+
+    @property
+    def pending(self) -> int:
+        """未書き込みの行数"""
+        with self._lock:
+            return len(self._rows)
+
+    def close(self):
+        """残っている行を書き込んで終了"""
+        self.flush()
@@ -0,0 +1,379 @@
+"""
+予想・結果ジョブ
+main.py の1回実行と常駐デーモンの両方から使う
+"""
+
+import logging
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional
+
+from config.settings import PIPELINE_NOTIFY_WORKERS, PIPELINE_RECORD_WORKERS
+from src.data.dedup_store import DedupStore
+from src.data.models import Bet, Race
+from src.pipeline import Stage
+from src.checkpoint import RunCheckpoint, STAGE_SCRAPE, STAGE_SELECT, STAGE_NOTIFY, STAGE_RECORD
+from src.utils import metrics
+from src.utils.log import log_context
+from src.utils.profiling import StageProfiler
+
+logger = logging.getLogger(__name__)
+
+
+class JobContext:
+    """
+    ジョブ間で使い回すクライアント（HTTPセッション・LINE・スプレッドシート）
+
+    各クライアントは初回参照時にモジュールごと読み込むため、
+    使わないクライアントの依存ライブラリ・認証情報は不要
+    """
+
+    def __init__(self, source=None, spreadsheet=None, notifier=None, dedup: Optional[DedupStore] = None):
+        """
+        初期化
+
+        Args:
+            source: スクレイパーの取得元（例: SyntheticRaceSource、省略時は公式サイト）
+            spreadsheet: 記録（省略時は本番のローカルストアとスプレッドシート）
+            notifier: LINE通知（省略時は設定のエンドポイント）
+            dedup: 重複防止ストア（省略時は本番のストア）
+        """
+        self.source = source
+        self._scraper = None
+        self._bet_selector = None
+        self._notifier = notifier
+        self._spreadsheet = spreadsheet
+        self._dedup = dedup
+
+    @property
+    def scraper(self):
+        """レース情報スクレイパー"""
+        if self._scraper is None:
+            from src.scraping.race_scraper import RaceScraper
+            self._scraper = RaceScraper(source=self.source)
+        return self._scraper
+
+    @property
+    def bet_selector(self):
+        """買い目選定"""
+        if self._bet_selector is None:
+            from src.prediction.bet_selector import BetSelector
+            self._bet_selector = BetSelector()
+        return self._bet_selector
+
+    @property
+    def notifier(self):
+        """LINE通知"""
+        if self._notifier is None:
+            from src.notification.line_notifier import LineNotifier
+            self._notifier = LineNotifier()
+        return self._notifier
+
+    @property
+    def spreadsheet(self):
+        """記録（ローカルストアとスプレッドシート）"""
+        if self._spreadsheet is None:
+            from src.data.spreadsheet_manager import SpreadsheetManager
+            self._spreadsheet = SpreadsheetManager()
+        return self._spreadsheet
+
+    @property
+    def dedup(self) -> DedupStore:
+        """通知・記録の重複防止ストア"""
+        if self._dedup is None:
+            self._dedup = DedupStore()
+        return self._dedup
+
+    def close(self):
+        """未反映の記録を書き込んで終了（作成したクライアントのみ）"""
+        if self._spreadsheet is not None:
+            self._spreadsheet.close()
+        if self._dedup is not None:
+            self._dedup.close()
+
+
+def run_prediction_job(context: JobContext, target_date: Optional[str] = None,
+                       checkpoint: Optional[RunCheckpoint] = None,
+                       profiler: Optional[StageProfiler] = None,
+                       processes: Optional[int] = None) -> List[Bet]:
+    """
+    高配当レースを抽出して買い目を選定し、LINE通知・記録を行う
+
+    取得できたレースから順に買い目を選定し、通知と記録はそれぞれのワーカープールで並行して行う。
+    チェックポイントがあるときに取得・選定が途中で失敗した場合は、選定できた分を通知・記録してから
+    例外を送出する（実行は完了にせず再開できる状態で残す）
+
+    Args:
+        context: ジョブのクライアント
+        target_date: 対象日付 (YYYY-MM-DD形式、省略時は明日)
+        checkpoint: 実行のチェックポイント（再開時は終わった段・項目を飛ばす）
+        profiler: 段ごとのプロファイラー（--profile 指定時）
+        processes: 指定すると会場ごとに分けてこの数のワーカープロセスで取得・選定する
+
+    Returns:
+        選定した買い目のリスト
+    """
+    if checkpoint is not None:
+        # 再開時は最初の実行と同じ日付を対象にする（日付が変わってから再開しても変わらないよう保存する）
+        if 'target_date' not in checkpoint.params:
+            checkpoint.set_param(
+                'target_date', target_date or (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+            )
+        target_date = checkpoint.params['target_date']
+
+    with metrics.run('prediction', run_id=checkpoint.run_id if checkpoint else None):
+        notify_stage = Stage('予想通知', _profiled(profiler, STAGE_NOTIFY,
+                                                lambda bet: _notify_prediction(context, bet, checkpoint)),
+                             PIPELINE_NOTIFY_WORKERS)
+        record_stage = Stage('予想記録', _profiled(profiler, STAGE_RECORD,
+                                                lambda bet: _record_prediction(context, bet, checkpoint)),
+                             PIPELINE_RECORD_WORKERS)
+
+        # 高配当レースの抽出と買い目選定（選定できた買い目から通知・記録を始める）
+        selected_bets = []
+        selection_error = None
+        try:
+            for bet in _iter_selected_bets(context, target_date, checkpoint, profiler, processes):
+                selected_bets.append(bet)
+                notify_stage.submit(bet)
+                record_stage.submit(bet)
+            if profiler is not None:
+                profiler.snapshot(f"{STAGE_SCRAPE}+{STAGE_SELECT}")
+        except Exception as e:
+            # 選定できた分の通知・記録は終えてから、再開できる状態で止める
+            logger.error("レース取得・買い目選定が途中で失敗しました: %s", e)
+            selection_error = e
+        finally:
+            notify_stage.join()
+            record_stage.join()
+        if profiler is not None:
+            profiler.snapshot(f"{STAGE_NOTIFY}+{STAGE_RECORD}")
+
+        logger.info("買い目%s件を選定", len(selected_bets))
+
+        # 当日分の記録をまとめて書き込む
+        with metrics.span('sheets_flush'):
+            context.spreadsheet.flush()
+
+        if checkpoint is not None:
+            # 選定が途中で止まった場合は、通知・記録も残りの買い目があるため完了にしない
+            if selection_error is None and not notify_stage.failed:
+                checkpoint.mark_stage_done(STAGE_NOTIFY)
+            if selection_error is None and not record_stage.failed:
+                checkpoint.mark_stage_done(STAGE_RECORD)
+            if checkpoint.is_stage_done(STAGE_NOTIFY) and checkpoint.is_stage_done(STAGE_RECORD):
+                checkpoint.complete()
+            else:
+                logger.warning("失敗した処理があります。--resume %s で再開できます", checkpoint.run_id)
+        if selection_error is not None:
+            raise selection_error
+        return selected_bets
+
+
+def _profiled(profiler: Optional[StageProfiler], stage: str, func):
+    """プロファイラーがあれば関数をその段として計測する"""
+    return profiler.wrap(stage, func) if profiler is not None else func
+
+
+def _profiled_iter(profiler: Optional[StageProfiler], stage: str, items: Iterable) -> Iterable:
+    """プロファイラーがあればイテレーターをその段として計測する"""
+    return profiler.wrap_iter(stage, items) if profiler is not None else items
+
+
+def _iter_selected_bets(context: JobContext, target_date: Optional[str],
+                        checkpoint: Optional[RunCheckpoint],
+                        profiler: Optional[StageProfiler] = None,
+                        processes: Optional[int] = None) -> Iterator[Bet]:
+    """高配当レースを取得して買い目を選定（チェックポイントがあれば終わった段の結果を使う）"""
+    if processes and (checkpoint is None or not checkpoint.is_stage_done(STAGE_SELECT)):
+        # 取得・選定はワーカープロセスで行い、まとめた買い目だけを受け取る
+        from src.scheduling.shards import ShardCoordinator
+
+        coordinator = ShardCoordinator(processes, scraper=context.scraper)
+        bets = coordinator.run(
+            target_date or (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'),
+            batch=checkpoint.run_id if checkpoint else None
+        )
+        if checkpoint is None:
+            yield from bets
+        else:
+            checkpoint.reset_stage(STAGE_SELECT)
+            yield from checkpoint.record_stream(STAGE_SELECT, iter(bets))
+        return
+
+    if checkpoint is None:
+        races = _profiled_iter(profiler, STAGE_SCRAPE, context.scraper.iter_high_odds_races(target_date))
+        yield from _profiled_iter(profiler, STAGE_SELECT, context.bet_selector.iter_bets(races))
+        return
+
+    if checkpoint.is_stage_done(STAGE_SELECT):
+        bets = checkpoint.load(STAGE_SELECT)
+        logger.info("選定済みの買い目%s件を使用", len(bets))
+        yield from (Bet.from_dict(bet) for bet in bets)
+        return
+
+    if checkpoint.is_stage_done(STAGE_SCRAPE):
+        races = checkpoint.load(STAGE_SCRAPE)
+        logger.info("取得済みのレース%s件を使用", len(races))
+        races = (Race.from_dict(race) for race in races)
+    else:
+        # 取得エラーは送出して段を完了にしない（ログだけ残して打ち切ると、取得できた分で完了扱いになる）
+        checkpoint.reset_stage(STAGE_SCRAPE)
+        races = _profiled_iter(profiler, STAGE_SCRAPE, checkpoint.record_stream(
+            STAGE_SCRAPE, context.scraper.iter_high_odds_races(target_date, raise_errors=True)
+        ))
+
+    checkpoint.reset_stage(STAGE_SELECT)
+    yield from _profiled_iter(profiler, STAGE_SELECT, checkpoint.record_stream(
+        STAGE_SELECT, context.bet_selector.iter_bets(races, raise_errors=True)
+    ))
+
+
+def _notify_prediction(context: JobContext, bet: Bet, checkpoint: Optional[RunCheckpoint] = None) -> bool:
+    """予想を通知（再実行時は通知済みの買い目をスキップ）"""
+    race = bet.race_info
+    key = DedupStore.make_key(race, bet)
+    if checkpoint is not None and checkpoint.has_key(STAGE_NOTIFY, key):
+        return True
+    with log_context(race_id=race.race_id):
+        if context.dedup.is_notified(key):
+            logger.info("通知済みのためスキップ: %s", race.race_name)
+        elif context.notifier.send_prediction(race, bet, delivery_key=':'.join(map(str, key))):
+            context.dedup.mark_notified(key)
+        else:
+            return False
+    if checkpoint is not None:
+        checkpoint.append(STAGE_NOTIFY, {'key': list(key)})
+    return True
+
+
+def _record_prediction(context: JobContext, bet: Bet, checkpoint: Optional[RunCheckpoint] = None) -> bool:
+    """予想を記録（再実行時は記録済みの買い目をスキップ）"""
+    race = bet.race_info
+    key = DedupStore.make_key(race, bet)
+    if checkpoint is not None and checkpoint.has_key(STAGE_RECORD, key):
+        return True
+    with log_context(race_id=race.race_id):
+        if context.dedup.is_recorded(key):
+            logger.info("記録済みのためスキップ: %s", race.race_name)
+        elif context.spreadsheet.record_prediction(race, bet):
+            context.dedup.mark_recorded(key)
+        else:
+            return False
+    if checkpoint is not None:
+        checkpoint.append(STAGE_RECORD, {'key': list(key)})
+    return True
+
+
+def run_result_job(context: JobContext, races: Optional[List[Race]] = None, notify: bool = True) -> int:
+    """
+    結果未記録のレースの結果を取得して記録し、LINEで通知する
+
+    Args:
+        context: ジョブのクライアント
+        races: 対象レース（省略時は今日までの結果未記録のレースすべて）
+        notify: 結果をLINEで通知するか
+
+    Returns:
+        結果を記録したレース数
+    """
+    with metrics.run('result'):
+        return _settle_results(context, races, notify)
+
+
+def _settle_results(context: JobContext, races: Optional[List[Race]], notify: bool) -> int:
+    """結果未記録のレースの結果を取得して記録"""
+    # 記録済みのレースは除く（レースごとのタイマーと定時ジョブの重複通知を防ぐ）
+    unsettled = context.spreadsheet.get_unsettled_races()
+    if races is not None:
+        targets = {(race.race_date, race.venue, int(race.race_number)) for race in races}
+        unsettled = [
+            race for race in unsettled
+            if (race.race_date, race.venue, int(race.race_number)) in targets
+        ]
+    races = unsettled
+
+    completed = []
+    for race in races:
+        with log_context(race_id=race.race_id):
+            result = context.scraper.get_race_results(race.race_url)
+            if not result or result.race_status != 'completed':
+                logger.info("結果未確定のため後で再取得: %s", race.race_name)
+                continue
+            completed.append((race, result))
+
+    # 確定した結果はまとめて記録し、スプレッドシートへは1回で反映する
+    settled = context.spreadsheet.settle_results(completed) if completed else []
+    if notify:
+        for race, result in settled:
+            with log_context(race_id=race.race_id):
+                context.notifier.send_result(race, result)
+
+    logger.info("結果記録: %s/%sレース", len(settled), len(races))
+    return len(settled)
+
+
+def run_backfill_job(context: JobContext, start_date: str, end_date: str,
+                     max_workers: Optional[int] = None,
+                     profiler: Optional[StageProfiler] = None) -> int:
+    """
+    期間内の各日について買い目を選定して記録し、確定済みの結果を取り込む（LINE通知はしない）
+
+    レースの取得は日ごとに並列で行い、取得できた日から選定・記録する。
+    取得に失敗した日は最後に1回だけ取り直し、それでも取得できなければ記録と精算を終えてから例外を送出する
+
+    Args:
+        context: ジョブのクライアント
+        start_date: 開始日 (YYYY-MM-DD形式)
+        end_date: 終了日 (YYYY-MM-DD形式、この日を含む)
+        max_workers: 同時に取得する日数（省略時は設定値）
+        profiler: 段ごとのプロファイラー（--profile 指定時、メモリは1日ごとに記録）
+
+    Returns:
+        記録した買い目数
+    """
+    # 各日の取得はワーカースレッドで行うため、取得処理そのものを計測対象にする
+    scrape_profile = (
+        profiler.instrument(context.scraper, 'get_high_odds_races', STAGE_SCRAPE)
+        if profiler is not None else nullcontext()
+    )
+    record = _profiled(profiler, STAGE_RECORD, lambda bet: _record_prediction(context, bet))
+
+    with metrics.run('backfill'), scrape_profile:
+        recorded = 0
+        failed_days = []
+        days = context.scraper.iter_high_odds_races_range(start_date, end_date, max_workers=max_workers)
+        for day, races in days:
+            if races is None:
+                # 取得に失敗した日は0件の日として扱わず、最後に取り直す
+                failed_days.append(day)
+                continue
+            recorded += _record_day_bets(context, races, record, profiler)
+            if profiler is not None:
+                profiler.snapshot(day)
+
+        missing_days = []
+        for day in sorted(failed_days):
+            try:
+                races = context.scraper.get_high_odds_races(day, raise_errors=True)
+            except Exception:
+                missing_days.append(day)
+                continue
+            recorded += _record_day_bets(context, races, record, profiler)
+
+        context.spreadsheet.flush()
+        logger.info("%s〜%s の買い目%s件を記録", start_date, end_date, recorded)
+
+        _settle_results(context, None, notify=False)
+        if missing_days:
+            raise RuntimeError(f"レースを取得できなかった日があります（再実行してください）: {', '.join(missing_days)}")
+        return recorded
+
+
+def _record_day_bets(context: JobContext, races: List[Race], record, profiler: Optional[StageProfiler]) -> int:
+    """1日分のレースから買い目を選定して記録し、記録した件数を返す"""
+    recorded = 0
+    for bet in _profiled_iter(profiler, STAGE_SELECT, context.bet_selector.iter_bets(races)):
+        if record(bet):
+            recorded += 1
+    return recorded
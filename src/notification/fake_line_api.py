@@ -0,0 +1,234 @@
+"""
+LINE Messaging API の代替サーバー
+負荷試験・障害試験用に、通知で使うエンドポイントをローカルで再現
+"""
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+MULTICAST_RECIPIENT_LIMIT = 500
+
+
+class FakeLineApiServer:
+    """LINE Messaging APIの代替サーバー"""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 500, rate_limit: Optional[int] = None,
+                 follower_count: int = 100, monthly_quota: int = 1000,
+                 seed: Optional[int] = None, error_after_accept: bool = False):
+        """
+        初期化
+
+        Args:
+            latency: 1リクエストあたりの応答遅延（秒）
+            error_rate: エラー応答を返す確率（0.0-1.0）
+            error_status: エラー応答のステータスコード
+            rate_limit: 1秒あたりの許容リクエスト数（超過分は429）
+            follower_count: ブロードキャストの配信数として数えるフォロワー数
+            monthly_quota: 月間メッセージ上限
+            seed: エラー注入の乱数シード
+            error_after_accept: エラーを受け付けた後に返すか（配信は済んで応答だけが失われる障害の再現）
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit = rate_limit
+        self.follower_count = follower_count
+        self.monthly_quota = monthly_quota
+        self.error_after_accept = error_after_accept
+
+        self.received: List[Dict] = []
+        self.total_usage = 0
+
+        self._random = random.Random(seed)
+        self._request_times = deque()
+        # 受け付けたリトライキーとそのリクエストID
+        self._accepted_retry_keys: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self.endpoint: Optional[str] = None
+
+    def create_app(self) -> web.Application:
+        """aiohttpアプリケーションを作成"""
+        app = web.Application(middlewares=[self._fault_middleware])
+        app.router.add_post('/v2/bot/message/broadcast', self.handle_broadcast)
+        app.router.add_post('/v2/bot/message/multicast', self.handle_multicast)
+        app.router.add_post('/v2/bot/message/push', self.handle_push)
+        app.router.add_get('/v2/bot/info', self.handle_bot_info)
+        app.router.add_get('/v2/bot/message/quota', self.handle_quota)
+        app.router.add_get('/v2/bot/message/quota/consumption', self.handle_consumption)
+        return app
+
+    @web.middleware
+    async def _fault_middleware(self, request: web.Request, handler):
+        """認証・遅延・レート制限・エラー注入を適用し、受信内容を記録"""
+        body = await request.text()
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'body': json.loads(body) if body else None,
+            'received_at': time.time(),
+        }
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if not request.headers.get('Authorization', '').startswith('Bearer '):
+            response = self._error_response(401, 'Authentication failed')
+        elif self._is_rate_limited():
+            response = self._error_response(429, 'The API rate limit has been exceeded. Try again later.')
+        elif self.error_rate and self._random.random() < self.error_rate:
+            if self.error_after_accept:
+                await handler(request)
+            response = self._error_response(self.error_status, 'Injected error')
+        else:
+            response = await handler(request)
+
+        request_id = request.get('request_id', uuid.uuid4().hex)
+        response.headers['X-Line-Request-Id'] = request_id
+        record['status'] = response.status
+        with self._lock:
+            self.received.append(record)
+        return response
+
+    def _is_rate_limited(self) -> bool:
+        """直近1秒のリクエスト数が上限を超えているか判定"""
+        if not self.rate_limit:
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            while self._request_times and now - self._request_times[0] >= 1.0:
+                self._request_times.popleft()
+            if len(self._request_times) >= self.rate_limit:
+                return True
+            self._request_times.append(now)
+        return False
+
+    @staticmethod
+    def _error_response(status: int, message: str) -> web.Response:
+        return web.json_response({'message': message}, status=status)
+
+    def _consume(self, recipients: int, messages: List) -> Optional[web.Response]:
+        """配信数を加算（上限超過時はエラー応答を返す）"""
+        count = recipients * len(messages)
+        with self._lock:
+            if self.total_usage + count > self.monthly_quota:
+                return self._error_response(429, 'You have reached your monthly limit.')
+            self.total_usage += count
+        return None
+
+    async def handle_broadcast(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        error = self._consume(self.follower_count, data.get('messages', []))
+        return error or web.json_response({})
+
+    async def handle_multicast(self, request: web.Request) -> web.Response:
+        retry_key = request.headers.get('X-Line-Retry-Key')
+        with self._lock:
+            accepted_request_id = self._accepted_retry_keys.get(retry_key) if retry_key else None
+        if accepted_request_id:
+            response = self._error_response(409, 'The retry key is already accepted')
+            response.headers['X-Line-Accepted-Request-Id'] = accepted_request_id
+            return response
+
+        data = await request.json()
+        to = data.get('to', [])
+        if not to or len(to) > MULTICAST_RECIPIENT_LIMIT:
+            return self._error_response(400, 'The request body has 1 error(s)')
+        error = self._consume(len(to), data.get('messages', []))
+        if error:
+            return error
+        if retry_key:
+            request['request_id'] = uuid.uuid4().hex
+            with self._lock:
+                self._accepted_retry_keys[retry_key] = request['request_id']
+        return web.json_response({})
+
+    async def handle_push(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        if not data.get('to'):
+            return self._error_response(400, 'The request body has 1 error(s)')
+        error = self._consume(1, data.get('messages', []))
+        return error or web.json_response({})
+
+    async def handle_bot_info(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            'userId': 'Ufakebot',
+            'basicId': '@fakebot',
+            'displayName': 'ちょいアツ艇報（ローカル）',
+            'chatMode': 'bot',
+            'markAsReadMode': 'auto',
+        })
+
+    async def handle_quota(self, request: web.Request) -> web.Response:
+        return web.json_response({'type': 'limited', 'value': self.monthly_quota})
+
+    async def handle_consumption(self, request: web.Request) -> web.Response:
+        return web.json_response({'totalUsage': self.total_usage})
+
+    def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """
+        別スレッドでサーバーを起動
+
+        Args:
+            host: 待ち受けホスト
+            port: 待ち受けポート（0なら空きポート）
+
+        Returns:
+            LineBotApiに渡すエンドポイントURL
+        """
+        self._thread = threading.Thread(target=self._serve, args=(host, port), daemon=True)
+        self._thread.start()
+        self._started.wait()
+        logger.info("LINE API代替サーバー起動: %s", self.endpoint)
+        return self.endpoint
+
+    def _serve(self, host: str, port: int):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+
+        self._runner = web.AppRunner(self.create_app())
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, host, port)
+        self._loop.run_until_complete(site.start())
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.endpoint = f"http://{host}:{bound_port}"
+        self._started.set()
+
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._runner.cleanup())
+        self._loop.close()
+
+    def stop(self):
+        """サーバーを停止"""
+        if self._loop and self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            logger.info("LINE API代替サーバー停止")
+
+    def requests_for(self, path: str) -> List[Dict]:
+        """指定パスで受信したリクエストを取得"""
+        with self._lock:
+            return [record for record in self.received if record['path'] == path]
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
@@ -8,6 +8,9 @@ import logging
 from typing import Dict, List, Optional
 from datetime import datetime
 import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from linebot import LineBotApi, WebhookHandler
 from linebot.exceptions import InvalidSignatureError, LineBotApiError
@@ -17,76 +20,134 @@ from linebot.models import (
     URIAction, MessageAction
 )
 
-from config.settings import LINE_CHANNEL_ACCESS_TOKEN, LINE_CHANNEL_SECRET
+from config.settings import (
+    LINE_CHANNEL_ACCESS_TOKEN, LINE_CHANNEL_SECRET, LINE_API_ENDPOINT,
+    LINE_API_MAX_RETRIES, LINE_API_RETRY_BACKOFF,
+    MULTICAST_MAX_RECIPIENTS, MULTICAST_MAX_WORKERS
+)
+from src.data.subscriber_store import SubscriberStore, TIER_FREE, TIER_PREMIUM
+from src.data.models import Race, Bet, Result
+from src.utils import metrics
 
 logger = logging.getLogger(__name__)
 
+# 配信セグメントと対象ティアの対応
+AUDIENCE_SEGMENTS = {
+    'premium': [TIER_PREMIUM],
+    'free': [TIER_FREE],
+    'followers': [TIER_FREE, TIER_PREMIUM],
+}
+
 class LineNotifier:
     """LINE通知を管理するクラス"""
     
-    def __init__(self):
-        if not LINE_CHANNEL_ACCESS_TOKEN or LINE_CHANNEL_ACCESS_TOKEN == 'your_line_channel_access_token_here':
+    def __init__(self, subscriber_store: Optional[SubscriberStore] = None,
+                 endpoint: Optional[str] = None,
+                 channel_access_token: Optional[str] = None):
+        """
+        初期化
+        
+        Args:
+            subscriber_store: 購読者ストア（セグメント配信で使用）
+            endpoint: LINE APIのエンドポイント（代替サーバーでの試験用）
+            channel_access_token: チャンネルアクセストークン（省略時は設定値）
+        """
+        access_token = channel_access_token or LINE_CHANNEL_ACCESS_TOKEN
+        if not access_token or access_token == 'your_line_channel_access_token_here':
             raise ValueError("LINE_CHANNEL_ACCESS_TOKENが設定されていません")
         
-        self.line_bot_api = LineBotApi(LINE_CHANNEL_ACCESS_TOKEN)
-        self.handler = WebhookHandler(LINE_CHANNEL_SECRET)
+        self.line_bot_api = LineBotApi(access_token, endpoint=endpoint or LINE_API_ENDPOINT)
+        # Webhook受信（WebhookServer）で共有するハンドラー
+        self.handler = WebhookHandler(LINE_CHANNEL_SECRET) if LINE_CHANNEL_SECRET else None
+        
+        # セグメント配信を使うまで購読者ストアは開かない
+        self._subscriber_store = subscriber_store
+        self.multicast_workers = MULTICAST_MAX_WORKERS
         
         logger.info("LINE Bot API初期化完了")
     
-    def send_prediction(self, race_data: Dict, bet_data: Optional[Dict] = None) -> bool:
+    @property
+    def subscriber_store(self) -> SubscriberStore:
+        """購読者ストア"""
+        if self._subscriber_store is None:
+            self._subscriber_store = SubscriberStore()
+        return self._subscriber_store
+    
+    def send_prediction(self, race_data: Race, bet_data: Optional[Bet] = None,
+                        audience: Optional[str] = None, delivery_key: Optional[str] = None) -> bool:
         """
         予想通知を送信
         
         Args:
-            race_data: レース情報
-            bet_data: 買い目情報
+            race_data: レース情報（辞書も可）
+            bet_data: 買い目情報（辞書も可）
+            audience: 配信セグメント（省略時は買い目の指定、なければ全フォロワーへブロードキャスト）
+            delivery_key: 配信の識別子（指定すると、途中で失敗した配信の再実行時は未送信の宛先にだけ送る）
             
         Returns:
             送信成功可否
         """
         try:
+            race = Race.from_dict(race_data)
+            bet = Bet.from_dict(bet_data)
+            
             # 予想メッセージを作成
-            message = self._create_prediction_message(race_data, bet_data)
+            message = self._create_prediction_message(race, bet)
             
-            # ブロードキャスト送信（全フォロワーに送信）
-            self.line_bot_api.broadcast(message)
+            if audience is None and bet:
+                audience = bet.audience
+            
+            if not self._deliver(message, audience, delivery_key):
+                metrics.incr('line_messages_total', kind='prediction', status='failed')
+                return False
             
-            logger.info(f"予想通知送信成功: {race_data.get('race_name')}")
+            metrics.incr('line_messages_total', kind='prediction', status='sent')
+            logger.info("予想通知送信成功: %s", race.race_name)
             return True
             
         except LineBotApiError as e:
-            logger.error(f"LINE API エラー: {e}")
+            metrics.incr('line_messages_total', kind='prediction', status='failed')
+            logger.error("LINE API エラー: %s", e)
             return False
         except Exception as e:
-            logger.error(f"予想通知送信エラー: {e}")
+            metrics.incr('line_messages_total', kind='prediction', status='failed')
+            logger.error("予想通知送信エラー: %s", e)
             return False
     
-    def send_result(self, race_data: Dict, result_data: Dict) -> bool:
+    def send_result(self, race_data: Race, result_data: Result,
+                    audience: Optional[str] = None) -> bool:
         """
         結果通知を送信
         
         Args:
-            race_data: レース情報
-            result_data: 結果情報
+            race_data: レース情報（辞書も可）
+            result_data: 結果情報（辞書も可）
+            audience: 配信セグメント（省略時は全フォロワーへブロードキャスト）
             
         Returns:
             送信成功可否
         """
         try:
+            race = Race.from_dict(race_data)
+            
             # 結果メッセージを作成
-            message = self._create_result_message(race_data, result_data)
+            message = self._create_result_message(race, Result.from_dict(result_data))
             
-            # ブロードキャスト送信
-            self.line_bot_api.broadcast(message)
+            if not self._deliver(message, audience):
+                metrics.incr('line_messages_total', kind='result', status='failed')
+                return False
             
-            logger.info(f"結果通知送信成功: {race_data.get('race_name')}")
+            metrics.incr('line_messages_total', kind='result', status='sent')
+            logger.info("結果通知送信成功: %s", race.race_name)
             return True
             
         except LineBotApiError as e:
-            logger.error(f"LINE API エラー: {e}")
+            metrics.incr('line_messages_total', kind='result', status='failed')
+            logger.error("LINE API エラー: %s", e)
             return False
         except Exception as e:
-            logger.error(f"結果通知送信エラー: {e}")
+            metrics.incr('line_messages_total', kind='result', status='failed')
+            logger.error("結果通知送信エラー: %s", e)
             return False
     
     def send_test_message(self, message_text: str = "テスト通知") -> bool:
@@ -107,23 +168,137 @@ class LineNotifier:
             return True
             
         except LineBotApiError as e:
-            logger.error(f"テスト通知エラー: {e}")
+            logger.error("テスト通知エラー: %s", e)
             return False
         except Exception as e:
-            logger.error(f"テスト通知エラー: {e}")
+            logger.error("テスト通知エラー: %s", e)
             return False
     
-    def _create_prediction_message(self, race_data: Dict, bet_data: Optional[Dict]) -> FlexSendMessage:
+    def _deliver(self, message, audience: Optional[str], delivery_key: Optional[str] = None) -> bool:
+        """
+        メッセージを配信セグメントへ送信
+        
+        Args:
+            message: 送信メッセージ
+            audience: 配信セグメント（Noneならブロードキャスト）
+            delivery_key: 配信の識別子（失敗した宛先を記録し、次回はその宛先にだけ送る）
+            
+        Returns:
+            全宛先への送信成功可否
+        """
+        if audience is None:
+            # ブロードキャスト送信（全フォロワーに送信）
+            with metrics.span('line_api', method='broadcast'):
+                self.line_bot_api.broadcast(message)
+            return True
+        
+        tiers = AUDIENCE_SEGMENTS.get(audience)
+        if tiers is None:
+            raise ValueError(f"不明な配信セグメントです: {audience}")
+        
+        user_ids = self.subscriber_store.get_user_ids(tiers)
+        if delivery_key is not None:
+            pending = self.subscriber_store.get_pending_recipients(delivery_key)
+            if pending is not None:
+                # 前回送信できたバッチの宛先には送り直さない（ブロックしたユーザーは除く）
+                following = set(user_ids)
+                user_ids = [user_id for user_id in pending if user_id in following]
+                logger.info("未送信の宛先にだけ再送: %s人", len(user_ids))
+        if not user_ids:
+            logger.info("配信対象のユーザーがいません: %s", audience)
+            if delivery_key is not None:
+                self.subscriber_store.set_pending_recipients(delivery_key, [])
+            return True
+        
+        failed_user_ids = self._multicast(user_ids, message)
+        if delivery_key is not None:
+            self.subscriber_store.set_pending_recipients(delivery_key, failed_user_ids)
+        return not failed_user_ids
+    
+    def _multicast(self, user_ids: List[str], message) -> List[str]:
+        """
+        ユーザーIDを上限件数ごとに分割して並列にマルチキャスト送信
+        
+        Args:
+            user_ids: 宛先ユーザーIDのリスト
+            message: 送信メッセージ
+            
+        Returns:
+            送信に失敗したバッチの宛先ユーザーID（全バッチ成功なら空）
+        """
+        batches = [
+            user_ids[i:i + MULTICAST_MAX_RECIPIENTS]
+            for i in range(0, len(user_ids), MULTICAST_MAX_RECIPIENTS)
+        ]
+        
+        failed_user_ids = []
+        failed = 0
+        with ThreadPoolExecutor(max_workers=min(self.multicast_workers, len(batches))) as executor:
+            futures = {
+                executor.submit(self._multicast_batch, batch, message): batch
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                if not future.result():
+                    failed += 1
+                    failed_user_ids.extend(futures[future])
+        
+        logger.info("マルチキャスト送信: %s人 / %sバッチ（失敗 %s）", len(user_ids), len(batches), failed)
+        return failed_user_ids
+    
+    def _multicast_batch(self, user_ids: List[str], message) -> bool:
+        """
+        1バッチ分のマルチキャストを送信（429・5xxはバックオフして再送）
+
+        5xxでも受け付け済みの場合があるため、バッチごとのリトライキーを毎回送り、
+        同じキーで受け付け済み（409）の応答は送信済みとして扱う
+        
+        Args:
+            user_ids: 宛先ユーザーID（上限件数以内）
+            message: 送信メッセージ
+            
+        Returns:
+            送信成功可否
+        """
+        retry_key = str(uuid.uuid4())
+        for attempt in range(LINE_API_MAX_RETRIES + 1):
+            try:
+                with metrics.span('line_api', method='multicast'):
+                    self.line_bot_api.multicast(user_ids, message, retry_key=retry_key)
+                metrics.incr('line_recipients_total', len(user_ids))
+                return True
+                
+            except LineBotApiError as e:
+                if e.status_code == 409:
+                    # 前回の送信が届いていた（リトライキーはバッチごとに作るため、409は同じバッチの受け付け済み）
+                    logger.info("マルチキャストは受け付け済みのため再送しません: %s", e.accepted_request_id)
+                    metrics.incr('line_recipients_total', len(user_ids))
+                    return True
+                retryable = e.status_code == 429 or e.status_code >= 500
+                if not retryable or attempt == LINE_API_MAX_RETRIES:
+                    logger.error("マルチキャスト送信エラー: %s", e)
+                    return False
+                logger.warning("マルチキャスト再送 (%s/%s): %s", attempt + 1, LINE_API_MAX_RETRIES, e.status_code)
+                metrics.incr('line_retries_total')
+                time.sleep(LINE_API_RETRY_BACKOFF * (2 ** attempt))
+                
+            except Exception as e:
+                logger.error("マルチキャスト送信エラー: %s", e)
+                return False
+        
+        return False
+    
+    def _create_prediction_message(self, race: Race, bet: Optional[Bet]) -> FlexSendMessage:
         """予想通知のメッセージを作成"""
         
         # 絵文字とカジュアルな文言
         emojis = ["🚤", "💰", "🔥", "⚡", "🎯"]
         
-        race_name = race_data.get('race_name', '')
-        race_time = race_data.get('race_time', '')
-        expected_odds = race_data.get('expected_odds', 0)
-        race_url = race_data.get('race_url', '')
-        bet_combination = bet_data.get('combination', '') if bet_data else ''
+        race_name = race.race_name
+        race_time = race.race_time
+        expected_odds = race.expected_odds
+        race_url = race.race_url
+        bet_combination = bet.combination if bet else ''
         
         # タイトル文言
         title = f"🚤 ちょいアツ予想 {emojis[len(race_name) % len(emojis)]}"
@@ -174,16 +349,14 @@ class LineNotifier:
         
         return FlexSendMessage(alt_text=f"予想通知: {race_name}", contents=bubble)
     
-    def _create_result_message(self, race_data: Dict, result_data: Dict) -> FlexSendMessage:
+    def _create_result_message(self, race: Race, result: Result) -> FlexSendMessage:
         """結果通知のメッセージを作成"""
         
-        race_name = race_data.get('race_name', '')
-        result_order = result_data.get('result_order', [])
-        payout = result_data.get('payout', {})
+        race_name = race.race_name
+        result_order = result.result_order
         
         # 結果判定
-        sanrentan = payout.get('3連単', {})
-        payout_amount = sanrentan.get('amount', 0)
+        payout_amount = result.payout_amount('3連単')
         is_hit = payout_amount > 0
         
         # 演出選択
@@ -258,7 +431,7 @@ class LineNotifier:
             return None  # フォロワー数は別途取得が必要
             
         except LineBotApiError as e:
-            logger.error(f"Bot情報取得エラー: {e}")
+            logger.error("Bot情報取得エラー: %s", e)
             return None
     
     def validate_connection(self) -> bool:
@@ -271,12 +444,12 @@ class LineNotifier:
         try:
             # Bot情報を取得してテスト
             bot_info = self.line_bot_api.get_bot_info()
-            logger.info(f"LINE Bot接続テスト成功: {bot_info.display_name}")
+            logger.info("LINE Bot接続テスト成功: %s", bot_info.display_name)
             return True
             
         except LineBotApiError as e:
-            logger.error(f"LINE Bot接続テストエラー: {e}")
+            logger.error("LINE Bot接続テストエラー: %s", e)
             return False
         except Exception as e:
-            logger.error(f"LINE Bot接続テストエラー: {e}")
+            logger.error("LINE Bot接続テストエラー: %s", e)
             return False
\ No newline at end of file
@@ -0,0 +1,264 @@
+"""
+LINE Webhook受信サーバー
+フォロー・ブロック・メッセージイベントを非同期で受信し、購読者ストアへ反映
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from aiohttp import web
+from linebot import WebhookHandler
+from linebot.exceptions import InvalidSignatureError
+from linebot.models import FollowEvent, UnfollowEvent, MessageEvent, TextMessage
+
+from config.settings import (
+    LINE_CHANNEL_SECRET, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH,
+    WEBHOOK_QUEUE_SIZE, WEBHOOK_BATCH_SIZE, WEBHOOK_APPLY_ATTEMPTS, WEBHOOK_SPILL_PATH, NOTE_SUBSCRIBER_CODE
+)
+from src.data.subscriber_store import (
+    SubscriberStore, EVENT_FOLLOW, EVENT_UNFOLLOW, EVENT_MESSAGE, EVENT_LINK_PREMIUM
+)
+from src.utils.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookServer:
+    """LINE Webhookを受信して購読者状態を更新するサーバー"""
+
+    def __init__(self, handler: Optional[WebhookHandler] = None,
+                 store: Optional[SubscriberStore] = None,
+                 queue_size: int = WEBHOOK_QUEUE_SIZE,
+                 batch_size: int = WEBHOOK_BATCH_SIZE,
+                 spill_path: Optional[str] = WEBHOOK_SPILL_PATH):
+        """
+        初期化
+
+        Args:
+            handler: WebhookHandler（LineNotifier.handlerを渡せば共有）
+            store: 購読者ストア
+            queue_size: 未処理リクエストの上限
+            batch_size: 1回のDB反映でまとめるリクエスト数
+            spill_path: DBへ反映できなかったイベントの退避ファイル（応答済みのイベントを失わないため）
+        """
+        if handler is None:
+            if not LINE_CHANNEL_SECRET:
+                raise ValueError("LINE_CHANNEL_SECRETが設定されていません")
+            handler = WebhookHandler(LINE_CHANNEL_SECRET)
+
+        self.handler = handler
+        self.store = store or SubscriberStore()
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.spill_path = Path(spill_path) if spill_path else None
+        self.queue: Optional[asyncio.Queue] = None
+        self.stats = {
+            'accepted': 0,
+            'rejected': 0,
+            'invalid_signature': 0,
+            'processed': 0,
+            'failed': 0,
+            'spilled': 0,
+        }
+
+        # ハンドラーはイベント処理スレッドで呼ばれるため、収集先をスレッドごとに分ける
+        self._local = threading.local()
+        self._consumer_task: Optional[asyncio.Task] = None
+        self._register_handlers()
+
+    def _register_handlers(self):
+        """WebhookHandlerにイベントハンドラーを登録"""
+
+        @self.handler.add(FollowEvent)
+        def handle_follow(event):
+            self._collect(event, EVENT_FOLLOW)
+
+        @self.handler.add(UnfollowEvent)
+        def handle_unfollow(event):
+            self._collect(event, EVENT_UNFOLLOW)
+
+        @self.handler.add(MessageEvent)
+        def handle_message(event):
+            self._collect(event, EVENT_MESSAGE)
+
+        @self.handler.add(MessageEvent, message=TextMessage)
+        def handle_text_message(event):
+            # note購読者が連携コードを送ってきたらプレミアム会員として登録
+            if NOTE_SUBSCRIBER_CODE and event.message.text.strip() == NOTE_SUBSCRIBER_CODE:
+                self._collect(event, EVENT_LINK_PREMIUM)
+            else:
+                self._collect(event, EVENT_MESSAGE)
+
+    def _collect(self, event, kind: str):
+        """イベントを反映待ちリストへ追加"""
+        user_id = getattr(event.source, 'user_id', None)
+        if not user_id:
+            return
+        occurred_at = datetime.fromtimestamp(event.timestamp / 1000).isoformat()
+        # 再送されたイベントを見分けるためWebhookイベントIDも渡す
+        self._local.events.append((user_id, kind, occurred_at, getattr(event, 'webhook_event_id', None)))
+
+    def create_app(self) -> web.Application:
+        """aiohttpアプリケーションを作成"""
+        app = web.Application()
+        app.router.add_post(WEBHOOK_PATH, self.handle_callback)
+        app.router.add_get('/health', self.handle_health)
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def handle_callback(self, request: web.Request) -> web.Response:
+        """
+        Webhookリクエストを受信
+
+        署名検証だけを行って即座に応答し、イベント処理はキューに回す
+        """
+        signature = request.headers.get('X-Line-Signature', '')
+        body = await request.text()
+
+        if not self.handler.parser.signature_validator.validate(body, signature):
+            self.stats['invalid_signature'] += 1
+            return web.Response(status=400, text='Invalid signature')
+
+        try:
+            self.queue.put_nowait((body, signature))
+        except asyncio.QueueFull:
+            # LINEプラットフォームの再送に任せる
+            self.stats['rejected'] += 1
+            logger.warning("Webhookキューが満杯のためリクエストを拒否")
+            return web.Response(status=503, text='Busy')
+
+        self.stats['accepted'] += 1
+        return web.Response(text='OK')
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        """稼働状況を返す"""
+        return web.json_response({
+            **self.stats,
+            'queued': self.queue.qsize() if self.queue else 0,
+        })
+
+    async def _on_startup(self, app: web.Application):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._consumer_task = asyncio.create_task(self._consume())
+        logger.info("Webhook受信サーバー起動")
+
+    async def _on_cleanup(self, app: web.Application):
+        # 受付済みのイベントを処理し切ってから停止
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=10)
+        except asyncio.TimeoutError:
+            logger.warning("未処理のWebhookイベントが残っています: %s件", self.queue.qsize())
+
+        self._consumer_task.cancel()
+        try:
+            await self._consumer_task
+        except asyncio.CancelledError:
+            pass
+        logger.info("Webhook受信サーバー停止")
+
+    async def _consume(self):
+        """キューからリクエストをまとめて取り出して処理"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            try:
+                # パースとDB書き込みはイベントループを止めないよう別スレッドで実行
+                await loop.run_in_executor(None, self._process_batch, batch)
+            except Exception as e:
+                logger.error("Webhookイベント処理エラー: %s", e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _process_batch(self, batch: List[Tuple[str, str]]):
+        """リクエストのバッチを処理してストアへ反映"""
+        self._local.events = []
+
+        for body, signature in batch:
+            try:
+                self.handler.handle(body, signature)
+                self.stats['processed'] += 1
+            except InvalidSignatureError:
+                self.stats['failed'] += 1
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error("Webhookイベント解析エラー: %s", e)
+
+        # 200を返した後のイベントのため、反映できなければ退避して次のバッチで反映し直す
+        spilled = self._load_spilled()
+        try:
+            applied = self._apply_events(spilled + self._local.events)
+        except sqlite3.Error as e:
+            self._spill(self._local.events)
+            logger.error("購読者イベント %s 件を退避（%s件が未反映）: %s",
+                         len(self._local.events), len(spilled) + len(self._local.events), e)
+            return
+
+        if spilled:
+            self.spill_path.unlink()
+            logger.info("退避していた購読者イベント %s 件を反映", len(spilled))
+        if applied:
+            logger.info("購読者イベント %s 件を反映", applied)
+
+    def _apply_events(self, events: List[Tuple]) -> int:
+        """DBエラーは間隔を空けて試し直してストアへ反映"""
+        for attempt in range(1, WEBHOOK_APPLY_ATTEMPTS + 1):
+            try:
+                return self.store.apply_events(events)
+            except sqlite3.Error:
+                if attempt == WEBHOOK_APPLY_ATTEMPTS:
+                    raise
+                time.sleep(0.5 * attempt)
+
+    def _load_spilled(self) -> List[Tuple]:
+        """前回反映できなかったイベントを退避ファイルから読み込む"""
+        if not self.spill_path or not self.spill_path.exists():
+            return []
+        events = []
+        with open(self.spill_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    events.append(tuple(json.loads(line)))
+                except ValueError:
+                    logger.warning("退避ファイルの壊れた行を無視: %s", self.spill_path)
+        return events
+
+    def _spill(self, events: List[Tuple]):
+        """反映できなかったイベントを退避ファイルへ追記"""
+        if not self.spill_path or not events:
+            return
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.spill_path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(list(event), ensure_ascii=False) + '\n' for event in events))
+            f.flush()
+            os.fsync(f.fileno())
+        self.stats['spilled'] += len(events)
+
+    def run(self, host: str = WEBHOOK_HOST, port: int = WEBHOOK_PORT):
+        """サーバーを起動（ブロッキング）"""
+        web.run_app(self.create_app(), host=host, port=port)
+
+
+def main():
+    """Webhook受信サーバーを起動"""
+    setup_logging()
+    WebhookServer().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+パイプライン処理
+買い目ごとの通知・記録をそれぞれ上限付きのワーカープールで並行実行する
+"""
+
+import logging
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from src.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """上限付きのワーカープールで処理する段（失敗はこの段の中で記録し、他の段に影響させない）"""
+
+    def __init__(self, name: str, func: Callable[[Any], bool], max_workers: int,
+                 max_pending: Optional[int] = None):
+        """
+        初期化
+
+        Args:
+            name: 段の名前（ログ用）
+            func: 1件を処理する関数（Falseか例外で失敗）
+            max_workers: 同時に処理する件数
+            max_pending: 処理待ちを含めて受け付ける件数の上限（超えるとsubmitが待つ）
+        """
+        self.name = name
+        self.func = func
+        self.succeeded = 0
+        self.failed = 0
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"stage-{name}")
+        self._slots = threading.BoundedSemaphore(max_pending or max_workers * 2)
+        self._lock = threading.Lock()
+
+    def submit(self, item: Any):
+        """
+        1件を投入（処理待ちが上限に達していれば空くまで待つ）
+
+        Args:
+            item: 処理対象
+        """
+        self._slots.acquire()
+        try:
+            # 投入元の相関ID（実行ID・レースID）をワーカーのログにも付ける
+            self._executor.submit(contextvars.copy_context().run, self._run, item)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _run(self, item: Any):
+        try:
+            with metrics.span('stage', stage=self.name):
+                ok = self.func(item)
+        except Exception as e:
+            logger.error("%sエラー: %s", self.name, e)
+            ok = False
+        finally:
+            self._slots.release()
+
+        with self._lock:
+            if ok:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+        metrics.incr('stage_items_total', stage=self.name, status='ok' if ok else 'failed')
+
+    def join(self):
+        """投入済みの処理がすべて終わるまで待つ"""
+        self._executor.shutdown(wait=True)
+        logger.info("%s: 成功 %s / 失敗 %s", self.name, self.succeeded, self.failed)
@@ -4,9 +4,12 @@
 """
 
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Iterator, Optional
 from datetime import datetime
 
+from src.data.models import Race, Participant, Bet
+from src.utils import metrics
+
 logger = logging.getLogger(__name__)
 
 class BetSelector:
@@ -17,44 +20,66 @@ class BetSelector:
         self.min_odds = 50.0  # 最小配当倍率
         self.max_bets_per_day = 3  # 1日最大買い目数
         
-    def select_bets(self, races: List[Dict]) -> List[Dict]:
+    def select_bets(self, races: List[Race]) -> List[Bet]:
         """
         レース情報から買い目を選定
         
         Args:
-            races: レース情報のリスト
+            races: レース情報のリスト（辞書も可）
             
         Returns:
             選定した買い目のリスト
         """
-        try:
-            logger.info(f"買い目選定開始: {len(races)}レース")
-            
-            # 高配当レースをフィルタリング
-            high_odds_races = self._filter_high_odds_races(races)
+        logger.info("買い目選定開始: %sレース", len(races))
+        selected_bets = list(self.iter_bets(races))
+        logger.info("買い目選定完了: %s件", len(selected_bets))
+        return selected_bets
+    
+    def iter_bets(self, races: Iterable[Race], raise_errors: bool = False) -> Iterator[Bet]:
+        """
+        届いたレースから順に買い目を選定して返す
+        
+        1日の上限に達した時点でレースの受け取りをやめる
+        
+        Args:
+            races: レース情報（辞書も可）を順に返すイテラブル
+            raise_errors: レースの取得・選定のエラーを呼び出し元へ送出する（省略時はログに残して選定を打ち切る）
             
-            # 買い目を選定
-            selected_bets = []
-            for race in high_odds_races[:self.max_bets_per_day]:
-                bet = self._generate_bet(race)
+        Yields:
+            選定した買い目
+        """
+        try:
+            considered = 0
+            for race in races:
+                if considered >= self.max_bets_per_day:
+                    break
+                
+                # 高配当レースをフィルタリング
+                race = Race.from_dict(race)
+                if not self._filter_high_odds_races([race]):
+                    continue
+                
+                considered += 1
+                with metrics.span('selector_score'):
+                    bet = self._generate_bet(race)
+                metrics.incr('selector_races_scored_total')
                 if bet:
-                    selected_bets.append(bet)
-            
-            logger.info(f"買い目選定完了: {len(selected_bets)}件")
-            return selected_bets
+                    metrics.incr('selector_bets_total')
+                    yield bet
             
         except Exception as e:
-            logger.error(f"買い目選定エラー: {e}")
-            return []
+            logger.error("買い目選定エラー: %s", e)
+            if raise_errors:
+                raise
     
-    def _filter_high_odds_races(self, races: List[Dict]) -> List[Dict]:
+    def _filter_high_odds_races(self, races: List[Race]) -> List[Race]:
         """高配当レースをフィルタリング"""
         return [
             race for race in races 
-            if race.get('expected_odds', 0) >= self.min_odds
+            if race.expected_odds >= self.min_odds
         ]
     
-    def _generate_bet(self, race: Dict) -> Optional[Dict]:
+    def _generate_bet(self, race: Race) -> Optional[Bet]:
         """
         レース情報から買い目を生成
         
@@ -66,7 +91,7 @@ class BetSelector:
         """
         try:
             # 参加者情報を取得
-            participants = race.get('participants', [])
+            participants = race.participants
             if len(participants) < 6:
                 return None
             
@@ -74,8 +99,8 @@ class BetSelector:
             # 実際の実装では、より高度な分析を行う
             
             # A1レーサーを優先的に選定
-            a1_racers = [p for p in participants if p.get('rating') == 'A1']
-            a2_racers = [p for p in participants if p.get('rating') == 'A2']
+            a1_racers = [p for p in participants if p.rating == 'A1']
+            a2_racers = [p for p in participants if p.rating == 'A2']
             
             if len(a1_racers) >= 2:
                 # A1レーサー中心の組み合わせ
@@ -88,53 +113,53 @@ class BetSelector:
                 combination = self._create_upset_combination(participants)
             
             # 買い目データを構築
-            bet_data = {
-                'race_info': race,
-                'combination': combination,
-                'bet_type': '3連単',
-                'investment': 1000,  # 投資額（円）
-                'expected_return': race.get('expected_odds', 0) * 1000,
-                'confidence': self._calculate_confidence(race, combination),
-                'created_at': datetime.now().isoformat()
-            }
+            bet_data = Bet(
+                race_info=race,
+                combination=combination,
+                bet_type='3連単',
+                investment=1000,  # 投資額（円）
+                expected_return=race.expected_odds * 1000,
+                confidence=self._calculate_confidence(race, combination),
+                created_at=datetime.now().isoformat()
+            )
             
             return bet_data
             
         except Exception as e:
-            logger.error(f"買い目生成エラー: {e}")
+            logger.error("買い目生成エラー: %s", e)
             return None
     
-    def _create_combination_with_a1(self, a1_racers: List[Dict], all_participants: List[Dict]) -> str:
+    def _create_combination_with_a1(self, a1_racers: List[Participant], all_participants: List[Participant]) -> str:
         """A1レーサー中心の組み合わせを作成"""
         if len(a1_racers) >= 2:
             # 1着-2着はA1レーサー、3着は他から選択
-            first = a1_racers[0]['position']
-            second = a1_racers[1]['position']
-            third_candidates = [p['position'] for p in all_participants 
-                              if p['position'] not in [first, second]]
+            first = a1_racers[0].position
+            second = a1_racers[1].position
+            third_candidates = [p.position for p in all_participants 
+                              if p.position not in [first, second]]
             third = third_candidates[0] if third_candidates else 3
             return f"{first}-{second}-{third}"
         return "1-2-3"  # デフォルト
     
-    def _create_mixed_combination(self, a1_racer: Dict, a2_racers: List[Dict], all_participants: List[Dict]) -> str:
+    def _create_mixed_combination(self, a1_racer: Participant, a2_racers: List[Participant], all_participants: List[Participant]) -> str:
         """A1とA2の混合組み合わせを作成"""
-        first = a1_racer['position']
-        second = a2_racers[0]['position']
-        third_candidates = [p['position'] for p in all_participants 
-                          if p['position'] not in [first, second]]
+        first = a1_racer.position
+        second = a2_racers[0].position
+        third_candidates = [p.position for p in all_participants 
+                          if p.position not in [first, second]]
         third = third_candidates[0] if third_candidates else 3
         return f"{first}-{second}-{third}"
     
-    def _create_upset_combination(self, participants: List[Dict]) -> str:
+    def _create_upset_combination(self, participants: List[Participant]) -> str:
         """荒れレース用の組み合わせを作成"""
         # 下位レーサーを含む組み合わせで高配当を狙う
-        positions = [p['position'] for p in participants]
+        positions = [p.position for p in participants]
         if len(positions) >= 6:
             # 3-4-5着付近の組み合わせで荒れを狙う
             return "3-4-5"
         return "1-2-3"  # デフォルト
     
-    def _calculate_confidence(self, race: Dict, combination: str) -> float:
+    def _calculate_confidence(self, race: Race, combination: str) -> float:
         """
         買い目の信頼度を計算
         
@@ -148,14 +173,14 @@ class BetSelector:
         confidence = 0.5  # ベース信頼度
         
         # グレードによる調整
-        grade = race.get('grade', '')
+        grade = race.grade
         if grade == 'G1':
             confidence += 0.2
         elif grade == 'G2':
             confidence += 0.1
         
         # 予想配当による調整
-        expected_odds = race.get('expected_odds', 0)
+        expected_odds = race.expected_odds
         if expected_odds > 100:
             confidence -= 0.1  # 高配当すぎる場合は信頼度を下げる
         elif 50 <= expected_odds <= 80:
@@ -0,0 +1 @@
+# スケジュール実行関連モジュール
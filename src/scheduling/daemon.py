@@ -0,0 +1,153 @@
+"""
+常駐デーモン
+クライアントを起動したまま保持し、NOTIFICATION_SCHEDULE の時刻に予想・結果ジョブを実行する
+予想したレースには発走後に結果を取得するタイマーを設定する
+"""
+
+import heapq
+import logging
+import signal
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import schedule
+
+from config.settings import NOTIFICATION_SCHEDULE, RESULT_CHECK_DELAY_MINUTES, PARQUET_EXPORT_TIME
+from src.data.models import Race
+from src.jobs import JobContext, run_prediction_job, run_result_job
+from src.utils.log import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# スケジュールを確認する間隔（秒）
+TICK_SECONDS = 1.0
+
+
+class Daemon:
+    """予想・結果ジョブを定時実行する常駐プロセス"""
+
+    def __init__(self, context: Optional[JobContext] = None,
+                 result_delay: timedelta = timedelta(minutes=RESULT_CHECK_DELAY_MINUTES)):
+        """
+        初期化
+
+        Args:
+            context: ジョブのクライアント（省略時は作成）
+            result_delay: 発走時刻から結果を取得するまでの待ち時間
+        """
+        self.context = context or JobContext()
+        self.result_delay = result_delay
+        self.scheduler = schedule.Scheduler()
+        self._stop_event = threading.Event()
+
+        # (取得時刻, 連番, レース) のヒープ
+        self._result_timers: List[Tuple[datetime, int, Race]] = []
+        self._timer_seq = 0
+
+        self.scheduler.every().day.at(NOTIFICATION_SCHEDULE['prediction']).do(self.run_prediction)
+        self.scheduler.every().day.at(NOTIFICATION_SCHEDULE['result']).do(self.run_results)
+        self.scheduler.every().day.at(PARQUET_EXPORT_TIME).do(self.run_export)
+
+    def run_prediction(self):
+        """予想ジョブを実行し、予想したレースに結果取得タイマーを設定"""
+        try:
+            bets = run_prediction_job(self.context)
+            for bet in bets:
+                self.add_result_timer(bet.race_info)
+        except Exception as e:
+            logger.error("予想ジョブエラー: %s", e)
+
+    def run_results(self, races: Optional[List[Race]] = None):
+        """結果ジョブを実行（racesを省略すると結果未記録のレースすべて）"""
+        try:
+            run_result_job(self.context, races)
+        except Exception as e:
+            logger.error("結果ジョブエラー: %s", e)
+
+    def run_export(self):
+        """分析用Parquetの差分を書き出す"""
+        try:
+            from src.data.parquet_export import ParquetExporter
+            ParquetExporter(self.context.spreadsheet.store).export()
+        except Exception as e:
+            logger.error("Parquet書き出しエラー: %s", e)
+
+    def add_result_timer(self, race: Race) -> Optional[datetime]:
+        """
+        発走後に結果を取得するタイマーを設定
+
+        Args:
+            race: レース情報
+
+        Returns:
+            結果の取得時刻（発走時刻が不明ならNone）
+        """
+        try:
+            start = datetime.strptime(f"{race.race_date} {race.race_time}", '%Y-%m-%d %H:%M')
+        except ValueError:
+            return None
+
+        due = start + self.result_delay
+        self._timer_seq += 1
+        heapq.heappush(self._result_timers, (due, self._timer_seq, race))
+        logger.info("結果取得タイマー設定: %s %s", race.race_name, due.strftime('%m/%d %H:%M'))
+        return due
+
+    def _restore_result_timers(self):
+        """再起動時に結果未記録のレースのタイマーを設定し直す"""
+        tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        for race in self.context.spreadsheet.get_unsettled_races(tomorrow):
+            self.add_result_timer(race)
+
+    def _run_due_timers(self):
+        """取得時刻を過ぎたレースの結果をまとめて取得"""
+        now = datetime.now()
+        due_races = []
+        while self._result_timers and self._result_timers[0][0] <= now:
+            due_races.append(heapq.heappop(self._result_timers)[2])
+        if due_races:
+            self.run_results(due_races)
+
+    def run(self):
+        """停止要求（SIGINT・SIGTERM）まで常駐"""
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self._handle_signal)
+
+        self.context.spreadsheet.start_background_sync()
+        self._restore_result_timers()
+        logger.info("デーモン開始: 予想 %s / 結果 %s",
+                    NOTIFICATION_SCHEDULE['prediction'], NOTIFICATION_SCHEDULE['result'])
+
+        try:
+            # ジョブはこのループ内で実行するため、停止要求は実行中のジョブの完了後に反映される
+            while not self._stop_event.is_set():
+                self.scheduler.run_pending()
+                self._run_due_timers()
+                self._stop_event.wait(TICK_SECONDS)
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        """停止を要求"""
+        self._stop_event.set()
+
+    def _handle_signal(self, signum, frame):
+        logger.info("停止要求を受信: %s", signal.Signals(signum).name)
+        self.stop()
+
+    def shutdown(self):
+        """未反映の記録を書き込んで終了"""
+        self.scheduler.clear()
+        self.context.close()
+        logger.info("デーモン停止")
+
+
+def main():
+    """コマンドラインからデーモンを起動"""
+    setup_logging()
+    Daemon().run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""
+ローカルのジョブキュー
+複数のワーカープロセスで共有するSQLiteのキュー。ジョブはリース（期限付きの占有）で取り出し、
+期限までに完了しなかったジョブ（ワーカーが落ちた場合など）は別のワーカーが取り直す
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from config.settings import WORKER_MAX_ATTEMPTS, WORKER_QUEUE_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_LEASED = 'leased'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class QueuedJob:
+    """リースしたジョブ"""
+
+    __slots__ = ('job_id', 'batch', 'payload', 'attempts')
+
+    def __init__(self, job_id: int, batch: str, payload: Dict, attempts: int):
+        self.job_id = job_id
+        self.batch = batch
+        self.payload = payload
+        self.attempts = attempts
+
+
+class JobQueue:
+    """リース付きのジョブキュー（プロセスごとに開く）"""
+
+    def __init__(self, db_path: Optional[str] = None, max_attempts: int = WORKER_MAX_ATTEMPTS):
+        """
+        初期化
+
+        Args:
+            db_path: キューのデータベース
+            max_attempts: 1つのジョブを試す回数の上限（超えたら失敗にする）
+        """
+        self.db_path = Path(db_path or WORKER_QUEUE_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+
+        # リース延長のスレッドからも利用する
+        self._lock = threading.Lock()
+        # トランザクションは BEGIN IMMEDIATE で明示的に始める
+        self._conn = sqlite3.connect(
+            str(self.db_path), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._init_schema()
+
+    def _init_schema(self):
+        """テーブルとインデックスを作成"""
+        with self._lock:
+            self._conn.executescript(
+                '''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    batch TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    result TEXT,
+                    error TEXT,
+                    updated_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_batch_status ON jobs (batch, status);
+                '''
+            )
+            columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(jobs)')}
+            if 'job_key' not in columns:
+                self._conn.execute('ALTER TABLE jobs ADD COLUMN job_key TEXT')
+            # 同じバッチに同じジョブを二重に入れない（再開時に投入し直す場合）
+            self._conn.execute(
+                'CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_batch_key ON jobs (batch, job_key)'
+            )
+
+    def _write(self, func):
+        """書き込みのロックを取ってからfuncを実行（他プロセスとの取り合いを防ぐ）"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = func()
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return result
+
+    def enqueue(self, batch: str, payloads: Iterable[Dict],
+                key: Optional[Callable[[Dict], str]] = None) -> int:
+        """
+        ジョブを追加（バッチに同じキーのジョブがあれば追加しない）
+
+        完了したジョブはそのまま結果を使い、失敗したジョブは試行回数を戻して処理し直す
+
+        Args:
+            batch: まとめて扱うジョブの識別子（実行ID）
+            payloads: ジョブの内容
+            key: ジョブのキーを返す関数（省略時はジョブの内容全体）
+
+        Returns:
+            追加した件数
+        """
+        now = datetime.now().isoformat()
+        rows = []
+        for payload in payloads:
+            data = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+            rows.append((batch, data, key(payload) if key else data, now))
+
+        def insert():
+            added = 0
+            for row in rows:
+                cursor = self._conn.execute(
+                    'INSERT OR IGNORE INTO jobs (batch, payload, job_key, updated_at) VALUES (?, ?, ?, ?)', row
+                )
+                if cursor.rowcount:
+                    added += 1
+                    continue
+                self._conn.execute(
+                    'UPDATE jobs SET status = ?, attempts = 0, error = NULL, updated_at = ? '
+                    'WHERE batch = ? AND job_key = ? AND status = ?',
+                    (STATUS_PENDING, now, batch, row[2], STATUS_FAILED)
+                )
+            return added
+
+        added = self._write(insert)
+        if added < len(rows):
+            logger.info("投入済みのジョブ%s件を再利用: %s", len(rows) - added, batch)
+        return added
+
+    def lease(self, owner: str, lease_seconds: float, batch: Optional[str] = None) -> Optional[QueuedJob]:
+        """
+        未処理のジョブか期限切れのリースを1件取り出す
+
+        Args:
+            owner: 取り出すワーカーの識別子
+            lease_seconds: リースの期限（秒）
+            batch: 対象のバッチ（省略時はすべて）
+
+        Returns:
+            リースしたジョブ（なければNone）
+        """
+        def take():
+            now = time.time()
+            while True:
+                row = self._conn.execute(
+                    'SELECT id, batch, payload, attempts FROM jobs '
+                    'WHERE (? IS NULL OR batch = ?) '
+                    'AND (status = ? OR (status = ? AND lease_expires < ?)) '
+                    'ORDER BY id LIMIT 1',
+                    (batch, batch, STATUS_PENDING, STATUS_LEASED, now)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row['attempts'] >= self.max_attempts:
+                    # 試行回数を使い切ったジョブ（処理中に落ち続けた）は失敗にする
+                    self._set_status(row['id'], STATUS_FAILED, error='リースの期限切れが上限に達しました')
+                    logger.warning("ジョブ%sを失敗にしました（%s回）", row['id'], row['attempts'])
+                    continue
+                self._conn.execute(
+                    'UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, '
+                    'lease_expires = ?, updated_at = ? WHERE id = ?',
+                    (STATUS_LEASED, owner, now + lease_seconds, datetime.now().isoformat(), row['id'])
+                )
+                return QueuedJob(row['id'], row['batch'], json.loads(row['payload']), row['attempts'] + 1)
+
+        return self._write(take)
+
+    def heartbeat(self, job_id: int, owner: str, lease_seconds: float) -> bool:
+        """
+        リースを延長
+
+        Returns:
+            まだリースを持っていればTrue
+        """
+        cursor = self._write(lambda: self._conn.execute(
+            'UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = ?',
+            (time.time() + lease_seconds, job_id, owner, STATUS_LEASED)
+        ))
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, owner: str, result: Any) -> bool:
+        """
+        ジョブを完了にして結果を保存（リースを失っていれば何もしない）
+
+        Returns:
+            完了にできたらTrue
+        """
+        cursor = self._write(lambda: self._conn.execute(
+            'UPDATE jobs SET status = ?, result = ?, lease_expires = NULL, updated_at = ? '
+            'WHERE id = ? AND lease_owner = ? AND status = ?',
+            (STATUS_DONE, json.dumps(result, ensure_ascii=False), datetime.now().isoformat(),
+             job_id, owner, STATUS_LEASED)
+        ))
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: int, owner: str, error: str) -> bool:
+        """
+        ジョブの失敗を記録（試行回数が残っていれば未処理に戻す）
+
+        Returns:
+            記録できたらTrue
+        """
+        def release():
+            row = self._conn.execute(
+                'SELECT attempts FROM jobs WHERE id = ? AND lease_owner = ? AND status = ?',
+                (job_id, owner, STATUS_LEASED)
+            ).fetchone()
+            if row is None:
+                return False
+            status = STATUS_FAILED if row['attempts'] >= self.max_attempts else STATUS_PENDING
+            self._set_status(job_id, status, error=error)
+            return True
+
+        return self._write(release)
+
+    def _set_status(self, job_id: int, status: str, error: Optional[str] = None):
+        self._conn.execute(
+            'UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, '
+            'updated_at = ? WHERE id = ?',
+            (status, error, datetime.now().isoformat(), job_id)
+        )
+
+    def counts(self, batch: str) -> Dict[str, int]:
+        """バッチの状態ごとの件数"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT status, COUNT(*) FROM jobs WHERE batch = ? GROUP BY status', (batch,)
+            ).fetchall()
+        return {status: count for status, count in rows}
+
+    def is_finished(self, batch: str) -> bool:
+        """バッチのジョブがすべて完了か失敗になったか"""
+        counts = self.counts(batch)
+        return not counts.get(STATUS_PENDING) and not counts.get(STATUS_LEASED)
+
+    def results(self, batch: str) -> List[Any]:
+        """バッチの完了したジョブの結果（追加した順）"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT result FROM jobs WHERE batch = ? AND status = ? ORDER BY id', (batch, STATUS_DONE)
+            ).fetchall()
+        return [json.loads(row['result']) for row in rows]
+
+    def failures(self, batch: str) -> List[Dict]:
+        """バッチの失敗したジョブの内容とエラー"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT payload, error FROM jobs WHERE batch = ? AND status = ? ORDER BY id',
+                (batch, STATUS_FAILED)
+            ).fetchall()
+        return [{'payload': json.loads(row['payload']), 'error': row['error']} for row in rows]
+
+    def purge(self, batch: str) -> int:
+        """バッチのジョブを削除"""
+        cursor = self._write(lambda: self._conn.execute('DELETE FROM jobs WHERE batch = ?', (batch,)))
+        return cursor.rowcount
+
+    def close(self):
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
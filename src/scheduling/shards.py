@@ -0,0 +1,279 @@
+"""
+会場ごとに分けた複数プロセスでの取得・選定
+コーディネーターが (日付, 会場) ごとのジョブをキューに入れ、ワーカープロセスがそれぞれ
+RaceScraper と BetSelector で処理する。結果はコーディネーターがまとめて通知・記録に渡す
+
+ワーカーが落ちてもリースの期限が切れれば、別のワーカーか起動し直したワーカーが処理し直す。
+リクエスト間隔はキューのデータベースで全プロセス共有するため、プロセスを増やしても REQUEST_DELAY を守る
+"""
+
+import functools
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from config.settings import (
+    LOG_FILE, REQUEST_DELAY, WORKER_LEASE_SECONDS, WORKER_MAX_ATTEMPTS, WORKER_POLL_INTERVAL,
+    WORKER_PROCESSES, WORKER_QUEUE_DB_PATH
+)
+from src.checkpoint import new_run_id
+from src.data.models import Bet
+from src.prediction.bet_selector import BetSelector
+from src.scheduling.job_queue import JobQueue, STATUS_DONE, STATUS_FAILED
+from src.scraping.venues import VENUE_CODES
+from src.utils import metrics
+from src.utils.log import log_context, setup_logging
+from src.utils.rate_limit import SharedRateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def process_shard(scraper, selector: BetSelector, payload: Dict) -> Dict:
+    """
+    1会場分のレースを取得して買い目を選定
+
+    Args:
+        scraper: レース情報スクレイパー
+        selector: 買い目選定
+        payload: ジョブの内容（date・venue・time_bands・grades）
+
+    Returns:
+        ジョブの結果（選定した買い目の辞書のリスト）
+    """
+    # 取得・選定のエラーはジョブの失敗にして再試行する（0件の完了として扱わない）
+    races = scraper.iter_high_odds_races(
+        payload['date'], payload.get('time_bands'), payload.get('grades'), venues=[payload['venue']],
+        raise_errors=True
+    )
+    return {
+        'venue': payload['venue'],
+        'bets': [bet.to_dict() for bet in selector.iter_bets(races, raise_errors=True)],
+    }
+
+
+def merge_bets(results: List[Dict], limit: int) -> List[Bet]:
+    """
+    会場ごとの結果を発走順にまとめ、1日の上限までに絞る
+
+    Args:
+        results: ジョブの結果
+        limit: 1日の買い目数の上限
+
+    Returns:
+        買い目のリスト
+    """
+    bets = {}
+    for result in results:
+        for data in result['bets']:
+            bet = Bet.from_dict(data)
+            # 同じ会場の結果が重複していても1レース1件にする
+            bets.setdefault(bet.race_info.race_id, bet)
+    ordered = sorted(bets.values(), key=lambda bet: (
+        bet.race_info.race_date, bet.race_info.race_time,
+        VENUE_CODES.get(bet.race_info.venue, 99), bet.race_info.race_number
+    ))
+    return ordered[:limit]
+
+
+class _LeaseKeeper:
+    """処理中のジョブのリースを定期的に延長するスレッド"""
+
+    def __init__(self, queue: JobQueue, job_id: int, owner: str, lease_seconds: float):
+        self.queue = queue
+        self.job_id = job_id
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='lease-keeper', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(self.job_id, self.owner, self.lease_seconds):
+                    logger.warning("ジョブ%sのリースを失いました", self.job_id)
+                    return
+            except Exception as e:
+                logger.error("リース延長エラー: %s", e)
+
+
+def run_worker(worker_id: int, batch: str, db_path: str, lease_seconds: float,
+               scraper_factory: Callable, log_level: str = 'INFO') -> int:
+    """
+    ワーカープロセスの処理（バッチのジョブがなくなるまでリースして処理する）
+
+    Args:
+        worker_id: ワーカー番号（ログファイル名に使う）
+        batch: 対象のバッチ
+        db_path: キューのデータベース
+        lease_seconds: リースの期限（秒）
+        scraper_factory: スクレイパーを作成する関数（子プロセスに渡せるもの）
+        log_level: ログレベル
+
+    Returns:
+        処理したジョブ数
+    """
+    log_file = Path(LOG_FILE)
+    setup_logging(log_level, log_file=log_file.with_name(f"{log_file.stem}.worker{worker_id}{log_file.suffix}"))
+
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    queue = JobQueue(db_path)
+    scraper = scraper_factory()
+    # プロセスをまたいでリクエスト間隔を守る
+    scraper.rate_limiter = SharedRateLimiter(db_path, 60 / REQUEST_DELAY, name='scraper')
+    selector = BetSelector()
+
+    processed = 0
+    try:
+        while True:
+            job = queue.lease(owner, lease_seconds, batch)
+            if job is None:
+                if queue.is_finished(batch):
+                    break
+                # 他のワーカーが処理中（落ちていればリースの期限切れ後に取り直す）
+                time.sleep(WORKER_POLL_INTERVAL)
+                continue
+
+            with log_context(run_id=batch, job_id=job.job_id, venue=job.payload['venue']), \
+                    _LeaseKeeper(queue, job.job_id, owner, lease_seconds):
+                try:
+                    result = process_shard(scraper, selector, job.payload)
+                except Exception as e:
+                    logger.error("シャード処理エラー（%s回目）: %s", job.attempts, e)
+                    queue.fail(job.job_id, owner, str(e))
+                    continue
+                if not queue.complete(job.job_id, owner, result):
+                    logger.warning("リースを失ったため結果を破棄: ジョブ%s", job.job_id)
+                    continue
+                processed += 1
+    finally:
+        scraper.rate_limiter.close()
+        queue.close()
+
+    logger.info("ワーカー%s: %s件を処理", worker_id, processed)
+    return processed
+
+
+class ShardCoordinator:
+    """会場ごとのジョブを投入してワーカープロセスを管理し、結果をまとめる"""
+
+    def __init__(self, processes: int = WORKER_PROCESSES, scraper=None,
+                 db_path: Optional[str] = None, lease_seconds: float = WORKER_LEASE_SECONDS):
+        """
+        初期化
+
+        Args:
+            processes: ワーカープロセス数
+            scraper: 開催会場の取得に使うスクレイパー（ワーカーは同じクラス・同じ取得元で作成する）
+            db_path: キューのデータベース
+            lease_seconds: リースの期限（秒、ワーカーが落ちてから処理し直すまでの時間）
+        """
+        if scraper is None:
+            from src.scraping.race_scraper import RaceScraper
+            scraper = RaceScraper()
+        self.processes = processes
+        self.scraper = scraper
+        self.scraper_factory = type(scraper)
+        source = getattr(scraper, 'source', None)
+        if source is not None:
+            # 合成データなどの取得元は子プロセスへそのまま渡す
+            self.scraper_factory = functools.partial(type(scraper), source=source)
+        self.db_path = Path(db_path or WORKER_QUEUE_DB_PATH)
+        self.lease_seconds = lease_seconds
+
+    def run(self, target_date: str, time_bands=None, grades=None, batch: Optional[str] = None) -> List[Bet]:
+        """
+        対象日の会場ごとのジョブを処理して買い目をまとめる
+
+        失敗・未処理の会場が残った場合はバッチを消さずに例外を送出する
+        （同じバッチで実行し直すと、完了した会場の結果はそのまま使い、残りの会場だけを処理する）
+
+        Args:
+            target_date: 対象日付 (YYYY-MM-DD形式)
+            time_bands: 対象の開催時間帯
+            grades: 対象のグレード
+            batch: バッチの識別子（省略時は新しい実行ID）
+
+        Returns:
+            発走順の買い目（1日の上限まで）
+        """
+        batch = batch or new_run_id()
+        # カレンダーはここで取得しておき、ワーカーは会場を指定して取得する
+        venues = self.scraper.get_active_venues(target_date, time_bands, grades)
+        if venues is None:
+            venues = list(VENUE_CODES)
+
+        queue = JobQueue(self.db_path)
+        try:
+            # 再開時は同じバッチに投入し直すため、日付・会場で重複を除く
+            queue.enqueue(batch, (
+                {'date': target_date, 'venue': venue, 'time_bands': time_bands, 'grades': grades}
+                for venue in venues
+            ), key=lambda payload: f"{payload['date']}:{payload['venue']}")
+            logger.info("%s会場を%sプロセスで処理: %s", len(venues), self.processes, batch)
+            self._supervise(queue, batch)
+
+            counts = queue.counts(batch)
+            for status, count in counts.items():
+                metrics.incr('shard_jobs_total', count, status=status)
+            for failure in queue.failures(batch):
+                logger.error("会場の処理に失敗: %s - %s", failure['payload']['venue'], failure['error'])
+            results = queue.results(batch)
+            logger.info("会場の処理結果: 完了 %s / 失敗 %s",
+                        counts.get(STATUS_DONE, 0), counts.get(STATUS_FAILED, 0))
+            if sum(counts.values()) != counts.get(STATUS_DONE, 0):
+                # 一部の会場だけで選定すると上限までの買い目が変わるため、バッチを残して再開で処理し直す
+                raise RuntimeError(f"処理できなかった会場があります: {batch} {counts}")
+            queue.purge(batch)
+        finally:
+            queue.close()
+
+        return merge_bets(results, BetSelector().max_bets_per_day)
+
+    def _supervise(self, queue: JobQueue, batch: str):
+        """ワーカーを起動し、異常終了したワーカーは起動し直してバッチの終了を待つ"""
+        context = multiprocessing.get_context('spawn')
+        log_level = logging.getLevelName(logging.getLogger().getEffectiveLevel())
+
+        def start(worker_id: int):
+            process = context.Process(
+                target=run_worker,
+                args=(worker_id, batch, str(self.db_path), self.lease_seconds, self.scraper_factory, log_level),
+                name=f"shard-worker-{worker_id}",
+                daemon=True,
+            )
+            process.start()
+            return process
+
+        workers = {worker_id: start(worker_id) for worker_id in range(self.processes)}
+        restarts = 0
+        while workers:
+            time.sleep(WORKER_POLL_INTERVAL)
+            for worker_id, process in list(workers.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                if process.exitcode != 0 and not queue.is_finished(batch) \
+                        and restarts < self.processes * WORKER_MAX_ATTEMPTS:
+                    # 処理中だったジョブはリースの期限切れ後に取り直される
+                    logger.warning("ワーカー%sが異常終了（%s）したため起動し直します", worker_id, process.exitcode)
+                    metrics.incr('shard_worker_restarts_total')
+                    restarts += 1
+                    workers[worker_id] = start(worker_id)
+                else:
+                    del workers[worker_id]
+
+        if not queue.is_finished(batch):
+            logger.error("ワーカーがすべて終了しましたが未処理のジョブが残っています: %s", queue.counts(batch))
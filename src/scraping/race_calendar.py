@@ -0,0 +1,272 @@
+"""
+開催カレンダー
+月間開催スケジュールから会場ごとの開催期間・グレード・時間帯を取得し、ローカルにキャッシュ
+"""
+
+import re
+import sqlite3
+import threading
+import logging
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+from bs4 import BeautifulSoup
+
+from config.settings import BOATRACE_BASE_URL, CALENDAR_DB_PATH, CALENDAR_REFRESH_INTERVAL
+from src.data.models import Meeting
+from src.scraping.venues import VENUE_CODES, VENUE_NAMES
+
+logger = logging.getLogger(__name__)
+
+MONTHLY_SCHEDULE_URL = BOATRACE_BASE_URL + '/owpc/pc/race/monthlyschedule?ym={ym}'
+
+# 開催の時間帯
+TIME_BAND_MORNING = 'morning'    # モーニング
+TIME_BAND_DAY = 'day'            # デイ
+TIME_BAND_NIGHTER = 'nighter'    # ナイター
+TIME_BAND_MIDNIGHT = 'midnight'  # ミッドナイト
+
+# 月間スケジュールのセルのクラス名
+TIME_BAND_CLASSES = {
+    'is-morning': TIME_BAND_MORNING,
+    'is-nighter': TIME_BAND_NIGHTER,
+    'is-midnight': TIME_BAND_MIDNIGHT,
+}
+GRADE_CLASS = re.compile(r'is-gradeColor(\w+)')
+GRADE_NAMES = {'SG': 'SG', 'G1': 'G1', 'G2': 'G2', 'G3': 'G3', 'Ippan': '一般'}
+JCD_PARAM = re.compile(r'jcd=(\d{2})')
+
+
+def parse_monthly_schedule(soup: BeautifulSoup, year: int, month: int) -> List[Meeting]:
+    """
+    月間開催スケジュールのページから開催一覧を取り出す
+
+    会場ごとの行に日付の列が並び、開催期間のセルが日数分の colspan を持つ
+
+    Args:
+        soup: 月間開催スケジュールのページ
+        year: 年
+        month: 月
+
+    Returns:
+        開催の一覧
+    """
+    meetings = []
+    first_day = date(year, month, 1)
+
+    for row in soup.select('table tbody tr'):
+        cells = row.find_all('td')
+        if not cells:
+            continue
+
+        # 先頭のセルが会場（場コードのリンクまたは会場名の画像）
+        venue_code = None
+        link = cells[0].find('a', href=JCD_PARAM)
+        if link:
+            venue_code = int(JCD_PARAM.search(link['href']).group(1))
+        else:
+            image = cells[0].find('img')
+            name = image.get('alt', '') if image else cells[0].get_text(strip=True)
+            venue_code = VENUE_CODES.get(name)
+        if venue_code not in VENUE_NAMES:
+            continue
+
+        offset = 0
+        for cell in cells[1:]:
+            span = int(cell.get('colspan', 1))
+            title = cell.get_text(strip=True)
+            if title:
+                classes = cell.get('class', [])
+                grade = ''
+                for name in classes:
+                    match = GRADE_CLASS.match(name)
+                    if match:
+                        grade = GRADE_NAMES.get(match.group(1), match.group(1))
+                time_band = next(
+                    (band for name, band in TIME_BAND_CLASSES.items() if name in classes),
+                    TIME_BAND_DAY
+                )
+                start = first_day + timedelta(days=offset)
+                meetings.append(Meeting(
+                    venue=VENUE_NAMES[venue_code],
+                    venue_code=venue_code,
+                    start_date=start.isoformat(),
+                    end_date=(start + timedelta(days=span - 1)).isoformat(),
+                    grade=grade,
+                    time_band=time_band,
+                    title=title,
+                ))
+            offset += span
+
+    return meetings
+
+
+class MeetingCalendar:
+    """月間開催スケジュールのローカルキャッシュ"""
+
+    def __init__(self, fetch: Callable[[str], Optional[BeautifulSoup]],
+                 db_path: Optional[str] = None,
+                 refresh_interval: float = CALENDAR_REFRESH_INTERVAL):
+        """
+        初期化
+
+        Args:
+            fetch: URLを受け取りページを返す関数（RaceScraper._make_request）
+            db_path: キャッシュのDBファイル
+            refresh_interval: 月間スケジュールを取得し直す間隔（秒）
+        """
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.db_path = Path(db_path or CALENDAR_DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # 同じ月を複数の日の処理から同時に取得しないよう、取得し直しは1つずつ行う
+        self._refresh_lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._init_schema()
+
+    def _init_schema(self):
+        """テーブルを作成"""
+        with self._conn:
+            self._conn.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS meetings (
+                    venue_code INTEGER NOT NULL,
+                    start_date TEXT NOT NULL,
+                    end_date TEXT NOT NULL,
+                    month TEXT NOT NULL,
+                    grade TEXT,
+                    time_band TEXT,
+                    title TEXT,
+                    PRIMARY KEY (venue_code, start_date)
+                )
+                '''
+            )
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_meetings_dates ON meetings (start_date, end_date)'
+            )
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS fetched_months (month TEXT PRIMARY KEY, fetched_at REAL)'
+            )
+
+    def refresh_month(self, year: int, month: int) -> bool:
+        """
+        月間スケジュールを取得してキャッシュを置き換える
+
+        Args:
+            year: 年
+            month: 月
+
+        Returns:
+            取得成功可否
+        """
+        ym = f"{year}{month:02d}"
+        soup = self.fetch(MONTHLY_SCHEDULE_URL.format(ym=ym))
+        if soup is None:
+            return False
+
+        meetings = parse_monthly_schedule(soup, year, month)
+        month_key = f"{year}-{month:02d}"
+        if not meetings:
+            # 開催のない月はないため、ページの構成が変わったとみなして既存のキャッシュを残す
+            logger.warning("開催カレンダーを解析できません（開催0件）: %s", month_key)
+            return False
+
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM meetings WHERE month = ?', (month_key,))
+            self._conn.executemany(
+                '''
+                INSERT OR REPLACE INTO meetings
+                (venue_code, start_date, end_date, month, grade, time_band, title)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''',
+                [
+                    (m.venue_code, m.start_date, m.end_date, month_key, m.grade, m.time_band, m.title)
+                    for m in meetings
+                ]
+            )
+            self._conn.execute(
+                'INSERT OR REPLACE INTO fetched_months (month, fetched_at) VALUES (?, ?)',
+                (month_key, time.time())
+            )
+
+        logger.info("開催カレンダー更新: %s %s開催", month_key, len(meetings))
+        return True
+
+    def _ensure_month(self, race_date: str) -> bool:
+        """対象月のキャッシュがないか古ければ取得し直す"""
+        month_key = race_date[:7]
+        row = self._get_fetched(month_key)
+        if row and time.time() - row['fetched_at'] < self.refresh_interval:
+            return True
+
+        with self._refresh_lock:
+            # 待っている間に他の処理が取得していればそれを使う
+            row = self._get_fetched(month_key)
+            if row and time.time() - row['fetched_at'] < self.refresh_interval:
+                return True
+
+            year, month = (int(part) for part in month_key.split('-'))
+            # 取得できなければ古いキャッシュを使う
+            return self.refresh_month(year, month) or row is not None
+
+    def _get_fetched(self, month_key: str) -> Optional[sqlite3.Row]:
+        """月間スケジュールの取得日時"""
+        with self._lock:
+            return self._conn.execute(
+                'SELECT fetched_at FROM fetched_months WHERE month = ?', (month_key,)
+            ).fetchone()
+
+    def get_meetings(self, race_date: str,
+                     time_bands: Optional[Iterable[str]] = None,
+                     grades: Optional[Iterable[str]] = None,
+                     venues: Optional[Iterable[str]] = None) -> Optional[List[Meeting]]:
+        """
+        指定日に開催している節を取得
+
+        Args:
+            race_date: 開催日（YYYY-MM-DD）
+            time_bands: 時間帯で絞り込む（例: ['nighter']）
+            grades: グレードで絞り込む（例: ['SG', 'G1']）
+            venues: 会場名で絞り込む
+
+        Returns:
+            開催の一覧（スケジュールを取得できずキャッシュもなければNone）
+        """
+        if not self._ensure_month(race_date):
+            return None
+
+        # 前月から続く節も拾うため開催期間で検索する
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM meetings WHERE start_date <= ? AND end_date >= ? ORDER BY venue_code',
+                (race_date, race_date)
+            ).fetchall()
+
+        meetings = [
+            Meeting(
+                venue=VENUE_NAMES[row['venue_code']], venue_code=row['venue_code'],
+                start_date=row['start_date'], end_date=row['end_date'],
+                grade=row['grade'], time_band=row['time_band'], title=row['title'],
+            )
+            for row in rows
+        ]
+        if time_bands is not None:
+            time_bands = set(time_bands)
+            meetings = [m for m in meetings if m.time_band in time_bands]
+        if grades is not None:
+            grades = set(grades)
+            meetings = [m for m in meetings if m.grade in grades]
+        if venues is not None:
+            venues = set(venues)
+            meetings = [m for m in meetings if m.venue in venues]
+        return meetings
+
+    def close(self):
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
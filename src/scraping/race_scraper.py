@@ -5,51 +5,231 @@
 
 import requests
 from bs4 import BeautifulSoup
+import functools
+import itertools
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Iterator, Optional, Tuple
 import logging
 
-from config.settings import USER_AGENT, REQUEST_DELAY, TARGET_ODDS_THRESHOLD
+from config.settings import (
+    USER_AGENT, REQUEST_DELAY, TARGET_ODDS_THRESHOLD,
+    SCRAPER_RANGE_WORKERS, SCRAPER_CACHE_SIZE, SCRAPER_CACHE_TTL
+)
+from src.data.models import Race, Result
+from src.utils import metrics
+from src.utils.rate_limit import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+
+def iter_dates(start_date: str, end_date: str) -> Iterator[str]:
+    """開始日から終了日（含む）までの日付をYYYY-MM-DD形式で返す"""
+    day = datetime.strptime(start_date, '%Y-%m-%d')
+    last = datetime.strptime(end_date, '%Y-%m-%d')
+    while day <= last:
+        yield day.strftime('%Y-%m-%d')
+        day += timedelta(days=1)
+
+
 class RaceScraper:
     """ボートレース情報を取得するスクレイパー"""
     
-    def __init__(self):
+    def __init__(self, source=None):
+        """
+        初期化
+        
+        Args:
+            source: レース・オッズ・結果の取得元（例: SyntheticRaceSource、省略時は公式サイト）
+        """
+        self.source = source
         self.session = requests.Session()
         self.session.headers.update({'User-Agent': USER_AGENT})
+        self._odds_store = None
+        self._calendar = None
+        
+        # 並列で取得してもリクエスト間隔を守るよう、スレッド間で共有する
+        self.rate_limiter = TokenBucket(60 / REQUEST_DELAY, capacity=1)
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    @property
+    def odds_store(self):
+        """オッズ時系列ストア（初回参照時に作成）"""
+        if self._odds_store is None:
+            from src.data.odds_store import OddsStore
+            self._odds_store = OddsStore()
+        return self._odds_store
+    
+    @property
+    def calendar(self):
+        """開催カレンダー（初回参照時に作成）"""
+        if self._calendar is None:
+            from src.scraping.race_calendar import MeetingCalendar
+            self._calendar = MeetingCalendar(self._make_request)
+        return self._calendar
         
-    def get_high_odds_races(self, target_date: Optional[str] = None) -> List[Dict]:
+    def get_high_odds_races(self, target_date: Optional[str] = None,
+                            time_bands: Optional[Iterable[str]] = None,
+                            grades: Optional[Iterable[str]] = None,
+                            raise_errors: bool = False) -> List[Race]:
         """
         高配当が狙えるレース情報を取得
         
         Args:
             target_date: 対象日付 (YYYY-MM-DD形式)
+            time_bands: 対象の開催時間帯（例: ['nighter']、省略時は全時間帯）
+            grades: 対象のグレード（例: ['SG', 'G1']、省略時は全グレード）
+            raise_errors: 取得エラーを呼び出し元へ送出する（省略時はそこまでに取得できた分を返す）
             
         Returns:
             レース情報のリスト
         """
+        return list(self.iter_high_odds_races(target_date, time_bands, grades, raise_errors=raise_errors))
+    
+    def iter_high_odds_races(self, target_date: Optional[str] = None,
+                             time_bands: Optional[Iterable[str]] = None,
+                             grades: Optional[Iterable[str]] = None,
+                             venues: Optional[Iterable[str]] = None,
+                             raise_errors: bool = False) -> Iterator[Race]:
+        """
+        高配当が狙えるレースを取得できた順に返す
+        
+        Args:
+            target_date: 対象日付 (YYYY-MM-DD形式)
+            time_bands: 対象の開催時間帯
+            grades: 対象のグレード
+            venues: 対象の会場（指定時は開催カレンダーを参照しない。会場ごとに分けて処理する場合）
+            raise_errors: 取得エラーを呼び出し元へ送出する（省略時はログに残して取得を打ち切る）
+            
+        Yields:
+            レース情報
+        """
         try:
             if not target_date:
                 # 明日の日付を取得
                 target_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
             
-            logger.info(f"レース情報取得開始: {target_date}")
+            logger.info("レース情報取得開始: %s", target_date)
             
-            # 現在はダミーデータを返す（実際のスクレイピングは後で実装）
-            races = self._get_dummy_race_data(target_date)
+            # 開催中の会場だけを対象にする
+            if venues is None:
+                venues = self.get_active_venues(target_date, time_bands, grades)
+            else:
+                venues = list(venues)
             
-            # 高配当レースのフィルタリング
-            high_odds_races = self._filter_high_odds_races(races)
+            if self.source is not None:
+                races = self.source.iter_races(target_date, venues)
+            else:
+                # 現在はダミーデータを返す（実際のスクレイピングは後で実装）
+                races = (Race.from_dict(race_data) for race_data in self._get_dummy_race_data(target_date))
             
-            logger.info(f"高配当レース {len(high_odds_races)} 件を取得")
-            return high_odds_races
+            count = 0
+            for race in races:
+                if venues is not None and race.venue not in venues:
+                    continue
+                
+                # 高配当レースのフィルタリング
+                if not self._filter_high_odds_races([race]):
+                    continue
+                
+                count += 1
+                metrics.incr('scraper_races_total')
+                yield race
+            
+            logger.info("高配当レース %s 件を取得", count)
             
         except Exception as e:
-            logger.error(f"レース情報取得エラー: {e}")
-            return []
+            logger.error("レース情報取得エラー: %s", e)
+            if raise_errors:
+                raise
+    
+    def iter_high_odds_races_range(self, start_date: Optional[str], end_date: str,
+                                   time_bands: Optional[Iterable[str]] = None,
+                                   grades: Optional[Iterable[str]] = None,
+                                   max_workers: Optional[int] = None
+                                   ) -> Iterator[Tuple[str, Optional[List[Race]]]]:
+        """
+        期間内の高配当レースを日ごとに並列で取得し、取得できた日から順に返す
+        
+        同時に処理するのは max_workers 日までのため、期間が長くても保持するのは処理中の日の分だけ。
+        リクエスト間隔とページのキャッシュは各日の処理で共有する
+        
+        Args:
+            start_date: 開始日 (YYYY-MM-DD形式、省略時は明日)
+            end_date: 終了日 (YYYY-MM-DD形式、この日を含む)
+            time_bands: 対象の開催時間帯
+            grades: 対象のグレード
+            max_workers: 同時に処理する日数（省略時は設定値）
+            
+        Yields:
+            (日付, その日の高配当レースのリスト)（日付順とは限らない。取得に失敗した日はリストの代わりにNone）
+        """
+        if not start_date:
+            start_date = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+        max_workers = max_workers or SCRAPER_RANGE_WORKERS
+        dates = iter_dates(start_date, end_date)
+        # 各日の処理から同時に作成しないよう先に作る
+        self.calendar
+        
+        # 取得に失敗した日を0件の日と区別できるよう、各日の取得エラーは送出させる
+        fetch_day = functools.partial(self.get_high_odds_races, time_bands=time_bands, grades=grades,
+                                      raise_errors=True)
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scrape-day')
+        try:
+            pending = {
+                executor.submit(fetch_day, day): day
+                for day in itertools.islice(dates, max_workers)
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    day = pending.pop(future)
+                    # 1日終わるごとに次の日を投入する
+                    for next_day in itertools.islice(dates, 1):
+                        pending[executor.submit(fetch_day, next_day)] = next_day
+                    try:
+                        races = future.result()
+                    except Exception as e:
+                        logger.error("%s のレースを取得できませんでした: %s", day, e)
+                        races = None
+                    yield day, races
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    def get_active_venues(self, target_date: str,
+                          time_bands: Optional[Iterable[str]] = None,
+                          grades: Optional[Iterable[str]] = None) -> Optional[List[str]]:
+        """
+        開催カレンダーから対象日に開催している会場を取得
+        
+        Args:
+            target_date: 対象日付 (YYYY-MM-DD形式)
+            time_bands: 対象の開催時間帯
+            grades: 対象のグレード
+            
+        Returns:
+            会場名のリスト（カレンダーを取得できなければNone＝全会場が対象）
+        """
+        if self.source is not None:
+            return self.source.active_venues(target_date, time_bands, grades)
+        
+        try:
+            meetings = self.calendar.get_meetings(target_date, time_bands=time_bands, grades=grades)
+        except Exception as e:
+            logger.error("開催カレンダー取得エラー: %s", e)
+            meetings = None
+        
+        if meetings is None:
+            logger.warning("開催カレンダーを取得できないため全会場を対象にします")
+            return None
+        
+        venues = [meeting.venue for meeting in meetings]
+        logger.info("開催中の会場 %s 場: %s", len(venues), ', '.join(venues))
+        return venues
     
     def _get_dummy_race_data(self, target_date: str) -> List[Dict]:
         """
@@ -113,14 +293,14 @@ class RaceScraper:
             }
         ]
     
-    def _filter_high_odds_races(self, races: List[Dict]) -> List[Dict]:
+    def _filter_high_odds_races(self, races: List[Race]) -> List[Race]:
         """高配当レースをフィルタリング"""
         return [
             race for race in races 
-            if race.get('expected_odds', 0) >= TARGET_ODDS_THRESHOLD
+            if race.expected_odds >= TARGET_ODDS_THRESHOLD
         ]
     
-    def get_race_results(self, race_url: str) -> Optional[Dict]:
+    def get_race_results(self, race_url: str) -> Optional[Result]:
         """
         レース結果を取得
         
@@ -128,26 +308,83 @@ class RaceScraper:
             race_url: レースURL
             
         Returns:
-            結果情報の辞書
+            結果情報
         """
         try:
-            logger.info(f"レース結果取得: {race_url}")
+            logger.info("レース結果取得: %s", race_url)
+            
+            if self.source is not None:
+                return self.source.get_result(race_url)
             
             # 現在はダミーデータを返す
-            return {
-                'result_order': ['1', '3', '2'],  # 1-3-2着順
-                'payout': {
+            return Result(
+                result_order=['1', '3', '2'],  # 1-3-2着順
+                payout={
                     '3連単': {'combination': '1-3-2', 'odds': 45.6, 'amount': 4560},
                     '3連複': {'combination': '1-2-3', 'odds': 12.3, 'amount': 1230},
                     '2連単': {'combination': '1-3', 'odds': 8.9, 'amount': 890}
                 },
-                'race_status': 'completed'
-            }
+                race_status='completed'
+            )
             
         except Exception as e:
-            logger.error(f"結果取得エラー: {e}")
+            logger.error("結果取得エラー: %s", e)
             return None
     
+    def get_trifecta_odds(self, race_data: Race) -> Dict[str, float]:
+        """
+        3連単オッズを取得
+        
+        Args:
+            race_data: レース情報
+            
+        Returns:
+            組み合わせ（例: 1-2-3）ごとのオッズ
+        """
+        try:
+            if self.source is not None:
+                return self.source.get_odds(Race.from_dict(race_data))
+            
+            from src.data.odds_store import COMBINATIONS
+            
+            # 現在はダミーデータを返す（予想配当を基準に内側の艇ほど低いオッズ）
+            base = Race.from_dict(race_data).expected_odds or 50.0
+            return {
+                combination: round(base * sum(int(n) for n in combination.split('-')) / 6, 1)
+                for combination in COMBINATIONS
+            }
+            
+        except Exception as e:
+            logger.error("オッズ取得エラー: %s", e)
+            return {}
+    
+    def record_odds_snapshot(self, race_data: Race, odds: Optional[Dict[str, float]] = None,
+                             timestamp: Optional[float] = None) -> bool:
+        """
+        オッズのスナップショットを時系列ストアへ追記
+        
+        Args:
+            race_data: レース情報
+            odds: 組み合わせごとのオッズ（省略時は取得する）
+            timestamp: 取得時刻（エポック秒、省略時は現在時刻）
+            
+        Returns:
+            追記成功可否
+        """
+        try:
+            if odds is None:
+                odds = self.get_trifecta_odds(race_data)
+            if not odds:
+                return False
+            
+            race = Race.from_dict(race_data)
+            self.odds_store.append(race.race_date, race.venue, race.race_number, odds, timestamp)
+            return True
+            
+        except Exception as e:
+            logger.error("オッズ記録エラー: %s", e)
+            return False
+    
     def _make_request(self, url: str) -> Optional[BeautifulSoup]:
         """
         HTTPリクエストを送信してBeautifulSoupオブジェクトを返す
@@ -159,12 +396,44 @@ class RaceScraper:
             BeautifulSoupオブジェクト
         """
         try:
-            time.sleep(REQUEST_DELAY)  # リクエスト間隔
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
+            content = self._get_cached(url)
+            if content is None:
+                self.rate_limiter.acquire()  # リクエスト間隔
+                with metrics.span('scraper_fetch'):
+                    response = self.session.get(url, timeout=30)
+                    response.raise_for_status()
+                content = response.content
+                metrics.incr('scraper_pages_total')
+                metrics.incr('scraper_bytes_total', len(content))
+                self._put_cached(url, content)
+            else:
+                metrics.incr('scraper_cache_hits_total')
             
-            return BeautifulSoup(response.content, 'html.parser')
+            with metrics.span('scraper_parse'):
+                return BeautifulSoup(content, 'html.parser')
             
         except requests.RequestException as e:
-            logger.error(f"リクエストエラー: {url} - {e}")
-            return None
\ No newline at end of file
+            metrics.incr('scraper_errors_total')
+            logger.error("リクエストエラー: %s - %s", url, e)
+            return None
+    
+    def _get_cached(self, url: str) -> Optional[bytes]:
+        """キャッシュ済みのページ（期限切れならNone）"""
+        with self._cache_lock:
+            entry = self._cache.get(url)
+            if entry is None:
+                return None
+            fetched_at, content = entry
+            if time.monotonic() - fetched_at > SCRAPER_CACHE_TTL:
+                del self._cache[url]
+                return None
+            self._cache.move_to_end(url)
+            return content
+    
+    def _put_cached(self, url: str, content: bytes):
+        """ページをキャッシュ（上限を超えたら古いものから捨てる）"""
+        with self._cache_lock:
+            self._cache[url] = (time.monotonic(), content)
+            self._cache.move_to_end(url)
+            while len(self._cache) > SCRAPER_CACHE_SIZE:
+                self._cache.popitem(last=False)
@@ -0,0 +1,317 @@
+"""
+合成レースデータ
+シードから開催日ごとのレース（全会場×12レース）・3連単の全オッズ・結果を決定的に作成する。
+RaceScraper の取得元として差し替え、通常の何倍もの件数で選定・精算・通知・記録を負荷試験する
+
+    scraper = RaceScraper(source=SyntheticRaceSource(seed=1, scale=10))
+
+出走者の級別は実際の構成比（A1 20%・A2 20%・B1 50%・B2 10%）に近づけ、
+コースと級別から各艇の強さを決めて、オッズと着順を同じ確率モデル（Plackett-Luce）から作る
+"""
+
+import math
+import random
+from itertools import permutations
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from config.settings import SYNTHETIC_SCALE, SYNTHETIC_SEED
+from src.data.models import Meeting, Participant, Race, Result
+from src.scraping.venues import VENUE_CODES, VENUE_NAMES
+
+RACES_PER_DAY = 12
+SYNTHETIC_URL_PARAM = 'synthetic'  # 合成データのレースURLに付ける印（値はシード）
+TAKEOUT_RETURN = 0.75  # 払戻率（控除率25%）
+
+RATINGS = ('A1', 'A2', 'B1', 'B2')
+RATING_WEIGHTS = {
+    '一般': (20, 20, 50, 10),
+    'G3': (25, 25, 45, 5),
+    'G2': (45, 35, 20, 0),
+    'G1': (60, 35, 5, 0),
+    'SG': (90, 10, 0, 0),
+}
+RATING_STRENGTH = {'A1': 2.0, 'A2': 1.4, 'B1': 1.0, 'B2': 0.6}
+# 1コースが最も有利（1着率の目安に合わせた各コースの強さ）
+LANE_STRENGTH = (1.6, 0.45, 0.38, 0.30, 0.18, 0.11)
+
+GRADES = ('一般', 'G3', 'G2', 'G1', 'SG')
+GRADE_WEIGHTS = (80, 10, 4, 5, 1)
+# 開催時間帯と1レースの発走時刻
+FIRST_RACE_TIMES = {'morning': (8, 30), 'day': (10, 45), 'nighter': (15, 10), 'midnight': (20, 50)}
+NIGHTER_VENUES = {'桐生', '蒲郡', '住之江', '丸亀', '下関', '若松', '大村'}
+
+SURNAMES = ('佐藤', '鈴木', '高橋', '田中', '伊藤', '渡辺', '山本', '中村', '小林', '加藤',
+            '吉田', '山田', '佐々木', '松本', '井上', '木村', '林', '清水', '山崎', '森')
+GIVEN_NAMES = ('太郎', '次郎', '一郎', '翔', '大輔', '健太', '拓也', '直樹', '誠', '亮',
+               '美咲', '彩', '優子', '真由美', '浩二', '和也', '剛', '隆', '修', '勇')
+
+TRIFECTA = list(permutations(range(1, 7), 3))
+
+
+class SyntheticRaceSource:
+    """シードから決定的にレース・オッズ・結果を作る取得元"""
+
+    def __init__(self, seed: int = SYNTHETIC_SEED, scale: int = SYNTHETIC_SCALE):
+        """
+        初期化
+
+        Args:
+            seed: 乱数シード（同じシード・日付なら同じレースになる）
+            scale: 1日あたりの開催の倍率（2以上は「桐生(2)」のように会場を複製する）
+        """
+        self.seed = seed
+        self.scale = max(1, scale)
+
+    def meetings(self, race_date: str) -> List[Meeting]:
+        """
+        指定日の開催（全会場×倍率）
+
+        Args:
+            race_date: 開催日（YYYY-MM-DD）
+
+        Returns:
+            開催の一覧
+        """
+        return [self._meeting(race_date, venue, copy) for copy in range(self.scale) for venue in VENUE_CODES]
+
+    def active_venues(self, race_date: str, time_bands: Optional[Iterable[str]] = None,
+                      grades: Optional[Iterable[str]] = None) -> List[str]:
+        """時間帯・グレードで絞り込んだ開催中の会場（RaceScraper.get_active_venues と同じ形）"""
+        meetings = self.meetings(race_date)
+        if time_bands is not None:
+            time_bands = set(time_bands)
+            meetings = [m for m in meetings if m.time_band in time_bands]
+        if grades is not None:
+            grades = set(grades)
+            meetings = [m for m in meetings if m.grade in grades]
+        return [meeting.venue for meeting in meetings]
+
+    def iter_races(self, race_date: str, venues: Optional[Iterable[str]] = None) -> Iterator[Race]:
+        """
+        指定日のレースを1件ずつ作成して返す（全件を保持しない）
+
+        Args:
+            race_date: 開催日（YYYY-MM-DD）
+            venues: 対象の会場（省略時は全会場）
+
+        Yields:
+            レース情報（会場ごとに1Rから順）
+        """
+        venues = set(venues) if venues is not None else None
+        for meeting in self.meetings(race_date):
+            if venues is not None and meeting.venue not in venues:
+                continue
+            for race_number in range(1, RACES_PER_DAY + 1):
+                yield self._build_race(meeting, race_number)[0]
+
+    def get_odds(self, race: Race) -> Dict[str, float]:
+        """
+        3連単の全120通りのオッズ
+
+        Args:
+            race: レース情報
+
+        Returns:
+            組み合わせ（例: 1-2-3）ごとのオッズ
+        """
+        race, strengths = self._rebuild(race.race_date, race.venue, race.race_number)
+        return _trifecta_odds(_trifecta_probabilities(strengths), self._rng(
+            race.race_date, race.venue, 0, 'odds', race.race_number
+        ))
+
+    def get_result(self, race_url: str) -> Optional[Result]:
+        """
+        レースの結果（オッズと同じ確率モデルから着順を決める）
+
+        Args:
+            race_url: 合成データのレースURL（シードはURLの値を使う）
+
+        Returns:
+            結果情報（合成データのURLでなければNone）
+        """
+        identity = _parse_race_url(race_url)
+        if identity is None:
+            return None
+        seed, race_date, venue, race_number = identity
+        if seed != self.seed:
+            # 別のシードで作ったレースも、そのシードで作り直して結果を出す
+            return SyntheticRaceSource(seed, self.scale).get_result(race_url)
+        race, strengths = self._rebuild(race_date, venue, race_number)
+        rng = self._rng(race.race_date, race.venue, 0, 'result', race.race_number)
+
+        order = _sample_order(strengths, rng)
+        probabilities = _trifecta_probabilities(strengths)
+        trifecta_odds = _trifecta_odds(probabilities, self._rng(
+            race.race_date, race.venue, 0, 'odds', race.race_number
+        ))
+        trifecta = '-'.join(map(str, order[:3]))
+        trio_probability = sum(probabilities[p] for p in permutations(order[:3]))
+        exacta_probability = _exacta_probability(strengths, order[0], order[1])
+
+        return Result(
+            result_order=[str(position) for position in order[:3]],
+            payout={
+                '3連単': _payout(trifecta, trifecta_odds[trifecta]),
+                '3連複': _payout('-'.join(map(str, sorted(order[:3]))), _odds(trio_probability)),
+                '2連単': _payout(f"{order[0]}-{order[1]}", _odds(exacta_probability)),
+            },
+            race_status='completed',
+        )
+
+    def _meeting(self, race_date: str, venue: str, copy: int) -> Meeting:
+        """1会場の開催（グレード・時間帯は日付と会場ごとに決まる）"""
+        rng = self._rng(race_date, venue, copy, 'meeting')
+        grade = rng.choices(GRADES, GRADE_WEIGHTS)[0]
+        if venue in NIGHTER_VENUES:
+            time_band = 'nighter'
+        else:
+            time_band = rng.choices(('day', 'morning', 'midnight'), (80, 15, 5))[0]
+        return Meeting(
+            venue=_venue_name(venue, copy), venue_code=VENUE_CODES[venue],
+            start_date=race_date, end_date=race_date,
+            grade=grade, time_band=time_band, title=f"合成開催 {grade}",
+        )
+
+    def _rebuild(self, race_date: str, venue: str, race_number: int) -> Tuple[Race, List[float]]:
+        """日付・会場・レース番号からレースを作り直す（開催全体は作らない。複製の番号は倍率を超えてもよい）"""
+        base_venue, copy = _split_venue(venue)
+        if base_venue not in VENUE_CODES:
+            raise ValueError(f"合成データにない会場です: {venue}")
+        return self._build_race(self._meeting(race_date, base_venue, copy), int(race_number))
+
+    def _build_race(self, meeting: Meeting, race_number: int) -> Tuple[Race, List[float]]:
+        """レースと各艇の強さを作成"""
+        base_venue, copy = _split_venue(meeting.venue)
+        rng = self._rng(meeting.start_date, base_venue, copy, 'race', race_number)
+
+        ratings = rng.choices(RATINGS, RATING_WEIGHTS[meeting.grade], k=6)
+        participants = [
+            Participant(lane, rng.choice(SURNAMES) + rng.choice(GIVEN_NAMES), rating)
+            for lane, rating in enumerate(ratings, start=1)
+        ]
+        # 同じ級別でも調子の差をつける
+        strengths = [
+            LANE_STRENGTH[lane] * RATING_STRENGTH[rating] * rng.lognormvariate(0, 0.35)
+            for lane, rating in enumerate(ratings)
+        ]
+
+        hour, minute = FIRST_RACE_TIMES[meeting.time_band]
+        start = hour * 60 + minute + (race_number - 1) * 30 + rng.randrange(0, 5)
+        probabilities = _trifecta_probabilities(strengths)
+
+        race = Race(
+            race_name=f"{meeting.venue}{race_number}R",
+            race_date=meeting.start_date,
+            race_time=f"{start // 60 % 24:02d}:{start % 60:02d}",
+            venue=meeting.venue,
+            race_number=race_number,
+            expected_odds=_expected_odds(probabilities),
+            race_url=_race_url(self.seed, meeting.start_date, meeting.venue_code, race_number, copy),
+            grade=meeting.grade,
+            participants=participants,
+        )
+        return race, strengths
+
+    def _rng(self, race_date: str, venue: str, copy: int, kind: str, race_number: int = 0) -> random.Random:
+        # 文字列のシードはハッシュのランダム化に影響されない
+        return random.Random(f"{self.seed}:{race_date}:{venue}:{copy}:{race_number}:{kind}")
+
+
+def _venue_name(venue: str, copy: int) -> str:
+    return venue if copy == 0 else f"{venue}({copy + 1})"
+
+
+def _split_venue(venue: str) -> Tuple[str, int]:
+    """「桐生(2)」→ ('桐生', 1)"""
+    if venue.endswith(')') and '(' in venue:
+        base, _, number = venue[:-1].partition('(')
+        return base, int(number) - 1
+    return venue, 0
+
+
+def _race_url(seed: int, race_date: str, venue_code: int, race_number: int, copy: int) -> str:
+    """公式サイトと同じ形式に、合成データの印（シード）と複製番号を付けたURL"""
+    url = (
+        f"https://www.boatrace.jp/owpc/pc/race/racelist?rno={race_number}"
+        f"&jcd={venue_code:02d}&hd={race_date.replace('-', '')}&{SYNTHETIC_URL_PARAM}={seed}"
+    )
+    return url + f"&copy={copy + 1}" if copy else url
+
+
+def _parse_race_url(race_url: str) -> Optional[Tuple[int, str, str, int]]:
+    """
+    レースURLから (シード, 日付, 会場, レース番号)
+
+    合成データの印のない公式サイトのURLはNone（記録済みの実際のレースに結果を作らない）
+    """
+    query = parse_qs(urlparse(race_url).query)
+    try:
+        seed = int(query[SYNTHETIC_URL_PARAM][0])
+        hd = query['hd'][0]
+        venue = VENUE_NAMES[int(query['jcd'][0])]
+        race_number = int(query['rno'][0])
+        copy = int(query.get('copy', ['1'])[0]) - 1
+    except (KeyError, ValueError, IndexError):
+        return None
+    return seed, f"{hd[:4]}-{hd[4:6]}-{hd[6:]}", _venue_name(venue, copy), race_number
+
+
+def _trifecta_probabilities(strengths: List[float]) -> Dict[Tuple[int, int, int], float]:
+    """各艇の強さから3連単の各組み合わせの確率（Plackett-Luce）"""
+    total = sum(strengths)
+    probabilities = {}
+    for first, second, third in TRIFECTA:
+        s1, s2, s3 = strengths[first - 1], strengths[second - 1], strengths[third - 1]
+        probabilities[(first, second, third)] = (
+            s1 / total * s2 / (total - s1) * s3 / (total - s1 - s2)
+        )
+    return probabilities
+
+
+def _exacta_probability(strengths: List[float], first: int, second: int) -> float:
+    total = sum(strengths)
+    s1 = strengths[first - 1]
+    return s1 / total * strengths[second - 1] / (total - s1)
+
+
+def _odds(probability: float) -> float:
+    """確率から払戻率を差し引いたオッズ（0.1倍単位、最低1.0倍）"""
+    return max(1.0, math.floor(TAKEOUT_RETURN / probability * 10) / 10)
+
+
+def _trifecta_odds(probabilities: Dict[Tuple[int, int, int], float], rng: random.Random) -> Dict[str, float]:
+    """3連単の全オッズ（投票の偏りとして少し揺らす）"""
+    return {
+        '-'.join(map(str, combination)): _odds(probability * rng.lognormvariate(0, 0.08))
+        for combination, probability in probabilities.items()
+    }
+
+
+def _expected_odds(probabilities: Dict[Tuple[int, int, int], float]) -> float:
+    """
+    予想配当（的中確率の高い順に累積して50%に達する組み合わせのオッズ）
+
+    本命が強いレースほど低く、混戦ほど高くなる
+    """
+    cumulative = 0.0
+    for probability in sorted(probabilities.values(), reverse=True):
+        cumulative += probability
+        if cumulative >= 0.5:
+            return _odds(probability)
+    return _odds(min(probabilities.values()))
+
+
+def _sample_order(strengths: List[float], rng: random.Random) -> List[int]:
+    """強さに比例した確率で1艇ずつ着順を決める"""
+    remaining = list(range(1, 7))
+    order = []
+    while remaining:
+        position = rng.choices(remaining, [strengths[p - 1] for p in remaining])[0]
+        remaining.remove(position)
+        order.append(position)
+    return order
+
+
+def _payout(combination: str, odds: float) -> Dict:
+    return {'combination': combination, 'odds': odds, 'amount': int(round(odds * 100))}
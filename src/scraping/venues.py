@@ -0,0 +1,20 @@
+"""
+ボートレース場の定義
+"""
+
+from typing import Optional
+
+# 場コード（公式サイトのjcd）
+VENUE_CODES = {
+    '桐生': 1, '戸田': 2, '江戸川': 3, '平和島': 4, '多摩川': 5, '浜名湖': 6,
+    '蒲郡': 7, '常滑': 8, '津': 9, '三国': 10, 'びわこ': 11, '住之江': 12,
+    '尼崎': 13, '鳴門': 14, '丸亀': 15, '児島': 16, '宮島': 17, '徳山': 18,
+    '下関': 19, '若松': 20, '芦屋': 21, '福岡': 22, '唐津': 23, '大村': 24,
+}
+
+VENUE_NAMES = {code: name for name, code in VENUE_CODES.items()}
+
+
+def venue_code(venue: str) -> Optional[int]:
+    """会場名から場コードを取得"""
+    return VENUE_CODES.get(venue)
@@ -0,0 +1 @@
+# ユーティリティ
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+ログ設定
+呼び出し元のスレッドではメッセージを確定してキューへ積むだけにし、整形と書き込みは
+専用スレッド（QueueListener）で行う。ファイルへはJSON Lines、標準エラーへは従来の形式で出力する
+
+    with log_context(run_id='20241222-180000-000000'):
+        logger.info("買い目%s件を選定", count)   # → {"message": "買い目3件を選定", "run_id": ..., ...}
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from config.settings import LOG_BACKUP_COUNT, LOG_FILE, LOG_FORMAT, LOG_LEVEL, LOG_LEVELS, LOG_MAX_BYTES
+
+# ログに付ける相関ID（実行ID・レースIDなど）
+_context: ContextVar[Dict[str, str]] = ContextVar('log_context', default={})
+
+_listener: Optional[QueueListener] = None
+
+
+@contextmanager
+def log_context(**fields) -> Iterator[Dict[str, str]]:
+    """
+    ブロック内のログに相関IDを付ける（入れ子にすると外側の値を引き継ぐ）
+
+    Args:
+        **fields: 付ける項目（例: run_id、race_id）
+
+    Yields:
+        有効な項目
+    """
+    merged = {**_context.get(), **{key: value for key, value in fields.items() if value is not None}}
+    token = _context.set(merged)
+    try:
+        yield merged
+    finally:
+        _context.reset(token)
+
+
+def current_context() -> Dict[str, str]:
+    """現在の相関ID"""
+    return _context.get()
+
+
+class ContextFilter(logging.Filter):
+    """呼び出し元のスレッドで相関IDをレコードに付ける"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.context = _context.get()
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    メッセージだけ確定してキューへ積むハンドラー
+
+    引数（リスト・辞書・Raceなど）は呼び出し後に変更されうるため、%による組み立ては呼び出し元で行う。
+    時刻・JSONなどの整形と例外のトレースバックの文字列化はリスナー側で行う
+    （標準のQueueHandlerと違い、同じプロセス内のキューなので例外情報はそのまま渡す）
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 他のハンドラーから見たレコードを変えないよう複製する
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """1レコード1行のJSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        data.update(getattr(record, 'context', {}))
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """従来の形式の末尾に相関IDを付ける"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        context = getattr(record, 'context', None)
+        if context:
+            message += ' [' + ' '.join(f"{key}={value}" for key, value in context.items()) + ']'
+        return message
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """
+    モジュールごとのログレベル指定を解析
+
+    Args:
+        spec: 'src.scraping=DEBUG,urllib3=WARNING' の形式
+
+    Returns:
+        ロガー名からレベルへの辞書
+    """
+    levels = {}
+    for item in (spec or '').split(','):
+        name, _, level = item.strip().partition('=')
+        if name and level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(level: str = LOG_LEVEL, log_file: Optional[str] = LOG_FILE,
+                  levels: Optional[Dict[str, str]] = None, console: bool = True) -> QueueListener:
+    """
+    キュー経由のログ出力を設定（もう一度呼ぶと設定し直す）
+
+    Args:
+        level: ルートのログレベル
+        log_file: JSON Linesで書き込むファイル（Noneならファイルに書かない）
+        levels: モジュールごとのログレベル（LOG_LEVELS より優先）
+        console: 標準エラーにも出力するか
+
+    Returns:
+        書き込みを行うリスナー
+    """
+    global _listener
+    stop_logging()
+
+    handlers = []
+    if console:
+        stream_handler = logging.StreamHandler(sys.stderr)
+        stream_handler.setFormatter(ConsoleFormatter(LOG_FORMAT))
+        handlers.append(stream_handler)
+    if log_file:
+        try:
+            Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+            file_handler = RotatingFileHandler(
+                log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+            )
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        except OSError as e:
+            print(f"ログファイルを開けません: {log_file} - {e}", file=sys.stderr)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = LazyQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper())
+    for name, module_level in {**parse_levels(LOG_LEVELS), **(levels or {})}.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """キューに残ったログを書き出してリスナーを止める"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
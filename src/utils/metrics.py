@@ -0,0 +1,339 @@
+"""
+計測
+段ごとの所要時間（スパン）とカウンターを集め、実行ごとにPrometheusテキスト形式・JSON Lines形式で書き出す
+
+    from src.utils import metrics
+
+    metrics.incr('scraper_pages_total')
+    with metrics.span('scraper_fetch', venue='住之江'):
+        ...
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config.settings import METRICS_DIR, METRICS_EXPORTERS, METRICS_MAX_SPANS
+from src.utils.log import log_context
+
+logger = logging.getLogger(__name__)
+
+# (メトリクス名, ((ラベル名, 値), ...))
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+PROMETHEUS_FILE = 'teihou.prom'
+RUNS_FILE = 'runs.jsonl'
+TRACE_FILE = 'trace.jsonl'
+
+
+def _make_key(name: str, labels: Dict) -> MetricKey:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_key(key: MetricKey) -> str:
+    """name{label="value"} の形式（Prometheusテキスト形式・サマリー共通）"""
+    name, labels = key
+    if not labels:
+        return name
+    escaped = (
+        f'{label}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for label, value in labels
+    )
+    return f"{name}{{{','.join(escaped)}}}"
+
+
+class MetricsRegistry:
+    """カウンター・所要時間・スパンの集計"""
+
+    def __init__(self, max_spans: int = METRICS_MAX_SPANS):
+        """
+        初期化
+
+        Args:
+            max_spans: 保持するスパンの上限（古いものから捨てる）
+        """
+        self._lock = threading.Lock()
+        self._counters: Dict[MetricKey, float] = {}
+        # 所要時間は [回数, 合計, 最大] で保持
+        self._timings: Dict[MetricKey, List[float]] = {}
+        self._spans = deque(maxlen=max_spans)
+        self._local = threading.local()
+
+    def incr(self, name: str, value: float = 1, **labels):
+        """
+        カウンターを加算
+
+        Args:
+            name: メトリクス名（例: scraper_pages_total）
+            value: 加算する値
+            labels: ラベル
+        """
+        key = _make_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels):
+        """
+        所要時間を記録
+
+        Args:
+            name: メトリクス名（例: line_api_seconds）
+            seconds: 所要時間（秒）
+            labels: ラベル
+        """
+        key = _make_key(name, labels)
+        with self._lock:
+            timing = self._timings.setdefault(key, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    @contextmanager
+    def span(self, name: str, **labels) -> Iterator[None]:
+        """
+        処理の所要時間を計測してスパンとして記録（<name>_seconds にも集計）
+
+        Args:
+            name: スパン名（例: scraper_fetch）
+            labels: ラベル
+        """
+        stack = self._span_stack()
+        parent = stack[-1] if stack else None
+        stack.append(name)
+        started_at = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            stack.pop()
+            self.observe(f"{name}_seconds", duration, **labels)
+            span = {
+                'name': name,
+                'labels': {key: str(value) for key, value in labels.items()},
+                'parent': parent,
+                'thread': threading.current_thread().name,
+                'start': round(started_at, 6),
+                'duration': round(duration, 6),
+            }
+            if error:
+                span['error'] = error
+            with self._lock:
+                self._spans.append(span)
+
+    def _span_stack(self) -> List[str]:
+        """スレッドごとの実行中スパン"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def snapshot(self) -> Dict:
+        """
+        現在の集計値を取得
+
+        Returns:
+            {'counters': {キー: 値}, 'timings': {キー: [回数, 合計, 最大]}}
+        """
+        with self._lock:
+            return {
+                'counters': dict(self._counters),
+                'timings': {key: list(value) for key, value in self._timings.items()},
+            }
+
+    def drain_spans(self) -> List[Dict]:
+        """記録済みのスパンを取り出す"""
+        with self._lock:
+            spans = list(self._spans)
+            self._spans.clear()
+        return spans
+
+    def reset(self):
+        """集計をすべて消去"""
+        with self._lock:
+            self._counters.clear()
+            self._timings.clear()
+            self._spans.clear()
+
+    def to_prometheus(self) -> str:
+        """
+        Prometheusテキスト形式に変換（所要時間はsummaryの_count・_sumと最大値のgauge）
+
+        Returns:
+            テキスト
+        """
+        snapshot = self.snapshot()
+        lines = []
+
+        by_name: Dict[str, List] = {}
+        for key, value in snapshot['counters'].items():
+            by_name.setdefault(key[0], []).append((key, value))
+        for name in sorted(by_name):
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(by_name[name]):
+                lines.append(f"{_format_key(key)} {value:g}")
+
+        by_name = {}
+        for key, value in snapshot['timings'].items():
+            by_name.setdefault(key[0], []).append((key, value))
+        for name in sorted(by_name):
+            lines.append(f"# TYPE {name} summary")
+            for (_, labels), (count, total, _) in sorted(by_name[name]):
+                lines.append(f"{_format_key((name + '_count', labels))} {count:g}")
+                lines.append(f"{_format_key((name + '_sum', labels))} {total:.6f}")
+            lines.append(f"# TYPE {name}_max gauge")
+            for (_, labels), (_, _, maximum) in sorted(by_name[name]):
+                lines.append(f"{_format_key((name + '_max', labels))} {maximum:.6f}")
+
+        return '\n'.join(lines) + '\n'
+
+    @contextmanager
+    def run(self, job: str, run_id: Optional[str] = None,
+            directory: Optional[str] = None,
+            exporters: Tuple[str, ...] = METRICS_EXPORTERS) -> Iterator[Dict]:
+        """
+        1回の実行を計測し、終了時にサマリーをログへ出して書き出す
+
+        Args:
+            job: ジョブ名（例: prediction）
+            run_id: 実行ID（省略時は開始時刻から作成）
+            directory: 書き出し先ディレクトリ
+            exporters: 書き出し形式（'prometheus'・'jsonl'）
+
+        Yields:
+            実行情報（終了後は 'summary' にサマリーが入る）
+        """
+        info = {
+            'job': job,
+            'run_id': run_id or datetime.now().strftime('%Y%m%d-%H%M%S-%f'),
+        }
+        before = self.snapshot()
+        started = time.perf_counter()
+        status = 'ok'
+        try:
+            # 実行中のログには実行IDを付ける
+            with self.span('job', job=job), log_context(job=job, run_id=info['run_id']):
+                yield info
+        except BaseException:
+            status = 'error'
+            raise
+        finally:
+            info['summary'] = self._run_summary(info, before, time.perf_counter() - started, status)
+            self._log_summary(info['summary'])
+            try:
+                self.export(info['summary'], directory, exporters)
+            except Exception as e:
+                logger.error("計測値の書き出しエラー: %s", e)
+
+    def _run_summary(self, info: Dict, before: Dict, elapsed: float, status: str) -> Dict:
+        """開始時点からの差分をサマリーにまとめる"""
+        after = self.snapshot()
+
+        counters = {}
+        for key, value in after['counters'].items():
+            delta = value - before['counters'].get(key, 0)
+            if delta:
+                counters[_format_key(key)] = delta
+
+        timings = {}
+        for key, (count, total, _) in after['timings'].items():
+            prev_count, prev_total, _ = before['timings'].get(key, (0, 0.0, 0.0))
+            if count > prev_count:
+                runs = count - prev_count
+                timings[_format_key(key)] = {
+                    'count': runs,
+                    'total': round(total - prev_total, 6),
+                    'avg': round((total - prev_total) / runs, 6),
+                }
+
+        return {
+            **{key: value for key, value in info.items() if key != 'summary'},
+            'finished_at': datetime.now().isoformat(timespec='seconds'),
+            'status': status,
+            'elapsed': round(elapsed, 3),
+            'counters': counters,
+            'timings': timings,
+        }
+
+    def _log_summary(self, summary: Dict):
+        """サマリーをログへ出力"""
+        logger.info("実行サマリー %s (%s): %.2f秒 / %s",
+                    summary['job'], summary['run_id'], summary['elapsed'], summary['status'])
+        for name, value in sorted(summary['counters'].items()):
+            logger.info("  %s = %g", name, value)
+        for name, timing in sorted(summary['timings'].items()):
+            logger.info("  %s = %.3f秒 (%s回, 平均 %.1fms)",
+                        name, timing['total'], timing['count'], timing['avg'] * 1000)
+
+    def export(self, summary: Optional[Dict] = None, directory: Optional[str] = None,
+               exporters: Tuple[str, ...] = METRICS_EXPORTERS):
+        """
+        計測値をファイルへ書き出す
+
+        - prometheus: 累計値を teihou.prom に書き出す（node_exporterのtextfileコレクター向け）
+        - jsonl: 実行サマリーを runs.jsonl に、スパンを trace.jsonl に追記
+
+        Args:
+            summary: 実行サマリー
+            directory: 書き出し先ディレクトリ
+            exporters: 書き出し形式
+        """
+        directory = Path(directory or METRICS_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        if 'prometheus' in exporters:
+            # 読み取り側が書きかけのファイルを読まないよう置き換える
+            path = directory / PROMETHEUS_FILE
+            tmp_path = path.with_suffix('.prom.tmp')
+            tmp_path.write_text(self.to_prometheus(), encoding='utf-8')
+            os.replace(tmp_path, path)
+
+        if 'jsonl' in exporters:
+            spans = self.drain_spans()
+            run_id = summary['run_id'] if summary else None
+            if summary:
+                with open(directory / RUNS_FILE, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(summary, ensure_ascii=False) + '\n')
+            if spans:
+                with open(directory / TRACE_FILE, 'a', encoding='utf-8') as f:
+                    for span in spans:
+                        f.write(json.dumps({'run_id': run_id, **span}, ensure_ascii=False) + '\n')
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """プロセス全体で共有する集計"""
+    return _registry
+
+
+def incr(name: str, value: float = 1, **labels):
+    """共有の集計のカウンターを加算"""
+    _registry.incr(name, value, **labels)
+
+
+def observe(name: str, seconds: float, **labels):
+    """共有の集計に所要時間を記録"""
+    _registry.observe(name, seconds, **labels)
+
+
+def span(name: str, **labels):
+    """共有の集計でスパンを計測"""
+    return _registry.span(name, **labels)
+
+
+def run(job: str, run_id: Optional[str] = None):
+    """共有の集計で1回の実行を計測"""
+    return _registry.run(job, run_id)
@@ -0,0 +1,220 @@
+"""
+段ごとのプロファイル
+取得・選定・通知・記録の各段をcProfileで計測し、区切りごとにtracemallocのスナップショットを取って
+段ごとのプロファイル（<段>.prof）と上位の関数・メモリ確保箇所のレポート（report.txt）を書き出す
+
+    python main.py --profile notify
+    python -m pstats data/runs/<実行ID>/profile/scrape.prof
+
+--profile を指定しないときは段を包まないため、通常の実行には影響しない
+"""
+
+import cProfile
+import io
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from config.settings import PROFILE_TOP_N, PROFILE_TRACEMALLOC_FRAMES
+
+logger = logging.getLogger(__name__)
+
+# スナップショットから除くファイル（計測自体の確保）
+_IGNORED_FILES = (tracemalloc.__file__, __file__, '<frozen importlib._bootstrap>', '<unknown>')
+
+
+class StageProfiler:
+    """段ごとのCPUプロファイルと区切りごとのメモリ確保を集める"""
+
+    def __init__(self, directory: str, top_n: int = PROFILE_TOP_N,
+                 frames: int = PROFILE_TRACEMALLOC_FRAMES):
+        """
+        初期化
+
+        Args:
+            directory: 書き出し先ディレクトリ
+            top_n: レポートに載せる上位件数
+            frames: メモリ確保箇所として記録するスタックの深さ
+        """
+        self.directory = Path(directory)
+        self.top_n = top_n
+        self.frames = frames
+        self._profiles: Dict[str, List[cProfile.Profile]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._allocations: List[str] = []
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._started = 0.0
+        self._owns_tracemalloc = False
+        self._skipped = 0
+
+    def __enter__(self) -> 'StageProfiler':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish()
+
+    def start(self):
+        """メモリ確保の記録を始めて基準のスナップショットを取る"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._owns_tracemalloc = True
+        self._previous = self._take_snapshot()
+        self._started = time.perf_counter()
+        logger.info("プロファイルを開始: %s", self.directory)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        ブロックをその段としてCPUプロファイルする（入れ子にすると内側の段に付け替える）
+
+        Args:
+            name: 段の名前（例: scrape）
+        """
+        stack = self._stack()
+        if stack and stack[-1] is not None:
+            stack[-1].disable()
+        profile = self._thread_profile(name)
+        try:
+            profile.enable()
+        except ValueError:
+            # 別のプロファイラーが動いている（Python 3.12以降はプロセスで1つ）
+            profile = None
+            with self._lock:
+                self._skipped += 1
+        stack.append(profile)
+        try:
+            yield
+        finally:
+            stack.pop()
+            if profile is not None:
+                profile.disable()
+            if stack and stack[-1] is not None:
+                stack[-1].enable()
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        """関数の呼び出しをその段としてプロファイルする"""
+        def wrapped(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+        return wrapped
+
+    def wrap_iter(self, name: str, items: Iterable) -> Iterator:
+        """イテレーターから1件取り出す処理をその段としてプロファイルする（取り出した後の処理は含めない）"""
+        iterator = iter(items)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    @contextmanager
+    def instrument(self, obj: Any, attr: str, name: str) -> Iterator[None]:
+        """
+        ブロック内でオブジェクトのメソッドをその段としてプロファイルする（ワーカースレッドで呼ばれる処理向け）
+
+        Args:
+            obj: 対象のオブジェクト
+            attr: メソッド名
+            name: 段の名前
+        """
+        original = getattr(obj, attr)
+        shadowed = attr in vars(obj)
+        setattr(obj, attr, self.wrap(name, original))
+        try:
+            yield
+        finally:
+            if shadowed:
+                setattr(obj, attr, original)
+            else:
+                delattr(obj, attr)
+
+    def snapshot(self, label: str):
+        """
+        メモリ確保のスナップショットを取り、前回からの増加の上位をレポートに加える
+
+        Args:
+            label: 区切りの名前（例: select、日付）
+        """
+        if not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = self._take_snapshot()
+        with self._lock:
+            lines = [f"--- {label}: 現在 {current / 1024 / 1024:.1f}MB / ピーク {peak / 1024 / 1024:.1f}MB"]
+            lines += [str(stat) for stat in snapshot.compare_to(self._previous, 'lineno')[:self.top_n]]
+            self._allocations.append('\n'.join(lines))
+            # 前回分だけ残して長い期間でもスナップショットを溜めない
+            self._previous = snapshot
+        tracemalloc.reset_peak()
+
+    def finish(self) -> Path:
+        """
+        段ごとのプロファイルとレポートを書き出す
+
+        Returns:
+            レポートのパス
+        """
+        self.snapshot('終了')
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        sections = [f"所要時間: {time.perf_counter() - self._started:.2f}秒"]
+        if self._skipped:
+            sections.append(f"別のプロファイラーが動いていたため計測できなかった呼び出し: {self._skipped}")
+
+        for name, profiles in self._profiles.items():
+            profiles = [profile for profile in profiles if _has_stats(profile)]
+            if not profiles:
+                continue
+            buffer = io.StringIO()
+            stats = pstats.Stats(*profiles, stream=buffer)
+            stats.dump_stats(self.directory / f"{name}.prof")
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top_n)
+            sections.append(f"=== {name}（{len(profiles)}スレッド）\n{buffer.getvalue()}")
+
+        sections.append("=== メモリ確保（前の区切りからの増加）\n" + '\n\n'.join(self._allocations))
+        report_path = self.directory / 'report.txt'
+        report_path.write_text('\n\n'.join(sections), encoding='utf-8')
+        logger.info("プロファイルを書き出し: %s", report_path)
+        return report_path
+
+    def _stack(self) -> List[Optional[cProfile.Profile]]:
+        """スレッドごとの計測中の段"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _thread_profile(self, name: str) -> cProfile.Profile:
+        """スレッドごと・段ごとのプロファイラー（cProfileはスレッドをまたげない）"""
+        profiles = getattr(self._local, 'profiles', None)
+        if profiles is None:
+            profiles = self._local.profiles = {}
+        profile = profiles.get(name)
+        if profile is None:
+            profile = profiles[name] = cProfile.Profile()
+            with self._lock:
+                self._profiles.setdefault(name, []).append(profile)
+        return profile
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in _IGNORED_FILES]
+        )
+
+
+def _has_stats(profile: cProfile.Profile) -> bool:
+    profile.create_stats()
+    return bool(profile.stats)
@@ -0,0 +1,119 @@
+"""
+流量制御
+複数スレッドで共有するトークンバケットと、複数プロセスで共有する一定間隔の制御
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """1分あたりの上限に合わせてトークンを補充するバケット"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        """
+        初期化
+
+        Args:
+            per_minute: 1分あたりに補充するトークン数
+            capacity: 貯められるトークンの上限（省略時は1分ぶん、1にすると一定間隔になる）
+        """
+        self.capacity = per_minute if capacity is None else capacity
+        self.rate = per_minute / 60
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """
+        トークンを1つ取得（空くまで待つ）
+
+        Returns:
+            待機した秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    @property
+    def available(self) -> float:
+        """現在の残りトークン数"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class SharedRateLimiter:
+    """
+    複数プロセスで共有する一定間隔の流量制御
+
+    次にリクエストできる時刻をSQLiteに持ち、各プロセスは順に枠を予約してその時刻まで待つ
+    （TokenBucket(per_minute, capacity=1) をプロセスをまたいで守る）
+    """
+
+    def __init__(self, db_path: str, per_minute: float, name: str = 'default'):
+        """
+        初期化
+
+        Args:
+            db_path: 予約時刻を保持するデータベース
+            per_minute: 1分あたりのリクエスト数
+            name: 制御の名前（同じ名前のプロセス同士で間隔を共有する）
+        """
+        self.interval = 60 / per_minute
+        self.name = name
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits (name TEXT PRIMARY KEY, next_at REAL NOT NULL)'
+        )
+
+    def acquire(self) -> float:
+        """
+        次の枠を予約してその時刻まで待つ
+
+        Returns:
+            待機した秒数
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT next_at FROM rate_limits WHERE name = ?', (self.name,)
+                ).fetchone()
+                now = time.time()
+                slot = max(now, row[0] if row else 0.0)
+                self._conn.execute(
+                    'INSERT INTO rate_limits (name, next_at) VALUES (?, ?) '
+                    'ON CONFLICT(name) DO UPDATE SET next_at = excluded.next_at',
+                    (self.name, slot + self.interval)
+                )
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return max(wait, 0.0)
+
+    def close(self):
+        """接続を閉じる"""
+        with self._lock:
+            self._conn.close()
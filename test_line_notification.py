@@ -5,10 +5,12 @@ LINE通知機能のテストスクリプト
 
 import sys
 import os
+import argparse
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.notification.line_notifier import LineNotifier
+from src.notification.fake_line_api import FakeLineApiServer
 import logging
 
 # ログ設定
@@ -18,12 +20,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def test_line_connection():
+def test_line_connection(endpoint=None):
     """LINE API接続テスト"""
     print("=== LINE API接続テスト ===")
     
     try:
-        notifier = LineNotifier()
+        if endpoint:
+            # 代替サーバーではトークンの中身は検証されない
+            notifier = LineNotifier(endpoint=endpoint, channel_access_token='local-test-token')
+        else:
+            notifier = LineNotifier()
         
         # 接続テスト
         if notifier.validate_connection():
@@ -159,11 +165,23 @@ def test_result_message(notifier):
 
 def main():
     """メイン処理"""
+    parser = argparse.ArgumentParser(description='LINE通知機能のテスト')
+    parser.add_argument('--fake', action='store_true',
+                        help='実APIの代わりにローカルの代替サーバーへ送信（通数を消費しない）')
+    args = parser.parse_args()
+    
     print("ちょいアツ艇報 - LINE通知テスト")
     print("=" * 40)
     
+    fake_server = None
+    endpoint = None
+    if args.fake:
+        fake_server = FakeLineApiServer()
+        endpoint = fake_server.start()
+        print(f"🧪 LINE API代替サーバーを使用: {endpoint}")
+    
     # 1. 接続テスト
-    notifier = test_line_connection()
+    notifier = test_line_connection(endpoint)
     
     # 2. シンプルメッセージテスト
     test_simple_message(notifier)
@@ -175,7 +193,12 @@ def main():
     test_result_message(notifier)
     
     print("\n=== テスト完了 ===")
-    print("📱 LINE公式アカウントで通知を確認してください")
+    if fake_server:
+        for record in fake_server.received:
+            print(f"{record['method']} {record['path']} -> {record['status']}")
+        fake_server.stop()
+    else:
+        print("📱 LINE公式アカウントで通知を確認してください")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+オッズ時系列ストアのテスト
+"""
+
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from src.data.odds_store import OddsStore, COMBINATIONS, INDEX_FILE, ODDS_FILE
+
+
+def make_odds(value: float) -> dict:
+    return {combination: value for combination in COMBINATIONS}
+
+
+def test_torn_append(tmp_path):
+    """オッズだけ書いて止まった追記の後も、索引とオッズの行がずれないこと"""
+    store = OddsStore(str(tmp_path))
+    store.append('2024-12-23', '住之江', 12, make_odds(10.0), timestamp=1000)
+
+    # オッズの行を書いた後、索引を書く前に止まった状態を再現
+    day_dir = tmp_path / '2024-12-23'
+    with open(day_dir / ODDS_FILE, 'ab') as f:
+        f.write(np.full(len(COMBINATIONS), 99.0, dtype='<f4').tobytes())
+    # 索引の途中まで書いて止まった端数
+    with open(day_dir / INDEX_FILE, 'ab') as f:
+        f.write(b'\x00\x01\x02')
+
+    store.append('2024-12-23', '住之江', 12, make_odds(20.0), timestamp=2000)
+    store.append('2024-12-23', '住之江', 12, make_odds(30.0), timestamp=3000)
+
+    timestamps, odds = store.slice('2024-12-23', '住之江', 12)
+    assert store.snapshot_count('2024-12-23') == 3
+    assert timestamps.astype('int64').tolist() == [1000000, 2000000, 3000000]
+    assert odds[:, 0].tolist() == [10.0, 20.0, 30.0]
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        test_torn_append(Path(tmp_dir))
+    print("✅ オッズ時系列ストアのテスト成功")
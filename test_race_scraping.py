@@ -96,7 +96,7 @@ def test_data_recording(races, manager):
             'amount': 100
         }
         
-        success = manager.record_prediction(race, bet_data)
+        success = manager.record_prediction(race, bet_data) and manager.flush()
         
         if success:
             print("✅ データ記録成功")